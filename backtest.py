@@ -0,0 +1,353 @@
+#!/usr/bin/python3
+################################################################################
+#
+# Copyright (c) 2024-2025 Dawson Dean
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+#
+# Backtesting.
+#
+# A strategy is a position column: the fraction of the capital of a ticker
+# that is invested at the close of each day, from 0 (all cash) to 1 (fully
+# invested). The position at the close of day k earns the return from the
+# close of day k to the close of day k+1, so a rule that looks at day k
+# never trades on prices it could not have seen.
+#
+# Most strategies are entry and exit signals computed from whole columns
+# (see RunBacktest). Rules that depend on their own past, like a stop loss
+# from the entry price, walk the days one at a time instead (see
+# RunEventBacktest). Both end with the same ComputeBacktestResult.
+#
+# Everything here works on the history columns directly, so there are no
+# per-day tuples and no iterator state, and any number of tickers can be
+# tested at once.
+################################################################################
+import bisect
+from array import array
+
+import priceHistory as PriceHistory
+import universePanel as UniversePanel
+
+VALUE_COLUMN_TYPECODE = PriceHistory.VALUE_COLUMN_TYPECODE
+SIGNAL_COLUMN_TYPECODE = 'b'
+
+DEFAULT_INITIAL_CAPITAL = 10000.0
+
+
+
+
+
+################################################################################
+#
+# [ComputeThresholdSignalColumn]
+#
+# 1 on each day that the value is above the threshold (fAbove) or below it
+# (not fAbove), and 0 on every other day.
+################################################################################
+def ComputeThresholdSignalColumn(valueColumn, threshold, fAbove):
+    if (fAbove):
+        return array(SIGNAL_COLUMN_TYPECODE, [value > threshold for value in valueColumn])
+    return array(SIGNAL_COLUMN_TYPECODE, [value < threshold for value in valueColumn])
+# End - ComputeThresholdSignalColumn
+
+
+
+
+
+################################################################################
+#
+# [MakeThresholdSignalFunction]
+#
+# Returns a signal function for RunBacktest that enters when columnName is
+# below entryBelow, and exits when it is above exitAbove. For example,
+# MakeThresholdSignalFunction('RSI', 30, 70).
+################################################################################
+def MakeThresholdSignalFunction(columnName, entryBelow, exitAbove):
+    def ComputeSignals(history):
+        valueColumn = history.GetColumn(columnName)
+        return (ComputeThresholdSignalColumn(valueColumn, entryBelow, False), 
+                ComputeThresholdSignalColumn(valueColumn, exitAbove, True))
+    return ComputeSignals
+# End - MakeThresholdSignalFunction
+
+
+
+
+
+################################################################################
+#
+# [ComputePositionColumn]
+#
+# Turn entry and exit signals into positions. A position of positionSize is
+# opened on an entry day and held until an exit day. If both signals are set
+# on the same day, the exit wins.
+################################################################################
+def ComputePositionColumn(entrySignalColumn, exitSignalColumn, positionSize=1.0):
+    numDays = len(entrySignalColumn)
+    positionColumn = array(VALUE_COLUMN_TYPECODE, [0.0]) * numDays
+    currentPosition = 0.0
+    for index in range(numDays):
+        if (exitSignalColumn[index]):
+            currentPosition = 0.0
+        elif (entrySignalColumn[index]):
+            currentPosition = positionSize
+        positionColumn[index] = currentPosition
+    # End - for index in range(numDays):
+
+    return positionColumn
+# End - ComputePositionColumn
+
+
+
+
+
+################################################################################
+#
+# class CBacktestResult
+#
+# The result of testing one position column on one ticker.
+# StrategyReturnColumn[k] and EquityColumn[k] are for the close of day k.
+# NumTrades counts every change of position, so a round trip is 2 trades.
+################################################################################
+class CBacktestResult(object):
+    #####################################################
+    # Constructor - This method is part of any class
+    #####################################################
+    def __init__(self, tickerSymbol, dateColumn, positionColumn, strategyReturnColumn, equityColumn, numTrades, initialCapital):
+        self.TickerSymbol = tickerSymbol
+        self.DateColumn = dateColumn
+        self.PositionColumn = positionColumn
+        self.StrategyReturnColumn = strategyReturnColumn
+        self.EquityColumn = equityColumn
+        self.NumTrades = numTrades
+        self.InitialCapital = initialCapital
+    # End -  __init__
+
+
+    #####################################################
+    # [CBacktestResult::GetFinalEquity]
+    #####################################################
+    def GetFinalEquity(self):
+        if (len(self.EquityColumn) <= 0):
+            return self.InitialCapital
+        return self.EquityColumn[len(self.EquityColumn) - 1]
+
+
+    #####################################################
+    # [CBacktestResult::GetTotalReturnPercent]
+    #####################################################
+    def GetTotalReturnPercent(self):
+        return ((self.GetFinalEquity() / self.InitialCapital) - 1.0) * 100.0
+
+
+    #####################################################
+    # [CBacktestResult::GetMaxDrawdownPercent]
+    #####################################################
+    def GetMaxDrawdownPercent(self):
+        return ComputeMaxDrawdownPercent(self.EquityColumn)
+
+
+    #####################################################
+    # [CBacktestResult::GetSummaryDict]
+    #####################################################
+    def GetSummaryDict(self):
+        return {'Symbol': self.TickerSymbol, 'NumTrades': self.NumTrades, 
+                'FinalEquity': self.GetFinalEquity(), 'TotalReturnPercent': self.GetTotalReturnPercent(), 
+                'MaxDrawdownPercent': self.GetMaxDrawdownPercent()}
+    # End - GetSummaryDict
+
+# End - CBacktestResult
+
+
+
+
+
+################################################################################
+#
+# [ComputeMaxDrawdownPercent]
+#
+# The largest drop from a peak of the equity to a later low, in percent.
+################################################################################
+def ComputeMaxDrawdownPercent(equityColumn):
+    maxDrawdown = 0.0
+    peakEquity = 0.0
+    for equity in equityColumn:
+        if (equity > peakEquity):
+            peakEquity = equity
+        elif (peakEquity > 0):
+            maxDrawdown = max(maxDrawdown, (peakEquity - equity) / peakEquity)
+    # End - for equity in equityColumn:
+
+    return maxDrawdown * 100.0
+# End - ComputeMaxDrawdownPercent
+
+
+
+
+
+################################################################################
+#
+# [ComputeBacktestResult]
+#
+# Apply a position column to the close prices of a ticker, in one pass.
+# costPercent is charged on every change of position, in percent of the
+# amount traded.
+################################################################################
+def ComputeBacktestResult(tickerSymbol, history, positionColumn, costPercent=0.0, initialCapital=DEFAULT_INITIAL_CAPITAL):
+    closeColumn = history.GetColumn('Cl')
+    numDays = len(closeColumn)
+    strategyReturnColumn = array(VALUE_COLUMN_TYPECODE, [0.0]) * numDays
+    equityColumn = array(VALUE_COLUMN_TYPECODE, [0.0]) * numDays
+    costFraction = costPercent / 100.0
+
+    numTrades = 0
+    equity = initialCapital
+    prevPosition = 0.0
+    for index in range(numDays):
+        # The return of the position that was held since the last close
+        dayReturn = 0.0
+        if ((index > 0) and (prevPosition != 0.0) and (closeColumn[index - 1] != 0)):
+            dayReturn = prevPosition * ((closeColumn[index] / closeColumn[index - 1]) - 1.0)
+
+        # Trade at this close
+        position = positionColumn[index]
+        if (position != prevPosition):
+            dayReturn -= abs(position - prevPosition) * costFraction
+            numTrades += 1
+        prevPosition = position
+
+        strategyReturnColumn[index] = dayReturn
+        equity = equity * (1.0 + dayReturn)
+        equityColumn[index] = equity
+    # End - for index in range(numDays):
+
+    return CBacktestResult(tickerSymbol, history.GetDateColumn(), positionColumn, strategyReturnColumn, 
+                            equityColumn, numTrades, initialCapital)
+# End - ComputeBacktestResult
+
+
+
+
+
+################################################################################
+#
+# [RunBacktest]
+#
+# Test one signal rule on every ticker in stockTickerDict.
+# signalFunction(history) returns (entrySignalColumn, exitSignalColumn) for
+# a PriceHistory.CPriceHistory, one entry per day. See MakeThresholdSignalFunction.
+# Returns a dictionary from each symbol to its CBacktestResult.
+################################################################################
+def RunBacktest(stockTickerDict, signalFunction, positionSize=1.0, costPercent=0.0, initialCapital=DEFAULT_INITIAL_CAPITAL):
+    resultDict = {}
+    for tickerSymbol, stockTicker in stockTickerDict.items():
+        if ((stockTicker is None) or (len(stockTicker.History) <= 0)):
+            continue
+        entrySignalColumn, exitSignalColumn = signalFunction(stockTicker.History)
+        positionColumn = ComputePositionColumn(entrySignalColumn, exitSignalColumn, positionSize)
+        resultDict[tickerSymbol] = ComputeBacktestResult(tickerSymbol, stockTicker.History, positionColumn, 
+                                                        costPercent, initialCapital)
+    # End - for tickerSymbol, stockTicker in stockTickerDict.items():
+
+    return resultDict
+# End - RunBacktest
+
+
+
+
+
+################################################################################
+#
+# [RunEventBacktest]
+#
+# Test a rule that depends on its own past decisions, one day at a time.
+# ruleFunction(history, index, currentPosition, stateDict) returns the position
+# to hold at the close of day index. stateDict starts empty for each ticker,
+# and the rule can keep anything in it, like the price it entered at.
+# Returns a dictionary from each symbol to its CBacktestResult.
+################################################################################
+def RunEventBacktest(stockTickerDict, ruleFunction, costPercent=0.0, initialCapital=DEFAULT_INITIAL_CAPITAL):
+    resultDict = {}
+    for tickerSymbol, stockTicker in stockTickerDict.items():
+        if ((stockTicker is None) or (len(stockTicker.History) <= 0)):
+            continue
+        history = stockTicker.History
+        numDays = len(history)
+        positionColumn = array(VALUE_COLUMN_TYPECODE, [0.0]) * numDays
+        stateDict = {}
+        currentPosition = 0.0
+        for index in range(numDays):
+            currentPosition = ruleFunction(history, index, currentPosition, stateDict)
+            positionColumn[index] = currentPosition
+        # End - for index in range(numDays):
+
+        resultDict[tickerSymbol] = ComputeBacktestResult(tickerSymbol, history, positionColumn, 
+                                                        costPercent, initialCapital)
+    # End - for tickerSymbol, stockTicker in stockTickerDict.items():
+
+    return resultDict
+# End - RunEventBacktest
+
+
+
+
+
+################################################################################
+#
+# [ComputePortfolioEquityColumn]
+#
+# The capital is split equally between the tickers of resultDict, and each
+# part is invested by its own result. Returns (dateColumn, equityColumn) on
+# every date that any of the tickers traded. A ticker counts as its initial
+# capital before its first date, and as its last equity after its last date.
+################################################################################
+def ComputePortfolioEquityColumn(resultDict):
+    resultList = [result for result in resultDict.values() if (len(result.DateColumn) > 0)]
+    dateColumn = UniversePanel.MakeSharedDateColumn([result.DateColumn for result in resultList])
+    numDates = len(dateColumn)
+    if (len(resultList) <= 0):
+        return dateColumn, array(VALUE_COLUMN_TYPECODE)
+
+    # Add up the change in equity of every ticker on each date, then sum the changes.
+    equityChangeColumn = array(VALUE_COLUMN_TYPECODE, [0.0]) * numDates
+    totalInitialCapital = 0.0
+    for result in resultList:
+        weight = 1.0 / len(resultList)
+        totalInitialCapital += weight * result.InitialCapital
+        prevEquity = result.InitialCapital
+        dateIndex = bisect.bisect_left(dateColumn, result.DateColumn[0])
+        for tickerIndex, tickerDate in enumerate(result.DateColumn):
+            while (dateColumn[dateIndex] != tickerDate):
+                dateIndex += 1
+            equity = result.EquityColumn[tickerIndex]
+            equityChangeColumn[dateIndex] += weight * (equity - prevEquity)
+            prevEquity = equity
+        # End - for tickerIndex, tickerDate in enumerate(result.DateColumn):
+    # End - for result in resultList:
+
+    equityColumn = array(VALUE_COLUMN_TYPECODE, [0.0]) * numDates
+    equity = totalInitialCapital
+    for dateIndex in range(numDates):
+        equity += equityChangeColumn[dateIndex]
+        equityColumn[dateIndex] = equity
+    return dateColumn, equityColumn
+# End - ComputePortfolioEquityColumn
+
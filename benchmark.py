@@ -0,0 +1,513 @@
+#!/usr/bin/python3
+################################################################################
+#
+# Copyright (c) 2024-2025 Dawson Dean
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+#
+# Benchmarks of the hot paths of CStockTicker, on synthetic price histories.
+#
+# Everything runs offline. Each history is a seeded random walk, so the same
+# arguments always give the same prices, and runs on different commits time
+# the same work.
+#
+# Usage:
+#   python3 benchmark.py [--numDays 1000,10000] [--numTickers 1,100] [--repeats 3]
+#                        [--engines lazy,columnar] [--output bench_output.txt]
+#                        [--compare oldResults.txt] [--noMemory]
+#
+# The output file has one JSON record per line, one for each benchmark and
+# size. Each record has the best and mean time in seconds and the peak memory
+# allocated while it ran, measured with tracemalloc in a separate run so it
+# does not slow down the timed runs. --compare prints the time ratio of each
+# benchmark against an older output file.
+################################################################################
+import os
+import sys
+import gc
+import json
+import time
+import random
+import argparse
+import platform
+import subprocess
+import tracemalloc
+from datetime import date, timedelta
+
+import stockTicker as StockTicker
+import fileTemplate as FileTemplate
+
+DEFAULT_NUM_DAYS_LIST = [1000, 10000]
+DEFAULT_NUM_TICKERS_LIST = [1, 100]
+DEFAULT_NUM_REPEATS = 3
+DEFAULT_ENGINE_LIST = [StockTicker.STATS_ENGINE_LAZY, StockTicker.STATS_ENGINE_COLUMNAR]
+DEFAULT_OUTPUT_FILE_NAME = "bench_output.txt"
+DEFAULT_SEED = 1234
+
+NUM_GOTO_DATES = 1000
+NUM_EXTREME_PRICES = 10
+FIRST_HISTORY_DATE = date(1980, 1, 2)
+
+g_TemplateFilePathName = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stockTemplate.htm")
+
+
+
+
+
+################################################################################
+#
+# [MakeSyntheticValueDictList]
+#
+# numDays trading days (Monday to Friday) of a random walk, in the format of
+# StockTicker.LoadTickerFromValueDict. The stat values are all 0.
+################################################################################
+def MakeSyntheticValueDictList(numDays, seed):
+    randomGenerator = random.Random(seed)
+    valueDictList = []
+    currentDate = FIRST_HISTORY_DATE
+    closePrice = 20.0 + (randomGenerator.random() * 80.0)
+    while (len(valueDictList) < numDays):
+        if (currentDate.weekday() < 5):
+            openPrice = closePrice * (1.0 + randomGenerator.gauss(0.0, 0.005))
+            closePrice = max(0.5, closePrice * (1.0 + randomGenerator.gauss(0.0003, 0.02)))
+            highPrice = max(openPrice, closePrice) * (1.0 + abs(randomGenerator.gauss(0.0, 0.005)))
+            lowPrice = min(openPrice, closePrice) * (1.0 - abs(randomGenerator.gauss(0.0, 0.005)))
+            valueDictList.append({'y': currentDate.year, 'm': currentDate.month, 'd': currentDate.day,
+                                'op': openPrice, 'cl': closePrice, 'vo': randomGenerator.randint(1000, 10000000),
+                                'hi': highPrice, 'lo': lowPrice, 'rsi': 0, 'ema12': 0, 'ema26': 0, 'macd': 0,
+                                'kStochastic': 0, 'dStochastic': 0, 'drop': 0})
+        currentDate = currentDate + timedelta(days=1)
+    # End - while (len(valueDictList) < numDays):
+
+    return valueDictList
+# End - MakeSyntheticValueDictList
+
+
+
+
+
+################################################################################
+#
+# [MakeSyntheticTicker]
+#
+# A CStockTicker with the stats of every day computed.
+################################################################################
+def MakeSyntheticTicker(tickerSymbol, numDays, seed):
+    # LoadTickerFromValueDict keeps the newest day only as the current price, so add one more day.
+    valueDictList = MakeSyntheticValueDictList(numDays + 1, seed)
+    stockTicker = StockTicker.LoadTickerFromValueDict(tickerSymbol, valueDictList, 0)
+    ComputeAndReadAllStats(stockTicker, StockTicker.STATS_ENGINE_COLUMNAR)
+    return stockTicker
+# End - MakeSyntheticTicker
+
+
+
+
+
+################################################################################
+#
+# [ComputeAndReadAllStats]
+#
+# The lazy engine only computes a stat column when it is read, so read them
+# all, or it would only time the bookkeeping.
+################################################################################
+def ComputeAndReadAllStats(stockTicker, engineName):
+    stockTicker.ComputeAllStats(engineName)
+    for columnName in StockTicker.g_CurrentStatColumnNameList:
+        stockTicker.History.GetColumn(columnName)
+        stockTicker.GetCurrentStat(columnName)
+# End - ComputeAndReadAllStats
+
+
+
+
+
+################################################################################
+#
+# [MakeGotoDateList]
+#
+# Seeded random dates from the first to the newest day of the ticker,
+# including weekends, which GotoDate does not find.
+################################################################################
+def MakeGotoDateList(stockTicker, numDates, seed):
+    randomGenerator = random.Random(seed)
+    firstYear, firstMonth, firstDay = stockTicker.History.GetDate(0)
+    lastYear, lastMonth, lastDay = stockTicker.History.GetDate(len(stockTicker.History) - 1)
+    firstOrdinal = date(firstYear, firstMonth, firstDay).toordinal()
+    lastOrdinal = date(lastYear, lastMonth, lastDay).toordinal()
+
+    dateList = []
+    for _ in range(numDates):
+        newDate = date.fromordinal(randomGenerator.randint(firstOrdinal, lastOrdinal))
+        dateList.append((newDate.year, newDate.month, newDate.day))
+    return dateList
+# End - MakeGotoDateList
+
+
+
+
+
+################################################################################
+#
+# [MakeSyntheticReport]
+#
+# A report like makeFinancialReportHTML.py makes, with one table row and one
+# Javascript row per ticker.
+################################################################################
+def MakeSyntheticReport(numTickers, seed):
+    randomGenerator = random.Random(seed)
+    report = FileTemplate.MakeTemplate()
+    report.SetBodyStr("Synthetic report")
+    report.AddHTMLTableRowToDoc(["<b>Stock</b>", "<b>Price</b>", "<b>RSI</b>", "<b>Stochastic</b>", "<b>MACD</b>"])
+    for tickerIndex in range(numTickers):
+        tickerSymbolStr = "T" + str(tickerIndex)
+        price = round(randomGenerator.uniform(1.0, 500.0), 2)
+        rsiScore = round(randomGenerator.uniform(0.0, 100.0), 2)
+        kStoScore = round(randomGenerator.uniform(0.0, 100.0), 2)
+        macdScore = round(randomGenerator.gauss(0.0, 2.0), 2)
+        report.AddHTMLTableRowToDoc([tickerSymbolStr, str(price),
+                report.MakeColoredTableCellStr(rsiScore, FileTemplate.LESS_THAN, 30, FileTemplate.GREATER_THAN, 70),
+                report.MakeColoredTableCellStr(kStoScore, FileTemplate.LESS_THAN, 20, FileTemplate.GREATER_THAN, 80),
+                report.MakeColoredTableCellStr(macdScore, FileTemplate.GREATER_THAN, 0, FileTemplate.LESS_THAN, 0)])
+        report.AddJavascriptTableRow([{"Name": "Name", "Value": "\"" + tickerSymbolStr + "\""},
+                                    {"Name": "Price", "Value": price},
+                                    {"Name": "RSI", "Value": rsiScore},
+                                    {"Name": "KStockastic", "Value": kStoScore},
+                                    {"Name": "MACD", "Value": macdScore}])
+    # End - for tickerIndex in range(numTickers):
+
+    return report
+# End - MakeSyntheticReport
+
+
+
+
+
+################################################################################
+#
+# [RunBenchmark]
+#
+# Time benchFunction() numRepeats times, and then measure its peak memory in
+# one more run. setupFunction, if given, is called untimed before every run,
+# and its result is passed to benchFunction.
+# Returns the result record.
+################################################################################
+def RunBenchmark(benchmarkName, sizeDict, benchFunction, setupFunction=None, numRepeats=DEFAULT_NUM_REPEATS, fMeasureMemory=True):
+    timeList = []
+    for _ in range(numRepeats):
+        setupResult = setupFunction() if (setupFunction is not None) else None
+        gc.collect()
+        startTime = time.perf_counter()
+        if (setupFunction is not None):
+            benchFunction(setupResult)
+        else:
+            benchFunction()
+        timeList.append(time.perf_counter() - startTime)
+        setupResult = None
+    # End - for _ in range(numRepeats):
+
+    peakMemoryBytes = -1
+    if (fMeasureMemory):
+        setupResult = setupFunction() if (setupFunction is not None) else None
+        gc.collect()
+        tracemalloc.start()
+        if (setupFunction is not None):
+            benchFunction(setupResult)
+        else:
+            benchFunction()
+        _, peakMemoryBytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        setupResult = None
+    # End - if (fMeasureMemory):
+
+    resultDict = {'Name': benchmarkName}
+    resultDict.update(sizeDict)
+    resultDict['NumRepeats'] = numRepeats
+    resultDict['BestSeconds'] = min(timeList) if (len(timeList) > 0) else -1
+    resultDict['MeanSeconds'] = (sum(timeList) / len(timeList)) if (len(timeList) > 0) else -1
+    resultDict['PeakMemoryBytes'] = peakMemoryBytes
+    print("    " + benchmarkName + " " + str(sizeDict) + ": best=" + format(resultDict['BestSeconds'], ".6f") 
+            + "s, peakMemory=" + str(peakMemoryBytes))
+    return resultDict
+# End - RunBenchmark
+
+
+
+
+
+################################################################################
+#
+# [RunTickerBenchmarks]
+#
+# The benchmarks of one ticker with numDays days.
+################################################################################
+def RunTickerBenchmarks(numDays, engineList, numRepeats, fMeasureMemory, seed):
+    resultList = []
+    sizeDict = {'NumDays': numDays, 'NumTickers': 1}
+    print("Ticker benchmarks. numDays=" + str(numDays))
+
+    valueDictList = MakeSyntheticValueDictList(numDays + 1, seed)
+    resultList.append(RunBenchmark("LoadTickerFromValueDict", sizeDict, 
+                            lambda: StockTicker.LoadTickerFromValueDict("BENCH", valueDictList, 0),
+                            numRepeats=numRepeats, fMeasureMemory=fMeasureMemory))
+
+    for engineName in engineList:
+        resultList.append(RunBenchmark("ComputeAllStats." + engineName, sizeDict, 
+                            lambda stockTicker: ComputeAndReadAllStats(stockTicker, engineName),
+                            setupFunction=lambda: StockTicker.LoadTickerFromValueDict("BENCH", valueDictList, 0),
+                            numRepeats=numRepeats, fMeasureMemory=fMeasureMemory))
+    # End - for engineName in engineList:
+
+    stockTicker = StockTicker.LoadTickerFromValueDict("BENCH", valueDictList, 0)
+    ComputeAndReadAllStats(stockTicker, StockTicker.STATS_ENGINE_COLUMNAR)
+    for opCodeStr in [StockTicker.EXTREMES_MAX_PRICES, StockTicker.EXTREMES_MAX_PRICE_DECLINES]:
+        resultList.append(RunBenchmark("GetDaysWithExtremePrices." + opCodeStr, sizeDict, 
+                            lambda: stockTicker.GetDaysWithExtremePrices(opCodeStr, NUM_EXTREME_PRICES),
+                            numRepeats=numRepeats, fMeasureMemory=fMeasureMemory))
+    # End - for opCodeStr in [...]:
+
+    gotoDateList = MakeGotoDateList(stockTicker, NUM_GOTO_DATES, seed)
+    def GotoAllDates():
+        for year, month, day in gotoDateList:
+            stockTicker.GotoDate(year, month, day)
+    resultList.append(RunBenchmark("GotoDate.x" + str(NUM_GOTO_DATES), sizeDict, GotoAllDates,
+                            numRepeats=numRepeats, fMeasureMemory=fMeasureMemory))
+
+    return resultList
+# End - RunTickerBenchmarks
+
+
+
+
+
+################################################################################
+#
+# [RunUniverseBenchmarks]
+#
+# The benchmarks of numTickers tickers with numDays days each.
+# Making the synthetic histories is not timed, but all of the tickers are
+# kept, so the peak memory is that of the whole universe.
+################################################################################
+def RunUniverseBenchmarks(numTickers, numDays, numRepeats, fMeasureMemory, seed):
+    resultList = []
+    sizeDict = {'NumDays': numDays, 'NumTickers': numTickers}
+    print("Universe benchmarks. numTickers=" + str(numTickers) + ", numDays=" + str(numDays))
+
+    def LoadUniverse(timeList):
+        stockTickerDict = {}
+        for tickerIndex in range(numTickers):
+            valueDictList = MakeSyntheticValueDictList(numDays + 1, seed + tickerIndex)
+            startTime = time.perf_counter()
+            stockTicker = StockTicker.LoadTickerFromValueDict("T" + str(tickerIndex), valueDictList, 0)
+            ComputeAndReadAllStats(stockTicker, StockTicker.STATS_ENGINE_LAZY)
+            timeList[0] += time.perf_counter() - startTime
+            stockTickerDict[stockTicker.GetStockSymbol()] = stockTicker
+            valueDictList = None
+        # End - for tickerIndex in range(numTickers):
+        return stockTickerDict
+    # End - LoadUniverse
+
+    # This times each ticker on its own, so it cannot use RunBenchmark.
+    timeList = []
+    for _ in range(numRepeats):
+        tickerTimeList = [0.0]
+        LoadUniverse(tickerTimeList)
+        timeList.append(tickerTimeList[0])
+    peakMemoryBytes = -1
+    if (fMeasureMemory):
+        gc.collect()
+        tracemalloc.start()
+        stockTickerDict = LoadUniverse([0.0])
+        _, peakMemoryBytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stockTickerDict = None
+    # End - if (fMeasureMemory):
+
+    resultDict = {'Name': "LoadAndComputeUniverse"}
+    resultDict.update(sizeDict)
+    resultDict['NumRepeats'] = numRepeats
+    resultDict['BestSeconds'] = min(timeList) if (len(timeList) > 0) else -1
+    resultDict['MeanSeconds'] = (sum(timeList) / len(timeList)) if (len(timeList) > 0) else -1
+    resultDict['PeakMemoryBytes'] = peakMemoryBytes
+    print("    LoadAndComputeUniverse " + str(sizeDict) + ": best=" + format(resultDict['BestSeconds'], ".6f") 
+            + "s, peakMemory=" + str(peakMemoryBytes))
+    resultList.append(resultDict)
+
+    resultList.append(RunBenchmark("ExpandTemplate", sizeDict, 
+                            lambda report: report.ExpandTemplate(g_TemplateFilePathName),
+                            setupFunction=lambda: MakeSyntheticReport(numTickers, seed),
+                            numRepeats=numRepeats, fMeasureMemory=fMeasureMemory))
+
+    return resultList
+# End - RunUniverseBenchmarks
+
+
+
+
+
+################################################################################
+#
+# [GetGitCommit]
+#
+# The commit of this checkout, or "" if git is not there.
+################################################################################
+def GetGitCommit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip()
+    except Exception:
+        return ""
+# End - GetGitCommit
+
+
+
+
+
+################################################################################
+#
+# [WriteResults]
+#
+################################################################################
+def WriteResults(resultList, outputFilePathName):
+    runInfoDict = {'Commit': GetGitCommit(), 'PythonVersion': platform.python_version(), 
+                    'Platform': platform.platform(), 'Date': time.strftime("%Y-%m-%dT%H:%M:%S")}
+    with open(outputFilePathName, "w") as fileH:
+        for resultDict in resultList:
+            recordDict = dict(resultDict)
+            recordDict.update(runInfoDict)
+            fileH.write(json.dumps(recordDict, sort_keys=True) + "\n")
+# End - WriteResults
+
+
+
+
+
+################################################################################
+#
+# [ReadResults]
+#
+# Returns a dictionary from (Name, NumDays, NumTickers) to each record.
+################################################################################
+def ReadResults(filePathName):
+    resultDict = {}
+    with open(filePathName, "r") as fileH:
+        for line in fileH:
+            line = line.strip()
+            if (line == ""):
+                continue
+            recordDict = json.loads(line)
+            resultDict[(recordDict['Name'], recordDict['NumDays'], recordDict['NumTickers'])] = recordDict
+    # End - with open(filePathName, "r") as fileH:
+
+    return resultDict
+# End - ReadResults
+
+
+
+
+
+################################################################################
+#
+# [PrintComparison]
+#
+# The ratio of the new best time to the old one, for every benchmark in both
+# lists. A ratio below 1 is faster.
+################################################################################
+def PrintComparison(oldResultDict, newResultList):
+    print("Comparison with the old results. ratio = new / old")
+    for newRecordDict in newResultList:
+        key = (newRecordDict['Name'], newRecordDict['NumDays'], newRecordDict['NumTickers'])
+        if (key not in oldResultDict):
+            continue
+        oldBestSeconds = oldResultDict[key]['BestSeconds']
+        ratioStr = "-"
+        if (oldBestSeconds > 0):
+            ratioStr = format(newRecordDict['BestSeconds'] / oldBestSeconds, ".3f")
+        print("    " + str(key) + ": old=" + format(oldBestSeconds, ".6f") + "s, new=" 
+                + format(newRecordDict['BestSeconds'], ".6f") + "s, ratio=" + ratioStr)
+    # End - for newRecordDict in newResultList:
+# End - PrintComparison
+
+
+
+
+
+################################################################################
+#
+# [ParseIntList]
+#
+################################################################################
+def ParseIntList(textStr):
+    return [int(valueStr) for valueStr in textStr.split(",") if (valueStr.strip() != "")]
+# End - ParseIntList
+
+
+
+
+
+################################################################################
+#
+# [Main]
+#
+################################################################################
+def Main(argList):
+    parser = argparse.ArgumentParser(description="Benchmark the CStockTicker hot paths on synthetic histories.")
+    parser.add_argument("--numDays", default=",".join(str(value) for value in DEFAULT_NUM_DAYS_LIST),
+                        help="Comma separated history lengths, for example 1000,10000,50000")
+    parser.add_argument("--numTickers", default=",".join(str(value) for value in DEFAULT_NUM_TICKERS_LIST),
+                        help="Comma separated universe sizes, for example 1,100,5000")
+    parser.add_argument("--universeDays", type=int, default=DEFAULT_NUM_DAYS_LIST[0],
+                        help="The history length of each ticker in the universe benchmarks")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_NUM_REPEATS)
+    parser.add_argument("--engines", default=",".join(DEFAULT_ENGINE_LIST),
+                        help="ComputeAllStats engines to time: lazy, columnar, perDay")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_FILE_NAME)
+    parser.add_argument("--compare", default=None, help="An older output file to compare with")
+    parser.add_argument("--noMemory", action="store_true", help="Skip the peak memory runs")
+    args = parser.parse_args(argList)
+
+    # Read the old results first, since the output file may be the same file.
+    oldResultDict = None
+    if (args.compare is not None):
+        oldResultDict = ReadResults(args.compare)
+
+    engineList = [engineName for engineName in args.engines.split(",") if (engineName != "")]
+    fMeasureMemory = not args.noMemory
+    resultList = []
+    for numDays in ParseIntList(args.numDays):
+        resultList.extend(RunTickerBenchmarks(numDays, engineList, args.repeats, fMeasureMemory, args.seed))
+    for numTickers in ParseIntList(args.numTickers):
+        resultList.extend(RunUniverseBenchmarks(numTickers, args.universeDays, args.repeats, fMeasureMemory, args.seed))
+
+    WriteResults(resultList, args.output)
+    print("Wrote " + str(len(resultList)) + " results to " + args.output)
+
+    if (oldResultDict is not None):
+        PrintComparison(oldResultDict, resultList)
+    return 0
+# End - Main
+
+
+
+if __name__ == "__main__":
+    sys.exit(Main(sys.argv[1:]))
+
@@ -25,8 +25,11 @@
 #
 #
 ################################################################################
+import os
 import sys
 import copy
+import re
+import threading
 from datetime import datetime
 
 
@@ -49,6 +52,11 @@ BODY_TEXT_VAR_NAME = "<!-- BODY -->"
 TABLE_TEXT_VAR_NAME = "<!-- TABLE -->"
 JAVASCRIPT_DICT_TEXT_VAR_NAME = "<!-- JSCRIPTDICT -->"
 LOG_TEXT_VAR_NAME = "<!-- LOG -->"
+
+# ExpandTemplate replaces the variables in this order
+g_TemplateVarNameList = [BODY_TEXT_VAR_NAME, TABLE_TEXT_VAR_NAME, JAVASCRIPT_DICT_TEXT_VAR_NAME, LOG_TEXT_VAR_NAME]
+g_TemplateVarPattern = re.compile("|".join(re.escape(varName) for varName in g_TemplateVarNameList))
+g_MaxTemplateVarNameLength = max(len(varName) for varName in g_TemplateVarNameList)
 class CHTMLFileTemplate(object):
     #####################################################
     # Constructor - This method is part of any class
@@ -175,35 +183,79 @@ class CHTMLFileTemplate(object):
     # [CHTMLFileTemplate::ExpandTemplate]
     #####################################################
     def ExpandTemplate(self, templateFilePathName):
-        templateStr = ""
-        with open(templateFilePathName, 'r') as fileH:
-            templateStr = fileH.read()
+        return GetCompiledTemplate(templateFilePathName).Render(self)
+    # End - ExpandTemplate
+
 
+
+    #####################################################
+    #
+    # [CHTMLFileTemplate::ExpandTemplateStr]
+    #
+    # Replace each variable of the template text in the whole page, one
+    # variable after another. This defines what the expanded page is.
+    # CCompiledTemplate writes the same text without the replace passes.
+    #####################################################
+    def ExpandTemplateStr(self, templateStr):
         templateStr = templateStr.replace(BODY_TEXT_VAR_NAME, self.m_Body)
 
         # Make a string with the HTML Table contents
-        tableStr = self.m_TableStr
-        for currentStr in self.m_HTMLTableStrList:
-            tableStr = tableStr + currentStr + "\n"
+        tableStr = "".join(self.IterateVarPieces(TABLE_TEXT_VAR_NAME))
         templateStr = templateStr.replace(TABLE_TEXT_VAR_NAME, tableStr)
 
         # Make a string with the Javascript array contents
-        dictDeclarationStr = ""
-        tableStr = ""
-        for currentStr in self.m_JScriptDictEntryList:
-            dictDeclarationStr = dictDeclarationStr + currentStr + "\n"
+        dictDeclarationStr = "".join(self.IterateVarPieces(JAVASCRIPT_DICT_TEXT_VAR_NAME))
         templateStr = templateStr.replace(JAVASCRIPT_DICT_TEXT_VAR_NAME, dictDeclarationStr)
 
         # Make a string with the logging contents
-        logStr = ""
-        for currentStr in self.m_LogStrList:
-            logStr = logStr + currentStr + "\n<br>"
-        if (logStr != ""):
-            logStr = "Log:\n<br>" + logStr
+        logStr = "".join(self.IterateVarPieces(LOG_TEXT_VAR_NAME))
         templateStr = templateStr.replace(LOG_TEXT_VAR_NAME, logStr)
 
         return templateStr
-    # End - ExpandTemplate
+    # End - ExpandTemplateStr
+
+
+
+    #####################################################
+    #
+    # [CHTMLFileTemplate::IterateVarPieces]
+    #
+    # The text that replaces one template variable, as a series of strings.
+    # Joined together, they are the whole replacement text.
+    #####################################################
+    def IterateVarPieces(self, varName):
+        if (varName == BODY_TEXT_VAR_NAME):
+            yield self.m_Body
+        elif (varName == TABLE_TEXT_VAR_NAME):
+            yield self.m_TableStr
+            for currentStr in self.m_HTMLTableStrList:
+                yield currentStr
+                yield "\n"
+        elif (varName == JAVASCRIPT_DICT_TEXT_VAR_NAME):
+            for currentStr in self.m_JScriptDictEntryList:
+                yield currentStr
+                yield "\n"
+        elif (varName == LOG_TEXT_VAR_NAME):
+            if (len(self.m_LogStrList) > 0):
+                yield "Log:\n<br>"
+            for currentStr in self.m_LogStrList:
+                yield currentStr
+                yield "\n<br>"
+    # End - IterateVarPieces
+
+
+
+    #####################################################
+    #
+    # [CHTMLFileTemplate::WriteExpandedTemplate]
+    #
+    # Write the same text as ExpandTemplate to an open file, one piece at a
+    # time, without building the whole page as one string. The time is linear
+    # in the size of the page.
+    #####################################################
+    def WriteExpandedTemplate(self, templateFilePathName, outputFileH):
+        GetCompiledTemplate(templateFilePathName).Write(self, outputFileH)
+    # End - WriteExpandedTemplate
 
 
 
@@ -211,11 +263,9 @@ class CHTMLFileTemplate(object):
     # [CHTMLFileTemplate::MakeFileFromTemplate]
     #####################################################
     def MakeFileFromTemplate(self, templateFilePathName, outputFilePathName):
-        templateStr = self.ExpandTemplate(templateFilePathName)
-
         # Write the expanded file
         with open(outputFilePathName, "w+") as fileH:
-            fileH.write(templateStr)
+            self.WriteExpandedTemplate(templateFilePathName, fileH)
     # End - MakeFileFromTemplate
 
 # End - CHTMLFileTemplate
@@ -225,6 +275,152 @@ class CHTMLFileTemplate(object):
 
 
 
+################################################################################
+#
+# class CCompiledTemplate
+#
+# A template file that is parsed once into its text segments and the
+# variables between them. Rendering a CHTMLFileTemplate only fills in the
+# variables, without reading the file or searching the text again.
+# There is always one more segment than there are variables.
+################################################################################
+class CCompiledTemplate(object):
+    #####################################################
+    # Constructor - This method is part of any class
+    #####################################################
+    def __init__(self, templateStr):
+        self.TemplateStr = templateStr
+        self.SegmentList = []
+        self.VarNameList = []
+
+        textStart = 0
+        for varMatch in g_TemplateVarPattern.finditer(templateStr):
+            self.SegmentList.append(templateStr[textStart:varMatch.start()])
+            self.VarNameList.append(varMatch.group())
+            textStart = varMatch.end()
+        self.SegmentList.append(templateStr[textStart:])
+    # End -  __init__
+
+
+    #####################################################
+    #
+    # [CCompiledTemplate::IterateDocumentPieces]
+    #
+    # The expanded page of htmlTemplate, a CHTMLFileTemplate, as a series of
+    # strings: the segments, and the pieces of each variable between them.
+    #####################################################
+    def IterateDocumentPieces(self, htmlTemplate):
+        for segmentStr, varName in zip(self.SegmentList, self.VarNameList):
+            yield segmentStr
+            for pieceStr in htmlTemplate.IterateVarPieces(varName):
+                yield pieceStr
+        yield self.SegmentList[-1]
+    # End - IterateDocumentPieces
+
+
+    #####################################################
+    #
+    # [CCompiledTemplate::CanFillSlots]
+    #
+    # CHTMLFileTemplate.ExpandTemplateStr replaces one variable after another
+    # in the whole page, so if the text of one variable makes the name of a
+    # later variable, either on its own or together with the text next to it,
+    # that name is replaced too. Filling in the variables in one pass does not
+    # do that, so it is only the same when no piece makes the name of a variable.
+    # This only keeps the last few characters, not the whole page.
+    #####################################################
+    def CanFillSlots(self, htmlTemplate):
+        tailStr = ""
+        for pieceStr in self.IterateDocumentPieces(htmlTemplate):
+            if (pieceStr == ""):
+                continue
+            windowStr = tailStr + pieceStr
+            if (g_TemplateVarPattern.search(windowStr) is not None):
+                return False
+            tailStr = windowStr[-(g_MaxTemplateVarNameLength - 1):]
+        # End - for pieceStr in self.IterateDocumentPieces(htmlTemplate):
+
+        return True
+    # End - CanFillSlots
+
+
+    #####################################################
+    #
+    # [CCompiledTemplate::Render]
+    #
+    # The expanded page of htmlTemplate as one string.
+    #####################################################
+    def Render(self, htmlTemplate):
+        if (not self.CanFillSlots(htmlTemplate)):
+            return htmlTemplate.ExpandTemplateStr(self.TemplateStr)
+        return "".join(self.IterateDocumentPieces(htmlTemplate))
+    # End - Render
+
+
+    #####################################################
+    #
+    # [CCompiledTemplate::Write]
+    #
+    # Write the expanded page of htmlTemplate to an open file, one piece at a time.
+    #####################################################
+    def Write(self, htmlTemplate, outputFileH):
+        if (not self.CanFillSlots(htmlTemplate)):
+            outputFileH.write(htmlTemplate.ExpandTemplateStr(self.TemplateStr))
+            return
+
+        for pieceStr in self.IterateDocumentPieces(htmlTemplate):
+            outputFileH.write(pieceStr)
+    # End - Write
+
+# End - CCompiledTemplate
+
+
+
+
+
+################################################################################
+#
+# [GetCompiledTemplate]
+#
+# The CCompiledTemplate of a template file. Each file is only read and parsed
+# again when its modification time or size changes.
+################################################################################
+g_CompiledTemplateDict = {}
+g_CompiledTemplateLock = threading.Lock()
+
+def GetCompiledTemplate(templateFilePathName):
+    fileStat = os.stat(templateFilePathName)
+    fileVersion = (fileStat.st_mtime_ns, fileStat.st_size)
+    with g_CompiledTemplateLock:
+        cacheEntry = g_CompiledTemplateDict.get(templateFilePathName)
+    if ((cacheEntry is not None) and (cacheEntry[0] == fileVersion)):
+        return cacheEntry[1]
+
+    with open(templateFilePathName, 'r') as fileH:
+        compiledTemplate = CCompiledTemplate(fileH.read())
+    with g_CompiledTemplateLock:
+        g_CompiledTemplateDict[templateFilePathName] = (fileVersion, compiledTemplate)
+    return compiledTemplate
+# End - GetCompiledTemplate
+
+
+
+
+
+################################################################################
+#
+# [ClearCompiledTemplates]
+#
+################################################################################
+def ClearCompiledTemplates():
+    with g_CompiledTemplateLock:
+        g_CompiledTemplateDict.clear()
+# End - ClearCompiledTemplates
+
+
+
+
+
 ################################################################################
 ################################################################################
 def MakeTemplate():
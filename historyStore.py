@@ -0,0 +1,380 @@
+#!/usr/bin/python3
+################################################################################
+#
+# Copyright (c) 2024-2025 Dawson Dean
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+#
+# On-disk history store.
+#
+# Each ticker is a directory. Every save of a ticker writes a new version
+# directory, in which each column of its price history (see priceHistory.py)
+# is one file, and the CURRENT file names the newest complete version:
+#
+#   <rootDir>/<symbol>/CURRENT                  "v00000002"
+#   <rootDir>/<symbol>/v00000002/Date.col
+#   <rootDir>/<symbol>/v00000002/Cl.col
+#   ...
+#
+# The directory name is the symbol with every character that is not a letter,
+# a digit or one of "_.-~" percent-encoded, so a symbol like "BRK/B" is stored
+# in "BRK%2FB" and the symbol can always be read back from the name.
+#
+# A column file is a 32-byte header followed by the raw values:
+#
+#   magic       8 bytes     COLUMN_FILE_MAGIC
+#   typecode    1 byte      the array typecode of the values, 'i' or 'd'
+#   (padding)   3 bytes
+#   itemSize    4 bytes     little-endian, bytes per value
+#   numRows     8 bytes     little-endian
+#   (padding)   8 bytes
+#
+# The values are in native byte order, which is little-endian on every
+# platform we use.
+#
+# Opening a ticker memory-maps its files, so nothing is parsed or copied until
+# a page is read, and processes that open the same ticker share its pages in the
+# OS cache. Files are mapped copy-on-write, so changing a value in memory does
+# not change the file.
+#
+# Saving a ticker writes all of its columns into a new version directory and
+# then renames a new CURRENT file over the old one, so a reader sees either
+# all of the old columns or all of the new ones, never a mix. The version
+# before the newest is kept, so a reader that read CURRENT just before a save
+# can still open it. Older versions are deleted, and a reader that was still
+# opening one of them opens the newest version instead.
+################################################################################
+import os
+import mmap
+import shutil
+import struct
+import urllib.parse
+
+import priceHistory as PriceHistory
+import stockTicker as StockTicker
+
+COLUMN_FILE_MAGIC = b"FLCOLMN1"
+COLUMN_FILE_SUFFIX = ".col"
+DATE_COLUMN_FILE_NAME = "Date"
+CURRENT_VERSION_FILE_NAME = "CURRENT"
+VERSION_DIR_PREFIX = "v"
+DELETED_DIR_PREFIX = "deleted-"
+NUM_KEPT_VERSIONS = 2
+MAX_OPEN_ATTEMPTS = 3
+
+COLUMN_FILE_HEADER_FORMAT = "<8sc3xIQ8x"
+COLUMN_FILE_HEADER_SIZE = struct.calcsize(COLUMN_FILE_HEADER_FORMAT)
+
+
+
+
+
+################################################################################
+#
+# [WriteColumnFile]
+#
+# column is an array.array, or any buffer of values of typecode.
+################################################################################
+def WriteColumnFile(filePathName, column, typecode):
+    columnBytes = memoryview(column).cast('B')
+    itemSize = memoryview(column).itemsize
+    numRows = len(columnBytes) // itemSize
+    header = struct.pack(COLUMN_FILE_HEADER_FORMAT, COLUMN_FILE_MAGIC, typecode.encode('ascii'), itemSize, numRows)
+
+    tempFilePathName = filePathName + ".tmp"
+    with open(tempFilePathName, "wb") as fileH:
+        fileH.write(header)
+        fileH.write(columnBytes)
+    os.replace(tempFilePathName, filePathName)
+# End - WriteColumnFile
+
+
+
+
+
+################################################################################
+#
+# [OpenColumnFile]
+#
+# Returns a memoryview of the values, with the format of the typecode, or
+# None if the file is missing or is not a column of that typecode.
+################################################################################
+def OpenColumnFile(filePathName, typecode):
+    try:
+        with open(filePathName, "rb") as fileH:
+            fileSize = os.fstat(fileH.fileno()).st_size
+            if (fileSize < COLUMN_FILE_HEADER_SIZE):
+                print("OpenColumnFile. File is too small: " + filePathName)
+                return None
+            # The map stays valid after the file is closed.
+            fileMap = mmap.mmap(fileH.fileno(), 0, access=mmap.ACCESS_COPY)
+    except OSError:
+        return None
+
+    magic, fileTypecode, itemSize, numRows = struct.unpack_from(COLUMN_FILE_HEADER_FORMAT, fileMap, 0)
+    if ((magic != COLUMN_FILE_MAGIC) or (fileTypecode != typecode.encode('ascii'))):
+        print("OpenColumnFile. Not a column of type " + typecode + ": " + filePathName)
+        return None
+    stopOffset = COLUMN_FILE_HEADER_SIZE + (numRows * itemSize)
+    if ((itemSize != struct.calcsize(typecode)) or (stopOffset > fileSize)):
+        print("OpenColumnFile. Bad header: " + filePathName)
+        return None
+
+    return memoryview(fileMap)[COLUMN_FILE_HEADER_SIZE:stopOffset].cast(typecode)
+# End - OpenColumnFile
+
+
+
+
+
+################################################################################
+#
+# class CHistoryStore
+#
+################################################################################
+class CHistoryStore(object):
+    #####################################################
+    # Constructor - This method is part of any class
+    #####################################################
+    def __init__(self, rootDirPath):
+        self.RootDirPath = rootDirPath
+        os.makedirs(self.RootDirPath, exist_ok=True)
+    # End -  __init__
+
+
+    #####################################################
+    # [CHistoryStore::GetTickerDirPath]
+    #####################################################
+    def GetTickerDirPath(self, tickerSymbol):
+        return os.path.join(self.RootDirPath, urllib.parse.quote(tickerSymbol, safe=""))
+
+
+    #####################################################
+    # [CHistoryStore::GetColumnFilePath]
+    #####################################################
+    def GetColumnFilePath(self, tickerSymbol, versionName, columnName):
+        return os.path.join(self.GetTickerDirPath(tickerSymbol), versionName, columnName + COLUMN_FILE_SUFFIX)
+
+
+    #####################################################
+    #
+    # [CHistoryStore::GetCurrentVersionName]
+    #
+    # The name of the newest complete version of the ticker, or None.
+    #####################################################
+    def GetCurrentVersionName(self, tickerSymbol):
+        try:
+            with open(os.path.join(self.GetTickerDirPath(tickerSymbol), CURRENT_VERSION_FILE_NAME), "r") as fileH:
+                versionName = fileH.read().strip()
+        except OSError:
+            return None
+        if (not versionName.startswith(VERSION_DIR_PREFIX)):
+            return None
+        return versionName
+    # End - GetCurrentVersionName
+
+
+    #####################################################
+    #
+    # [CHistoryStore::GetVersionNameList]
+    #
+    # The names of every version directory of the ticker, oldest first.
+    #####################################################
+    def GetVersionNameList(self, tickerSymbol):
+        try:
+            entryNameList = os.listdir(self.GetTickerDirPath(tickerSymbol))
+        except OSError:
+            return []
+        versionNameList = [entryName for entryName in entryNameList
+                            if (entryName.startswith(VERSION_DIR_PREFIX) 
+                                and entryName[len(VERSION_DIR_PREFIX):].isdigit())]
+        return sorted(versionNameList, key=lambda versionName: int(versionName[len(VERSION_DIR_PREFIX):]))
+    # End - GetVersionNameList
+
+
+    #####################################################
+    # [CHistoryStore::HasTicker]
+    #####################################################
+    def HasTicker(self, tickerSymbol):
+        return (self.GetCurrentVersionName(tickerSymbol) is not None)
+
+
+    #####################################################
+    #
+    # [CHistoryStore::GetSymbolList]
+    #
+    # The symbols of every ticker in the store.
+    #####################################################
+    def GetSymbolList(self):
+        symbolList = []
+        for entryName in sorted(os.listdir(self.RootDirPath)):
+            tickerSymbol = urllib.parse.unquote(entryName)
+            if (self.HasTicker(tickerSymbol)):
+                symbolList.append(tickerSymbol)
+        return symbolList
+    # End - GetSymbolList
+
+
+    #####################################################
+    #
+    # [CHistoryStore::SaveTicker]
+    #
+    # Write the price history of the ticker, including its stat columns, as a
+    # new version. The new version is only visible once all of its columns are
+    # written, and then CURRENT is replaced in one rename.
+    #####################################################
+    def SaveTicker(self, stockTicker):
+        tickerSymbol = stockTicker.GetStockSymbol()
+        tickerDirPath = self.GetTickerDirPath(tickerSymbol)
+        os.makedirs(tickerDirPath, exist_ok=True)
+
+        # A version newer than CURRENT is left over from a save that did not finish.
+        versionNameList = self.GetVersionNameList(tickerSymbol)
+        versionNum = 1
+        if (len(versionNameList) > 0):
+            versionNum = int(versionNameList[-1][len(VERSION_DIR_PREFIX):]) + 1
+        versionName = VERSION_DIR_PREFIX + "%08d" % versionNum
+        os.makedirs(os.path.join(tickerDirPath, versionName))
+
+        history = stockTicker.History
+        for columnName in PriceHistory.g_ValueColumnNameList:
+            WriteColumnFile(self.GetColumnFilePath(tickerSymbol, versionName, columnName), 
+                            history.GetColumn(columnName), PriceHistory.VALUE_COLUMN_TYPECODE)
+        WriteColumnFile(self.GetColumnFilePath(tickerSymbol, versionName, DATE_COLUMN_FILE_NAME), 
+                        history.GetDateColumn(), PriceHistory.DATE_COLUMN_TYPECODE)
+
+        currentFilePathName = os.path.join(tickerDirPath, CURRENT_VERSION_FILE_NAME)
+        with open(currentFilePathName + ".tmp", "w") as fileH:
+            fileH.write(versionName + "\n")
+        os.replace(currentFilePathName + ".tmp", currentFilePathName)
+
+        # Delete the old versions, except the ones a reader may still be opening.
+        # Each is renamed first, so a reader never sees a partly deleted version.
+        for oldVersionName in self.GetVersionNameList(tickerSymbol)[:-NUM_KEPT_VERSIONS]:
+            deletedDirPath = os.path.join(tickerDirPath, DELETED_DIR_PREFIX + oldVersionName)
+            try:
+                os.replace(os.path.join(tickerDirPath, oldVersionName), deletedDirPath)
+            except OSError:
+                continue
+            shutil.rmtree(deletedDirPath, ignore_errors=True)
+    # End - SaveTicker
+
+
+    #####################################################
+    #
+    # [CHistoryStore::SaveTickers]
+    #
+    #####################################################
+    def SaveTickers(self, stockTickerDict):
+        for stockTicker in stockTickerDict.values():
+            if (stockTicker is not None):
+                self.SaveTicker(stockTicker)
+    # End - SaveTickers
+
+
+    #####################################################
+    #
+    # [CHistoryStore::OpenTicker]
+    #
+    # Make a new CStockTicker whose history is mapped from the newest version
+    # in the store. The current stats are those of the newest stored day. Only
+    # the history is stored, so the company name, today's prices and the other
+    # info are not set. Returns None if the ticker is not in the store.
+    #####################################################
+    def OpenTicker(self, tickerSymbol):
+        versionName = self.GetCurrentVersionName(tickerSymbol)
+        for attemptNum in range(MAX_OPEN_ATTEMPTS):
+            if (versionName is None):
+                return None
+            stockTicker = self.OpenTickerVersion(tickerSymbol, versionName)
+            if (stockTicker is not None):
+                return stockTicker
+
+            # If a save replaced the version while it was opened, then open the new one.
+            newVersionName = self.GetCurrentVersionName(tickerSymbol)
+            if (newVersionName == versionName):
+                return None
+            versionName = newVersionName
+        # End - for attemptNum in range(MAX_OPEN_ATTEMPTS):
+
+        return None
+    # End - OpenTicker
+
+
+    #####################################################
+    #
+    # [CHistoryStore::OpenTickerVersion]
+    #
+    # Returns None if the version is missing or its columns do not match.
+    #####################################################
+    def OpenTickerVersion(self, tickerSymbol, versionName):
+        dateColumn = OpenColumnFile(self.GetColumnFilePath(tickerSymbol, versionName, DATE_COLUMN_FILE_NAME), 
+                                    PriceHistory.DATE_COLUMN_TYPECODE)
+        if (dateColumn is None):
+            return None
+
+        columnDict = {}
+        for columnName in PriceHistory.g_ValueColumnNameList:
+            column = OpenColumnFile(self.GetColumnFilePath(tickerSymbol, versionName, columnName), 
+                                    PriceHistory.VALUE_COLUMN_TYPECODE)
+            if (column is None):
+                # The version was deleted by a newer save while it was opened.
+                if (not os.path.isdir(os.path.join(self.GetTickerDirPath(tickerSymbol), versionName))):
+                    return None
+                continue
+            if (len(column) != len(dateColumn)):
+                print("CHistoryStore.OpenTickerVersion. Column " + columnName + " of " + tickerSymbol 
+                        + " has " + str(len(column)) + " rows, but there are " + str(len(dateColumn)) + " dates")
+                return None
+            columnDict[columnName] = column
+        # End - for columnName in PriceHistory.g_ValueColumnNameList:
+
+        stockTicker = StockTicker.CStockTicker(tickerSymbol)
+        stockTicker.History.SetMappedColumns(dateColumn, columnDict)
+        stockTicker.SetCurrentStatsFromHistory()
+        return stockTicker
+    # End - OpenTickerVersion
+
+
+    #####################################################
+    #
+    # [CHistoryStore::OpenTickers]
+    #
+    # Open every symbol in stockNameList that is in the store and not already
+    # in stockTickerDict. Returns the list of symbols that are not in the store.
+    #####################################################
+    def OpenTickers(self, stockNameList, stockTickerDict):
+        missingSymbolList = []
+        for tickerSymbol in stockNameList:
+            if ((tickerSymbol in stockTickerDict) and (stockTickerDict[tickerSymbol] is not None)):
+                continue
+            stockTicker = self.OpenTicker(tickerSymbol)
+            if (stockTicker is None):
+                missingSymbolList.append(tickerSymbol)
+                continue
+            stockTickerDict[tickerSymbol] = stockTicker
+        # End - for tickerSymbol in stockNameList:
+
+        return missingSymbolList
+    # End - OpenTickers
+
+# End - CHistoryStore
+
@@ -56,6 +56,7 @@
 ################################################################################
 import sys
 import copy
+import time
 from datetime import datetime
 from collections import deque
 
@@ -77,10 +78,19 @@ import dataShow as DataShow
 import stockTicker as StockTicker
 import stockTickerYahoo as StockTickerYahoo
 import fileTemplate as FileTemplate
+import pipelineMetrics as PipelineMetrics
+import tickerInfoCache as TickerInfoCache
 
 
 g_ResultFileDir = "/home/ddean/ddRoot/finLib/"
 
+# The ticker info is cached between runs. The report does not show the bid and ask,
+# which only the slow full info request has, so a cached ticker only needs a quote request.
+g_InfoCacheFilePathName = g_ResultFileDir + "tickerInfoCache.json"
+
+# Time each stage of the report, and write the times next to the report.
+g_fCollectMetrics = True
+
 STAT_SCORE_CORRELATION_WITH_PRICE_T1 = "corrPriceT1"
 STAT_SCORE_CORRELATION_WITH_PRICE_T4 = "corrPriceT4"
 
@@ -134,6 +144,8 @@ print("Started:" + startimeStr)  # g_Report.SetBodyStr
 
 # Initialized the globals
 g_Report = FileTemplate.MakeTemplate()
+g_Metrics = PipelineMetrics.CPipelineMetrics(fEnabled=g_fCollectMetrics)
+g_InfoCache = TickerInfoCache.CTickerInfoCache(g_InfoCacheFilePathName, TickerInfoCache.g_NoBidAskFieldGroupDict)
 g_StockTickerList = {}
 g_StockCovarianceList = { }
 
@@ -141,8 +153,11 @@ g_StockCovarianceList = { }
 
 #################################################
 if (True):
-    # Load all Stock Tickers
-    g_StockTickerList = StockTickerYahoo.OpenTickersForStocks("yahoo", g_InterestingStockNameList, g_StockTickerList)
+    # Load all Stock Tickers. The report only reads a few current stats, so only compute
+    # the stat columns that are read.
+    g_StockTickerList = StockTickerYahoo.OpenTickersForStocks("yahoo", g_InterestingStockNameList, g_StockTickerList,
+                                                            infoCache=g_InfoCache, metrics=g_Metrics, 
+                                                            statsEngineName=StockTicker.STATS_ENGINE_LAZY)
 
     # Make the report
     g_Report.SetBodyStr("Collected " + startimeStr)
@@ -150,11 +165,14 @@ if (True):
     # , "<b>Bid-Ask Spread</b>"
 
     for index, (tickerName, stockInfo) in enumerate(g_StockTickerList.items()):
+        # The row time includes computing the stats, which the lazy stats engine does
+        # when they are first read. That part is also recorded as the computeStats stage.
+        rowStartTime = time.perf_counter()
         tickerSymbolStr = stockInfo.GetStockSymbol()
-        rsiScore = stockInfo.GetRSI()
-        bidAskSpread, bidAskSpreadPercent = stockInfo.GetBidAskSpread()
-        macdScore = stockInfo.GetMACD()
-        kStoScore = stockInfo.GetKStochastic()
+        with g_Metrics.Timer(PipelineMetrics.STAGE_COMPUTE_STATS, tickerSymbolStr):
+            rsiScore = stockInfo.GetRSI()
+            macdScore = stockInfo.GetMACD()
+            kStoScore = stockInfo.GetKStochastic()
         pegScore = stockInfo.GetPEGRatio()
         percentChange, absChange = stockInfo.GetPrevDayChange()
 
@@ -165,7 +183,6 @@ if (True):
         else:
             percentChangeStr = str(percentChange) + "%  (" + str(absChange) + ")"
         #imgURL = "<a href=\"" + displayCovarInfo["Chart"] + "\">Chart</a>"
-        bidAskStr = str(bidAskSpread) + "  (" + str(bidAskSpreadPercent) + "%)"
 
         g_Report.AddHTMLTableRowToDoc( [ securityNameCellStr, 
                 g_Report.MakeColoredTableCellStrEx(stockInfo.GetCurrentPrice(), absChange, FileTemplate.GREATER_THAN, 0, FileTemplate.LESS_THAN, 0),
@@ -182,18 +199,24 @@ if (True):
                         {"Name": "Price", "Value": stockInfo.GetCurrentPrice() }, 
                         {"Name": "PercentChange", "Value": percentChange }, 
                         {"Name": "AbsChange", "Value": absChange }, 
-                        {"Name": "BidAskSpread", "Value": bidAskSpread },                    
                         {"Name": "PEG", "Value": pegScore }, 
                         {"Name": "RSI", "Value": rsiScore }, 
                         {"Name": "KStockastic", "Value": kStoScore }, 
                         {"Name": "MACD", "Value": macdScore } ])
+        g_Metrics.AddStageTime(PipelineMetrics.STAGE_REPORT_ROW, time.perf_counter() - rowStartTime, tickerSymbolStr)
     # End - for stockInfo in g_StockTickerList:
 
-    g_Report.MakeFileFromTemplate("/home/ddean/ddRoot/finLib/stockTemplate.htm", 
-                                    g_ResultFileDir + "stockReport.htm")
+    with g_Metrics.Timer(PipelineMetrics.STAGE_EXPAND_TEMPLATE):
+        g_Report.MakeFileFromTemplate("/home/ddean/ddRoot/finLib/stockTemplate.htm", 
+                                        g_ResultFileDir + "stockReport.htm")
 
 # End - if (True)
 
+if (g_fCollectMetrics):
+    g_Metrics.PrintSummary()
+    g_Metrics.WriteJSONFile(g_ResultFileDir + "stockReportMetrics.json")
+    g_Metrics.WritePrometheusFile(g_ResultFileDir + "stockReportMetrics.prom")
+
 stopTimeStr = datetime.today().strftime("%A %B %d, %Y (%H:%M:%S)")
 print("Stopped:" + stopTimeStr)  # g_Report.SetBodyStr
 
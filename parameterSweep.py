@@ -0,0 +1,449 @@
+#!/usr/bin/python3
+################################################################################
+#
+# Copyright (c) 2024-2025 Dawson Dean
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+#
+# Parameter sweeps of the indicator windows.
+#
+# Computing each window on its own repeats most of the work. Here, each
+# ticker gets one set of running sums, built once, and every window of the
+# grid is then a difference of two of those sums per day:
+#   - RSI: running sums and counts of the percent gains and losses
+#   - EMA: running sums of the closes and of index * close, since the EMA of
+#     CStockTicker is a linearly weighted average (see StockStats.ComputeEMAColumn)
+#   - MACD: the difference of two EMA columns that were already computed
+#   - Biggest recent drop: a sparse table of range maximums, which answers the
+#     highest close over any window in constant time
+#
+# The results are the same as the single-window functions in stockStats.py,
+# except for rounding in the last few digits.
+#
+# A grid is a dictionary from each indicator name to the list of windows to
+# try, for example:
+#   {'RSI': [10, 15, 20], 'EMA': [12, 26], 'MACD': [(12, 26), (8, 21)],
+#    'BiggestRecentDropPercent': [5, 7, 10]}
+#
+# A sweep over many tickers runs on a process pool. Each worker is sent the
+# close column of one ticker as raw bytes, and returns one score per window,
+# not the columns.
+################################################################################
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+import priceHistory as PriceHistory
+import stockStats as StockStats
+
+VALUE_COLUMN_TYPECODE = PriceHistory.VALUE_COLUMN_TYPECODE
+COUNT_COLUMN_TYPECODE = 'i'
+
+SWEEP_RSI = "RSI"
+SWEEP_EMA = "EMA"
+SWEEP_MACD = "MACD"
+SWEEP_BIGGEST_RECENT_DROP = "BiggestRecentDropPercent"
+
+
+
+
+
+################################################################################
+#
+# [MakeRunningSumColumn]
+#
+# Entry k is the sum of the first k values, so there is one more entry than
+# there are values.
+################################################################################
+def MakeRunningSumColumn(valueColumn, typecode=VALUE_COLUMN_TYPECODE):
+    runningSumColumn = array(typecode, [0]) * (len(valueColumn) + 1)
+    runningSum = 0
+    for index, value in enumerate(valueColumn):
+        runningSum += value
+        runningSumColumn[index + 1] = runningSum
+    return runningSumColumn
+# End - MakeRunningSumColumn
+
+
+
+
+
+################################################################################
+#
+# [MakeCompensatedRunningSumColumns]
+#
+# Like MakeRunningSumColumn, but also returns the rounding error of each
+# running sum (Neumaier summation). A window sum is then
+#   (sum[b] - sum[a]) + (error[b] - error[a])
+# which stays accurate even when the running sums are much larger than the
+# window, like sums of index * close over decades of history.
+################################################################################
+def MakeCompensatedRunningSumColumns(valueColumn):
+    runningSumColumn = array(VALUE_COLUMN_TYPECODE, [0.0]) * (len(valueColumn) + 1)
+    errorColumn = array(VALUE_COLUMN_TYPECODE, [0.0]) * (len(valueColumn) + 1)
+    runningSum = 0.0
+    runningError = 0.0
+    for index, value in enumerate(valueColumn):
+        newSum = runningSum + value
+        if (abs(runningSum) >= abs(value)):
+            runningError += (runningSum - newSum) + value
+        else:
+            runningError += (value - newSum) + runningSum
+        runningSum = newSum
+        runningSumColumn[index + 1] = runningSum
+        errorColumn[index + 1] = runningError
+    # End - for index, value in enumerate(valueColumn):
+
+    return runningSumColumn, errorColumn
+# End - MakeCompensatedRunningSumColumns
+
+
+
+
+
+################################################################################
+#
+# class CSweepInputs
+#
+# Everything that the windows of one ticker share, built once.
+################################################################################
+class CSweepInputs(object):
+    #####################################################
+    # Constructor - This method is part of any class
+    #####################################################
+    def __init__(self, closeColumn):
+        self.CloseColumn = closeColumn
+        self.NumRows = len(closeColumn)
+
+        # RSI. A change of exactly 0 counts as a loss, like StockStats.ComputeRSIColumn
+        percentChangeColumn = StockStats.ComputePercentChangeColumn(closeColumn)
+        self.GainSumColumn = MakeRunningSumColumn([max(change, 0.0) for change in percentChangeColumn])
+        self.GainCountColumn = MakeRunningSumColumn([(change > 0) for change in percentChangeColumn], COUNT_COLUMN_TYPECODE)
+        self.LossSumColumn = MakeRunningSumColumn([max(-change, 0.0) for change in percentChangeColumn])
+        self.NonZeroLossCountColumn = MakeRunningSumColumn([(change < 0) for change in percentChangeColumn], COUNT_COLUMN_TYPECODE)
+
+        # EMA
+        self.CloseSumColumn, self.CloseErrorColumn = MakeCompensatedRunningSumColumns(closeColumn)
+        indexCloseColumn = [index * close for index, close in enumerate(closeColumn)]
+        self.IndexCloseSumColumn, self.IndexCloseErrorColumn = MakeCompensatedRunningSumColumns(indexCloseColumn)
+
+        # Biggest recent drop. Built when a drop window is first asked for.
+        self.RangeMaxLevelList = [array(VALUE_COLUMN_TYPECODE, closeColumn)]
+
+        # Scores. Built when a score function first asks for them.
+        self.FutureReturnColumnDict = {}
+    # End -  __init__
+
+
+    #####################################################
+    #
+    # [CSweepInputs::GetFutureReturnColumn]
+    #
+    # StockStats.ComputeFutureReturnColumn, computed once per horizon.
+    #####################################################
+    def GetFutureReturnColumn(self, numDays):
+        if (numDays not in self.FutureReturnColumnDict):
+            self.FutureReturnColumnDict[numDays] = StockStats.ComputeFutureReturnColumn(self.CloseColumn, numDays)
+        return self.FutureReturnColumnDict[numDays]
+    # End - GetFutureReturnColumn
+
+
+    #####################################################
+    #
+    # [CSweepInputs::GetRangeMax]
+    #
+    # The highest close in rows [firstIndex, lastIndex], including both.
+    #####################################################
+    def GetRangeMax(self, firstIndex, lastIndex):
+        level = (lastIndex - firstIndex + 1).bit_length() - 1
+        levelColumn = self.RangeMaxLevelList[level]
+        return max(levelColumn[firstIndex], levelColumn[lastIndex - (1 << level) + 1])
+    # End - GetRangeMax
+
+
+    #####################################################
+    #
+    # [CSweepInputs::AddRangeMaxLevels]
+    #
+    # Make sure GetRangeMax works for ranges up to numRows long.
+    # Level k holds the highest close in [index, index + 2^k).
+    #####################################################
+    def AddRangeMaxLevels(self, numRows):
+        while ((1 << len(self.RangeMaxLevelList)) <= numRows):
+            prevColumn = self.RangeMaxLevelList[-1]
+            halfSize = 1 << (len(self.RangeMaxLevelList) - 1)
+            newLength = max(0, len(prevColumn) - halfSize)
+            newColumn = array(VALUE_COLUMN_TYPECODE, [0.0]) * newLength
+            for index in range(newLength):
+                newColumn[index] = max(prevColumn[index], prevColumn[index + halfSize])
+            self.RangeMaxLevelList.append(newColumn)
+        # End - while ((1 << len(self.RangeMaxLevelList)) <= numRows):
+    # End - AddRangeMaxLevels
+
+# End - CSweepInputs
+
+
+
+
+
+################################################################################
+#
+# [ComputeSweepRSIColumn]
+#
+# Same windows as StockStats.ComputeRSIColumn.
+################################################################################
+def ComputeSweepRSIColumn(sweepInputs, numPrices):
+    resultColumn = StockStats.MakeEmptyColumn(sweepInputs.NumRows)
+    for rowIndex in range(sweepInputs.NumRows):
+        numChanges = max(0, min(numPrices - 1, rowIndex) - 1)
+        # The changes in the window are [windowStart, rowIndex]
+        windowStart = rowIndex - numChanges + 1
+        windowStop = rowIndex + 1
+
+        numGains = sweepInputs.GainCountColumn[windowStop] - sweepInputs.GainCountColumn[windowStart]
+        numNonZeroLosses = sweepInputs.NonZeroLossCountColumn[windowStop] - sweepInputs.NonZeroLossCountColumn[windowStart]
+        numLosses = numChanges - numGains
+        if ((numLosses <= 0) or (numNonZeroLosses <= 0)):
+            resultColumn[rowIndex] = 100.0
+            continue
+
+        avgPercentLoss = (sweepInputs.LossSumColumn[windowStop] - sweepInputs.LossSumColumn[windowStart]) / numLosses
+        avgPercentGain = 0
+        if (numGains > 0):
+            avgPercentGain = (sweepInputs.GainSumColumn[windowStop] - sweepInputs.GainSumColumn[windowStart]) / numGains
+        relativeStrength = avgPercentGain / avgPercentLoss
+        resultColumn[rowIndex] = 100.0 - (100.0 / (1.0 + relativeStrength))
+    # End - for rowIndex in range(sweepInputs.NumRows):
+
+    return resultColumn
+# End - ComputeSweepRSIColumn
+
+
+
+
+
+################################################################################
+#
+# [ComputeSweepEMAColumn]
+#
+# Same windows as StockStats.ComputeEMAColumn. The weighted sum of the prices
+# in [windowStart, windowStop), with weights 1, 2, ..., is
+#   sum(index * close) - (windowStart - 1) * sum(close)
+################################################################################
+def ComputeSweepEMAColumn(sweepInputs, numPrices):
+    resultColumn = StockStats.MakeEmptyColumn(sweepInputs.NumRows)
+    for rowIndex in range(sweepInputs.NumRows):
+        numWindowPrices = min(numPrices - 1, rowIndex)
+        if (numWindowPrices <= 0):
+            continue
+        numWeightedPrices = max(1, numWindowPrices - 1)
+        windowStart = rowIndex - numWeightedPrices + 1
+        windowStop = rowIndex + 1
+
+        plainSum = ((sweepInputs.CloseSumColumn[windowStop] - sweepInputs.CloseSumColumn[windowStart]) 
+                    + (sweepInputs.CloseErrorColumn[windowStop] - sweepInputs.CloseErrorColumn[windowStart]))
+        indexSum = ((sweepInputs.IndexCloseSumColumn[windowStop] - sweepInputs.IndexCloseSumColumn[windowStart]) 
+                    + (sweepInputs.IndexCloseErrorColumn[windowStop] - sweepInputs.IndexCloseErrorColumn[windowStart]))
+        weightedSum = indexSum - ((windowStart - 1) * plainSum)
+        resultColumn[rowIndex] = weightedSum / ((numWeightedPrices * (numWeightedPrices + 1)) / 2.0)
+    # End - for rowIndex in range(sweepInputs.NumRows):
+
+    return resultColumn
+# End - ComputeSweepEMAColumn
+
+
+
+
+
+################################################################################
+#
+# [ComputeSweepBiggestRecentDropColumn]
+#
+# Same windows as StockStats.ComputeBiggestRecentDropColumn.
+################################################################################
+def ComputeSweepBiggestRecentDropColumn(sweepInputs, numPrices):
+    resultColumn = StockStats.MakeEmptyColumn(sweepInputs.NumRows)
+    if (numPrices <= 1):
+        return resultColumn
+
+    sweepInputs.AddRangeMaxLevels(numPrices)
+    closeColumn = sweepInputs.CloseColumn
+    for rowIndex in range(1, sweepInputs.NumRows):
+        numWindowPrices = min(numPrices - 1, rowIndex)
+        highestPastPrice = sweepInputs.GetRangeMax(rowIndex - numWindowPrices + 1, rowIndex)
+        latestClosingPrice = closeColumn[rowIndex]
+        if (highestPastPrice > latestClosingPrice):
+            resultColumn[rowIndex] = float(highestPastPrice - latestClosingPrice)
+    # End - for rowIndex in range(1, sweepInputs.NumRows):
+
+    return resultColumn
+# End - ComputeSweepBiggestRecentDropColumn
+
+
+
+
+
+################################################################################
+#
+# [ComputeSweepColumns]
+#
+# Compute every window of gridDict for one close column.
+# Returns a dictionary from each (indicatorName, window) to its column.
+# A MACD window is a (shortSpan, longSpan) pair, and its EMA columns are
+# shared with the EMA windows.
+################################################################################
+def ComputeSweepColumns(closeColumn, gridDict, sweepInputs=None):
+    if (sweepInputs is None):
+        sweepInputs = CSweepInputs(closeColumn)
+    resultDict = {}
+
+    for numPrices in gridDict.get(SWEEP_RSI, []):
+        resultDict[(SWEEP_RSI, numPrices)] = ComputeSweepRSIColumn(sweepInputs, numPrices)
+
+    emaColumnDict = {}
+    emaSpanList = list(gridDict.get(SWEEP_EMA, []))
+    for shortSpan, longSpan in gridDict.get(SWEEP_MACD, []):
+        emaSpanList.extend([shortSpan, longSpan])
+    for numPrices in emaSpanList:
+        if (numPrices not in emaColumnDict):
+            emaColumnDict[numPrices] = ComputeSweepEMAColumn(sweepInputs, numPrices)
+    for numPrices in gridDict.get(SWEEP_EMA, []):
+        resultDict[(SWEEP_EMA, numPrices)] = emaColumnDict[numPrices]
+
+    for shortSpan, longSpan in gridDict.get(SWEEP_MACD, []):
+        resultDict[(SWEEP_MACD, (shortSpan, longSpan))] = StockStats.ComputeMACDColumn(emaColumnDict[shortSpan], 
+                                                                                    emaColumnDict[longSpan])
+
+    for numPrices in gridDict.get(SWEEP_BIGGEST_RECENT_DROP, []):
+        resultDict[(SWEEP_BIGGEST_RECENT_DROP, numPrices)] = ComputeSweepBiggestRecentDropColumn(sweepInputs, numPrices)
+
+    return resultDict
+# End - ComputeSweepColumns
+
+
+
+
+
+################################################################################
+#
+# [ScoreByNextDayCorrelation]
+#
+# The default score: the Pearson correlation of the indicator with the
+# percent change of the close on the next day.
+################################################################################
+def ScoreByNextDayCorrelation(sweepInputs, indicatorColumn):
+    futureReturnColumn = sweepInputs.GetFutureReturnColumn(1)
+    return StockStats.ComputePearsonCorrelation(indicatorColumn[:len(futureReturnColumn)], futureReturnColumn)
+# End - ScoreByNextDayCorrelation
+
+
+
+
+
+################################################################################
+#
+# [ScoreSweepForTicker]
+#
+# Runs in a worker process. closeBytes is the close column as raw bytes.
+# scoreFunction(sweepInputs, indicatorColumn) returns the score of one window,
+# and must be a module-level function so it can be sent to a worker.
+# Returns a dictionary from each (indicatorName, window) to its score.
+################################################################################
+def ScoreSweepForTicker(closeBytes, gridDict, scoreFunction):
+    closeColumn = array(VALUE_COLUMN_TYPECODE)
+    closeColumn.frombytes(closeBytes)
+
+    sweepInputs = CSweepInputs(closeColumn)
+    scoreDict = {}
+    for key, indicatorColumn in ComputeSweepColumns(closeColumn, gridDict, sweepInputs).items():
+        scoreDict[key] = scoreFunction(sweepInputs, indicatorColumn)
+    return scoreDict
+# End - ScoreSweepForTicker
+
+
+
+
+
+################################################################################
+#
+# [RunParameterSweep]
+#
+# Score every window of gridDict on every ticker in stockTickerDict.
+# Returns a dictionary from each symbol to its dictionary of scores, see
+# ScoreSweepForTicker. numWorkers=None uses one process per CPU, and with 1
+# worker everything runs in this process.
+################################################################################
+def RunParameterSweep(stockTickerDict, gridDict, scoreFunction=ScoreByNextDayCorrelation, numWorkers=None, executor=None):
+    resultDict = {}
+    tickerSymbolList = []
+    for tickerSymbol, stockTicker in stockTickerDict.items():
+        if ((stockTicker is not None) and (len(stockTicker.History) > 0)):
+            tickerSymbolList.append(tickerSymbol)
+    if (numWorkers is None):
+        numWorkers = os.cpu_count() or 1
+
+    if ((executor is None) and ((numWorkers <= 1) or (len(tickerSymbolList) <= 1))):
+        for tickerSymbol in tickerSymbolList:
+            closeColumn = stockTickerDict[tickerSymbol].History.GetColumn('Cl')
+            resultDict[tickerSymbol] = ScoreSweepForTicker(memoryview(closeColumn).tobytes(), gridDict, scoreFunction)
+        return resultDict
+
+    ownExecutor = None
+    if (executor is None):
+        ownExecutor = ProcessPoolExecutor(max_workers=numWorkers)
+        executor = ownExecutor
+    try:
+        futureList = []
+        for tickerSymbol in tickerSymbolList:
+            closeColumn = stockTickerDict[tickerSymbol].History.GetColumn('Cl')
+            futureList.append((tickerSymbol, executor.submit(ScoreSweepForTicker, memoryview(closeColumn).tobytes(), 
+                                                            gridDict, scoreFunction)))
+        for tickerSymbol, future in futureList:
+            resultDict[tickerSymbol] = future.result()
+    finally:
+        if (ownExecutor is not None):
+            ownExecutor.shutdown()
+
+    return resultDict
+# End - RunParameterSweep
+
+
+
+
+
+################################################################################
+#
+# [AverageSweepScores]
+#
+# The mean score of each window across all tickers of a RunParameterSweep result.
+################################################################################
+def AverageSweepScores(sweepResultDict):
+    sumDict = {}
+    countDict = {}
+    for scoreDict in sweepResultDict.values():
+        for key, score in scoreDict.items():
+            sumDict[key] = sumDict.get(key, 0.0) + score
+            countDict[key] = countDict.get(key, 0) + 1
+    # End - for scoreDict in sweepResultDict.values():
+
+    return {key: sumDict[key] / countDict[key] for key in sumDict}
+# End - AverageSweepScores
+
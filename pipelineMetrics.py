@@ -0,0 +1,380 @@
+#!/usr/bin/python3
+################################################################################
+#
+# Copyright (c) 2024-2025 Dawson Dean
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+#
+# Timers and counters for each stage of the report pipeline.
+#
+# Each stage (fetching the info, fetching the history, loading it into the
+# ticker, computing the stats, expanding the template) is timed, and each
+# ticker keeps its own times and counts (retries, rows loaded, bytes fetched,
+# cache hits). The results can be written as JSON or in the Prometheus text
+# format.
+#
+# A CPipelineMetrics made with fEnabled=False records nothing. Its Timer()
+# returns one shared do-nothing timer and AddCount() returns at once, so the
+# loaders always call it and it costs about one method call when turned off.
+# Use g_DisabledMetrics for that instead of making new ones.
+################################################################################
+import json
+import time
+import threading
+
+# Stages
+STAGE_LOAD_TICKER = "loadTicker"
+STAGE_INFO = "info"
+STAGE_HISTORY = "history"
+STAGE_BULK_HISTORY = "bulkHistory"
+STAGE_INGEST = "ingest"
+STAGE_COMPUTE_STATS = "computeStats"
+STAGE_REPORT_ROW = "reportRow"
+STAGE_EXPAND_TEMPLATE = "expandTemplate"
+
+# Counters
+COUNTER_RETRIES = "retries"
+COUNTER_FAILURES = "failures"
+COUNTER_ROWS_INGESTED = "rowsIngested"
+COUNTER_BYTES_FETCHED = "bytesFetched"
+COUNTER_CACHE_HITS = "cacheHits"
+COUNTER_CACHE_QUOTE_HITS = "cacheQuoteHits"
+COUNTER_CACHE_MISSES = "cacheMisses"
+
+# The "ticker" of the stages that are not for one ticker, like expanding the template
+PIPELINE_TICKER_SYMBOL = ""
+
+DEFAULT_PROMETHEUS_PREFIX = "finlib_pipeline"
+
+
+
+
+
+################################################################################
+#
+# class CStageTimer
+#
+# Used as "with metrics.Timer(stageName, tickerSymbol):"
+################################################################################
+class CStageTimer(object):
+    #####################################################
+    # Constructor - This method is part of any class
+    #####################################################
+    def __init__(self, pipelineMetrics, stageName, tickerSymbol):
+        self.PipelineMetrics = pipelineMetrics
+        self.StageName = stageName
+        self.TickerSymbol = tickerSymbol
+        self.StartTime = 0.0
+    # End -  __init__
+
+    def __enter__(self):
+        self.StartTime = time.perf_counter()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.PipelineMetrics.AddStageTime(self.StageName, time.perf_counter() - self.StartTime, self.TickerSymbol)
+        return False
+
+# End - CStageTimer
+
+
+
+
+
+################################################################################
+#
+# class CNullStageTimer
+#
+# The timer of a disabled CPipelineMetrics.
+################################################################################
+class CNullStageTimer(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        return False
+
+# End - CNullStageTimer
+
+g_NullStageTimer = CNullStageTimer()
+
+
+
+
+
+################################################################################
+#
+# class CPipelineMetrics
+#
+################################################################################
+class CPipelineMetrics(object):
+    #####################################################
+    # Constructor - This method is part of any class
+    #####################################################
+    def __init__(self, fEnabled=True):
+        self.fEnabled = fEnabled
+        self.Lock = threading.Lock()
+
+        # tickerSymbol -> {"Stages": {stageName: {"Count", "Seconds", "MaxSeconds"}}, 
+        #                  "Counters": {counterName: value}}
+        self.TickerDict = {}
+    # End -  __init__
+
+
+    #####################################################
+    #
+    # [CPipelineMetrics::GetTickerEntry]
+    #
+    # The caller holds self.Lock
+    #####################################################
+    def GetTickerEntry(self, tickerSymbol):
+        if (tickerSymbol is None):
+            tickerSymbol = PIPELINE_TICKER_SYMBOL
+        tickerEntry = self.TickerDict.get(tickerSymbol)
+        if (tickerEntry is None):
+            tickerEntry = {"Stages": {}, "Counters": {}}
+            self.TickerDict[tickerSymbol] = tickerEntry
+        return tickerEntry
+    # End - GetTickerEntry
+
+
+    #####################################################
+    #
+    # [CPipelineMetrics::Timer]
+    #
+    # A context manager that adds the time of its block to a stage.
+    #####################################################
+    def Timer(self, stageName, tickerSymbol=None):
+        if (not self.fEnabled):
+            return g_NullStageTimer
+        return CStageTimer(self, stageName, tickerSymbol)
+    # End - Timer
+
+
+    #####################################################
+    #
+    # [CPipelineMetrics::AddStageTime]
+    #
+    #####################################################
+    def AddStageTime(self, stageName, numSeconds, tickerSymbol=None):
+        if (not self.fEnabled):
+            return
+        with self.Lock:
+            stageDict = self.GetTickerEntry(tickerSymbol)["Stages"]
+            stageEntry = stageDict.get(stageName)
+            if (stageEntry is None):
+                stageEntry = {"Count": 0, "Seconds": 0.0, "MaxSeconds": 0.0}
+                stageDict[stageName] = stageEntry
+            stageEntry["Count"] += 1
+            stageEntry["Seconds"] += numSeconds
+            stageEntry["MaxSeconds"] = max(stageEntry["MaxSeconds"], numSeconds)
+    # End - AddStageTime
+
+
+    #####################################################
+    #
+    # [CPipelineMetrics::AddCount]
+    #
+    #####################################################
+    def AddCount(self, counterName, amount=1, tickerSymbol=None):
+        if (not self.fEnabled):
+            return
+        with self.Lock:
+            counterDict = self.GetTickerEntry(tickerSymbol)["Counters"]
+            counterDict[counterName] = counterDict.get(counterName, 0) + amount
+    # End - AddCount
+
+
+    #####################################################
+    #
+    # [CPipelineMetrics::GetTickerMetrics]
+    #
+    # A copy of the stages and counters of one ticker, or None.
+    #####################################################
+    def GetTickerMetrics(self, tickerSymbol):
+        with self.Lock:
+            tickerEntry = self.TickerDict.get(tickerSymbol)
+            if (tickerEntry is None):
+                return None
+            return {"Stages": {stageName: dict(stageEntry) for stageName, stageEntry in tickerEntry["Stages"].items()},
+                    "Counters": dict(tickerEntry["Counters"])}
+    # End - GetTickerMetrics
+
+
+    #####################################################
+    #
+    # [CPipelineMetrics::GetSummaryDict]
+    #
+    # {"Stages": totals of all tickers, "Counters": totals of all tickers,
+    #  "Tickers": {tickerSymbol: same as GetTickerMetrics}}
+    #####################################################
+    def GetSummaryDict(self):
+        with self.Lock:
+            tickerSymbolList = list(self.TickerDict.keys())
+
+        totalStageDict = {}
+        totalCounterDict = {}
+        tickerMetricsDict = {}
+        for tickerSymbol in tickerSymbolList:
+            tickerMetrics = self.GetTickerMetrics(tickerSymbol)
+            tickerMetricsDict[tickerSymbol] = tickerMetrics
+            for stageName, stageEntry in tickerMetrics["Stages"].items():
+                totalEntry = totalStageDict.setdefault(stageName, {"Count": 0, "Seconds": 0.0, "MaxSeconds": 0.0})
+                totalEntry["Count"] += stageEntry["Count"]
+                totalEntry["Seconds"] += stageEntry["Seconds"]
+                totalEntry["MaxSeconds"] = max(totalEntry["MaxSeconds"], stageEntry["MaxSeconds"])
+            for counterName, value in tickerMetrics["Counters"].items():
+                totalCounterDict[counterName] = totalCounterDict.get(counterName, 0) + value
+        # End - for tickerSymbol in tickerSymbolList:
+
+        return {"Stages": totalStageDict, "Counters": totalCounterDict, "Tickers": tickerMetricsDict}
+    # End - GetSummaryDict
+
+
+    #####################################################
+    #
+    # [CPipelineMetrics::ToJSON]
+    #
+    #####################################################
+    def ToJSON(self):
+        return json.dumps(self.GetSummaryDict(), indent=2, sort_keys=True)
+    # End - ToJSON
+
+
+    #####################################################
+    #
+    # [CPipelineMetrics::ToPrometheusText]
+    #
+    # The Prometheus text exposition format. Each stage and counter has one
+    # sample per ticker, and the stages that are not for one ticker have
+    # ticker="".
+    #####################################################
+    def ToPrometheusText(self, metricPrefix=DEFAULT_PROMETHEUS_PREFIX):
+        tickerMetricsDict = self.GetSummaryDict()["Tickers"]
+        lineList = []
+
+        stageMetricList = [("stage_seconds_total", "counter", "Seconds", "Total seconds spent in each stage."),
+                            ("stage_calls_total", "counter", "Count", "Number of times each stage ran."),
+                            ("stage_max_seconds", "gauge", "MaxSeconds", "Longest single run of each stage.")]
+        for metricName, metricType, fieldName, helpStr in stageMetricList:
+            fullName = metricPrefix + "_" + metricName
+            lineList.append("# HELP " + fullName + " " + helpStr)
+            lineList.append("# TYPE " + fullName + " " + metricType)
+            for tickerSymbol in sorted(tickerMetricsDict.keys()):
+                stageDict = tickerMetricsDict[tickerSymbol]["Stages"]
+                for stageName in sorted(stageDict.keys()):
+                    lineList.append(fullName + "{stage=\"" + EscapePrometheusLabel(stageName) + "\",ticker=\"" 
+                                    + EscapePrometheusLabel(tickerSymbol) + "\"} " + repr(stageDict[stageName][fieldName]))
+        # End - for metricName, metricType, fieldName, helpStr in stageMetricList:
+
+        counterNameSet = set()
+        for tickerMetrics in tickerMetricsDict.values():
+            counterNameSet.update(tickerMetrics["Counters"].keys())
+        for counterName in sorted(counterNameSet):
+            fullName = metricPrefix + "_" + MakeSnakeCaseName(counterName) + "_total"
+            lineList.append("# HELP " + fullName + " Total " + counterName + " of each ticker.")
+            lineList.append("# TYPE " + fullName + " counter")
+            for tickerSymbol in sorted(tickerMetricsDict.keys()):
+                counterDict = tickerMetricsDict[tickerSymbol]["Counters"]
+                if (counterName in counterDict):
+                    lineList.append(fullName + "{ticker=\"" + EscapePrometheusLabel(tickerSymbol) + "\"} " 
+                                    + repr(counterDict[counterName]))
+        # End - for counterName in sorted(counterNameSet):
+
+        return "\n".join(lineList) + "\n"
+    # End - ToPrometheusText
+
+
+    #####################################################
+    #
+    # [CPipelineMetrics::WriteJSONFile]
+    #
+    #####################################################
+    def WriteJSONFile(self, filePathName):
+        with open(filePathName, "w") as fileH:
+            fileH.write(self.ToJSON())
+    # End - WriteJSONFile
+
+
+    #####################################################
+    #
+    # [CPipelineMetrics::WritePrometheusFile]
+    #
+    # This can be read by the textfile collector of the Prometheus node exporter.
+    #####################################################
+    def WritePrometheusFile(self, filePathName, metricPrefix=DEFAULT_PROMETHEUS_PREFIX):
+        with open(filePathName, "w") as fileH:
+            fileH.write(self.ToPrometheusText(metricPrefix))
+    # End - WritePrometheusFile
+
+
+    #####################################################
+    #
+    # [CPipelineMetrics::PrintSummary]
+    #
+    #####################################################
+    def PrintSummary(self):
+        summaryDict = self.GetSummaryDict()
+        for stageName, stageEntry in sorted(summaryDict["Stages"].items()):
+            print("Stage " + stageName + ". Count=" + str(stageEntry["Count"]) 
+                    + ", Seconds=" + format(stageEntry["Seconds"], ".3f")
+                    + ", MaxSeconds=" + format(stageEntry["MaxSeconds"], ".3f"))
+        for counterName, value in sorted(summaryDict["Counters"].items()):
+            print("Counter " + counterName + "=" + str(value))
+    # End - PrintSummary
+
+# End - CPipelineMetrics
+
+g_DisabledMetrics = CPipelineMetrics(fEnabled=False)
+
+
+
+
+
+################################################################################
+#
+# [EscapePrometheusLabel]
+#
+################################################################################
+def EscapePrometheusLabel(textStr):
+    return textStr.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+# End - EscapePrometheusLabel
+
+
+
+
+
+################################################################################
+#
+# [MakeSnakeCaseName]
+#
+# "rowsIngested" -> "rows_ingested"
+################################################################################
+def MakeSnakeCaseName(nameStr):
+    resultStr = ""
+    for char in nameStr:
+        if (char.isupper()):
+            resultStr = resultStr + "_" + char.lower()
+        else:
+            resultStr = resultStr + char
+    return resultStr
+# End - MakeSnakeCaseName
+
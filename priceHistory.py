@@ -0,0 +1,684 @@
+#!/usr/bin/python3
+################################################################################
+#
+# Copyright (c) 2024-2025 Dawson Dean
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+#
+# Columnar price history.
+#
+# Each field of the daily history is stored in its own contiguous array.array,
+# and the date of each row is stored as an integer ordinal day
+# (datetime.date.toordinal). Row 0 is the oldest day and row N-1 is the newest.
+#
+# The old per-day dictionaries ({'y': ..., 'm': ..., 'd': ..., 'Cl': ...}) are
+# still available through CPriceRow, which is a small proxy that reads and writes
+# the columns, so older code that indexes PastPriceList keeps working.
+#
+# A column may also be computed from other columns by a CColumnProvider. Those
+# columns are computed the first time they are read, and are marked stale again
+# when rows are added without values for them.
+################################################################################
+import bisect
+import calendar
+from array import array
+from datetime import date
+
+# The typecodes of the columns. These are fixed-size on all the platforms we use.
+DATE_COLUMN_TYPECODE = 'i'
+VALUE_COLUMN_TYPECODE = 'd'
+
+# Names of the value columns. These are the same keys as the old per-day dictionaries.
+g_PriceColumnNameList = ['Op', 'Cl', 'Hi', 'Lo', 'Vo']
+g_IndicatorColumnNameList = ['RSI', 'EMA12', 'EMA26', 'MACD', 'KStochastic', 'DStochastic', 'BiggestRecentDropPercent']
+g_ValueColumnNameList = g_PriceColumnNameList + g_IndicatorColumnNameList
+
+# These keys are computed from the date column
+g_DateKeyNameList = ['y', 'm', 'd']
+
+
+
+
+################################################################################
+#
+# [MakeDateOrdinal]
+#
+################################################################################
+def MakeDateOrdinal(year, month, day):
+    return date(year, month, day).toordinal()
+# End - MakeDateOrdinal
+
+
+################################################################################
+#
+# [MakeSearchDateOrdinal]
+#
+# Like MakeDateOrdinal, but a day past the end of the month, like Feb 30,
+# is moved back to the last day of that month. Every real date before or on
+# (year, month, day) is then before or on the result, which is how
+# CompareDates treats these dates.
+################################################################################
+def MakeSearchDateOrdinal(year, month, day):
+    numDaysInMonth = calendar.monthrange(year, month)[1]
+    return date(year, month, max(1, min(day, numDaysInMonth))).toordinal()
+# End - MakeSearchDateOrdinal
+
+
+################################################################################
+#
+# [GetDateFromOrdinal]
+#
+################################################################################
+def GetDateFromOrdinal(dateOrdinal):
+    dateObj = date.fromordinal(dateOrdinal)
+    return dateObj.year, dateObj.month, dateObj.day
+# End - GetDateFromOrdinal
+
+
+
+
+
+################################################################################
+#
+# class CColumnProvider
+#
+# Computes one or more columns of a CPriceHistory from other columns.
+# computeFunction(*inputColumns, *argumentList) returns the new column, or a
+# tuple of columns if there is more than one output.
+# The inputs may themselves be computed columns, which are computed first.
+################################################################################
+class CColumnProvider(object):
+    #####################################################
+    # Constructor - This method is part of any class
+    #####################################################
+    def __init__(self, outputNameList, inputNameList, computeFunction, argumentList=()):
+        self.OutputNameList = outputNameList
+        self.InputNameList = inputNameList
+        self.ComputeFunction = computeFunction
+        self.ArgumentList = argumentList
+    # End -  __init__
+
+
+    #####################################################
+    #
+    # [CColumnProvider::Compute]
+    #
+    # Returns a list with one column for each name in OutputNameList.
+    #####################################################
+    def Compute(self, inputColumnList):
+        result = self.ComputeFunction(*inputColumnList, *self.ArgumentList)
+        if (len(self.OutputNameList) == 1):
+            return [result]
+        return list(result)
+    # End - Compute
+
+# End - CColumnProvider
+
+
+
+
+
+################################################################################
+#
+# class CPriceHistory
+#
+# One contiguous array per column, plus an integer date column.
+################################################################################
+class CPriceHistory(object):
+    #####################################################
+    # Constructor - This method is part of any class
+    #####################################################
+    def __init__(self):
+        self.DateColumn = array(DATE_COLUMN_TYPECODE)
+        self.Columns = {}
+        for columnName in g_ValueColumnNameList:
+            self.Columns[columnName] = array(VALUE_COLUMN_TYPECODE)
+
+        # True if the columns are buffers owned by something else, see SetMappedColumns
+        self.fMappedColumns = False
+
+        # Column name -> CColumnProvider, and the names of the computed columns
+        # that must be computed again before they are read.
+        self.ColumnProviderDict = {}
+        self.StaleColumnSet = set()
+    # End -  __init__
+
+
+    #####################################################
+    # [CPriceHistory::__len__]
+    #####################################################
+    def __len__(self):
+        return len(self.DateColumn)
+
+
+    #####################################################
+    # [CPriceHistory::GetNumRows]
+    #####################################################
+    def GetNumRows(self):
+        return len(self.DateColumn)
+
+
+    #####################################################
+    # [CPriceHistory::GetDateColumn]
+    #####################################################
+    def GetDateColumn(self):
+        return self.DateColumn
+
+
+    #####################################################
+    # [CPriceHistory::GetColumn]
+    #
+    # This returns the actual column, not a copy.
+    # A stale computed column is computed first.
+    #####################################################
+    def GetColumn(self, columnName):
+        if (columnName in self.StaleColumnSet):
+            self.ComputeColumn(columnName)
+        return self.Columns[columnName]
+
+
+    #####################################################
+    #
+    # [CPriceHistory::GetStoredColumn]
+    #
+    # Like GetColumn, but this never computes the column, so the values
+    # of a stale column are out of date. This is for code that writes
+    # the whole column, see MarkColumnComputed.
+    #####################################################
+    def GetStoredColumn(self, columnName):
+        return self.Columns[columnName]
+
+
+    #####################################################
+    #
+    # [CPriceHistory::AddColumnProvider]
+    #
+    # If there are already rows, the outputs of the provider are stale until
+    # they are first read. An empty column is never stale.
+    #####################################################
+    def AddColumnProvider(self, columnProvider):
+        for columnName in columnProvider.OutputNameList:
+            self.ColumnProviderDict[columnName] = columnProvider
+            if (len(self.DateColumn) > 0):
+                self.StaleColumnSet.add(columnName)
+    # End - AddColumnProvider
+
+
+    #####################################################
+    #
+    # [CPriceHistory::ComputeColumn]
+    #
+    # Compute a column, and every other output of its provider, from its inputs.
+    #####################################################
+    def ComputeColumn(self, columnName):
+        columnProvider = self.ColumnProviderDict[columnName]
+        inputColumnList = [self.GetColumn(inputName) for inputName in columnProvider.InputNameList]
+        newColumnList = columnProvider.Compute(inputColumnList)
+        for outputName, newColumn in zip(columnProvider.OutputNameList, newColumnList):
+            self.SetComputedColumn(outputName, newColumn)
+    # End - ComputeColumn
+
+
+    #####################################################
+    #
+    # [CPriceHistory::SetComputedColumn]
+    #
+    # Replace all of the values of a column, which is then no longer stale.
+    # newValues must have one value for each row.
+    #####################################################
+    def SetComputedColumn(self, columnName, newValues):
+        # Assign in place, so views of the column stay valid.
+        self.Columns[columnName][:] = newValues
+        self.StaleColumnSet.discard(columnName)
+    # End - SetComputedColumn
+
+
+    #####################################################
+    # [CPriceHistory::MarkColumnComputed]
+    #####################################################
+    def MarkColumnComputed(self, columnName):
+        self.StaleColumnSet.discard(columnName)
+
+
+    #####################################################
+    # [CPriceHistory::IsColumnStale]
+    #####################################################
+    def IsColumnStale(self, columnName):
+        return (columnName in self.StaleColumnSet)
+
+
+    #####################################################
+    #
+    # [CPriceHistory::InvalidateComputedColumns]
+    #
+    # Mark every computed column as stale, for example after the prices changed.
+    #####################################################
+    def InvalidateComputedColumns(self):
+        self.StaleColumnSet = set(self.ColumnProviderDict.keys())
+    # End - InvalidateComputedColumns
+
+
+    #####################################################
+    #
+    # [CPriceHistory::InvalidateMissingColumns]
+    #
+    # New rows were added with values only for the columns in givenColumnNames.
+    # Every other computed column is now stale.
+    #####################################################
+    def InvalidateMissingColumns(self, givenColumnNames):
+        for columnName in self.ColumnProviderDict:
+            if (columnName not in givenColumnNames):
+                self.StaleColumnSet.add(columnName)
+    # End - InvalidateMissingColumns
+
+
+    #####################################################
+    # [CPriceHistory::HasColumn]
+    #####################################################
+    def HasColumn(self, columnName):
+        return ((columnName in self.Columns) or (columnName in g_DateKeyNameList))
+
+
+    #####################################################
+    # [CPriceHistory::GetDate]
+    #####################################################
+    def GetDate(self, index):
+        return GetDateFromOrdinal(self.DateColumn[index])
+
+
+    #####################################################
+    # [CPriceHistory::GetValue]
+    #####################################################
+    def GetValue(self, columnName, index):
+        if (columnName in g_DateKeyNameList):
+            return self.GetDate(index)[g_DateKeyNameList.index(columnName)]
+        return self.GetColumn(columnName)[index]
+
+
+    #####################################################
+    # [CPriceHistory::SetValue]
+    #####################################################
+    def SetValue(self, columnName, index, value):
+        if (columnName in g_DateKeyNameList):
+            print("CPriceHistory.SetValue. Cannot change the date of a row: " + columnName)
+            return
+        self.GetColumn(columnName)[index] = value
+    # End - SetValue
+
+
+    #####################################################
+    #
+    # [CPriceHistory::AppendRow]
+    #
+    # valueDict maps column names to values. Columns that are
+    # not in valueDict are set to 0.
+    #####################################################
+    def AppendRow(self, year, month, day, valueDict):
+        self.CopyMappedColumns()
+        self.DateColumn.append(MakeDateOrdinal(year, month, day))
+        for columnName, column in self.Columns.items():
+            value = valueDict.get(columnName, 0)
+            if (value is None):
+                value = 0
+            column.append(value)
+        # End - for columnName, column in self.Columns.items():
+        self.InvalidateMissingColumns(valueDict)
+    # End - AppendRow
+
+
+    #####################################################
+    #
+    # [CPriceHistory::AppendColumns]
+    #
+    # Bulk load. dateOrdinalList is a sequence of ordinal days, and
+    # columnDict maps column names to sequences of the same length.
+    # Any column that is not in columnDict is filled with 0.
+    #####################################################
+    def AppendColumns(self, dateOrdinalList, columnDict):
+        numNewRows = len(dateOrdinalList)
+        for columnName, newValues in columnDict.items():
+            if (columnName not in self.Columns):
+                print("CPriceHistory.AppendColumns. Unknown column: " + str(columnName))
+                return False
+            if (len(newValues) != numNewRows):
+                print("CPriceHistory.AppendColumns. Column " + columnName + " has " + str(len(newValues))
+                        + " values, but there are " + str(numNewRows) + " dates")
+                return False
+        # End - for columnName, newValues in columnDict.items():
+
+        self.CopyMappedColumns()
+        self.DateColumn.extend(dateOrdinalList)
+        for columnName, column in self.Columns.items():
+            if (columnName in columnDict):
+                newValues = columnDict[columnName]
+                if (isinstance(newValues, array) and (newValues.typecode == VALUE_COLUMN_TYPECODE)):
+                    column.extend(newValues)
+                else:
+                    column.extend(array(VALUE_COLUMN_TYPECODE, newValues))
+            else:
+                column.extend(array(VALUE_COLUMN_TYPECODE, [0.0]) * numNewRows)
+        # End - for columnName, column in self.Columns.items():
+        if (numNewRows > 0):
+            self.InvalidateMissingColumns(columnDict)
+
+        return True
+    # End - AppendColumns
+
+
+    #####################################################
+    #
+    # [CPriceHistory::SetColumns]
+    #
+    # Like AppendColumns, but this replaces the entire history.
+    #####################################################
+    def SetColumns(self, dateOrdinalList, columnDict):
+        self.Clear()
+        return self.AppendColumns(dateOrdinalList, columnDict)
+    # End - SetColumns
+
+
+    #####################################################
+    # [CPriceHistory::Clear]
+    #####################################################
+    def Clear(self):
+        self.DateColumn = array(DATE_COLUMN_TYPECODE)
+        for columnName in self.Columns:
+            self.Columns[columnName] = array(VALUE_COLUMN_TYPECODE)
+        self.fMappedColumns = False
+        # An empty column is never stale
+        self.StaleColumnSet = set()
+    # End - Clear
+
+
+    #####################################################
+    #
+    # [CPriceHistory::SetMappedColumns]
+    #
+    # Replace the entire history with columns that are not copied, for example
+    # memoryviews of memory-mapped files (see historyStore.py).
+    # dateColumn holds ordinal days, and columnDict maps column names to
+    # buffers of the same length. Any column that is not in columnDict is
+    # filled with 0.
+    #
+    # The values can be read and changed in place, but the first call that
+    # adds or removes rows copies every column into a new array.
+    #####################################################
+    def SetMappedColumns(self, dateColumn, columnDict):
+        numRows = len(dateColumn)
+        self.DateColumn = dateColumn
+        for columnName in g_ValueColumnNameList:
+            if (columnName in columnDict):
+                self.Columns[columnName] = columnDict[columnName]
+            else:
+                self.Columns[columnName] = array(VALUE_COLUMN_TYPECODE, [0.0]) * numRows
+        # End - for columnName in g_ValueColumnNameList:
+        self.fMappedColumns = True
+        self.StaleColumnSet = set()
+        self.InvalidateMissingColumns(columnDict)
+    # End - SetMappedColumns
+
+
+    #####################################################
+    #
+    # [CPriceHistory::CopyMappedColumns]
+    #
+    # Copy mapped columns into arrays that this history owns, so they can grow.
+    #####################################################
+    def CopyMappedColumns(self):
+        if (not self.fMappedColumns):
+            return
+        self.DateColumn = array(DATE_COLUMN_TYPECODE, self.DateColumn)
+        for columnName, column in self.Columns.items():
+            self.Columns[columnName] = array(VALUE_COLUMN_TYPECODE, column)
+        self.fMappedColumns = False
+    # End - CopyMappedColumns
+
+
+    #####################################################
+    #
+    # [CPriceHistory::Truncate]
+    #
+    # Remove every row after the first numRows rows.
+    #####################################################
+    def Truncate(self, numRows):
+        self.CopyMappedColumns()
+        del self.DateColumn[numRows:]
+        for column in self.Columns.values():
+            del column[numRows:]
+    # End - Truncate
+
+
+    #####################################################
+    #
+    # [CPriceHistory::FindDateIndex]
+    #
+    # Returns the index of the newest row on or before the date, or -1 if
+    # every row is after it. The rows are in date order, so this is a
+    # binary search.
+    #####################################################
+    def FindDateIndex(self, year, month, day):
+        return bisect.bisect_right(self.DateColumn, MakeSearchDateOrdinal(year, month, day)) - 1
+    # End - FindDateIndex
+
+
+    #####################################################
+    #
+    # [CPriceHistory::GetRange]
+    #
+    # Returns the rows from startDate to endDate, including both ends, as
+    # a CPriceHistoryRange. The dates are (year, month, day) tuples.
+    # The range does not copy the columns, it holds memoryviews of them.
+    #####################################################
+    def GetRange(self, startDate, endDate):
+        startOrdinal = MakeDateOrdinal(startDate[0], startDate[1], 1) + startDate[2] - 1
+        endOrdinal = MakeSearchDateOrdinal(endDate[0], endDate[1], endDate[2])
+        firstIndex = bisect.bisect_left(self.DateColumn, startOrdinal)
+        stopIndex = bisect.bisect_right(self.DateColumn, endOrdinal)
+        stopIndex = max(firstIndex, stopIndex)
+        return CPriceHistoryRange(self, firstIndex, stopIndex)
+    # End - GetRange
+
+
+    #####################################################
+    # [CPriceHistory::GetRow]
+    #####################################################
+    def GetRow(self, index):
+        numRows = len(self.DateColumn)
+        if (index < 0):
+            index += numRows
+        if ((index < 0) or (index >= numRows)):
+            raise IndexError("CPriceHistory row index out of range")
+        return CPriceRow(self, index)
+    # End - GetRow
+
+
+    #####################################################
+    # [CPriceHistory::GetRowList]
+    #####################################################
+    def GetRowList(self):
+        return CPriceRowList(self)
+
+# End - CPriceHistory
+
+
+
+
+
+################################################################################
+#
+# class CPriceHistoryRange
+#
+# A contiguous run of rows of a CPriceHistory, [FirstIndex, StopIndex).
+# Each column is a memoryview into the history, so nothing is copied.
+# The view of a column is made the first time it is read, so a stale computed
+# column is only computed if it is used.
+#
+# Python does not let an array grow while a memoryview of it exists, so call
+# Release() (or drop the range) before adding more rows to the history.
+################################################################################
+class CPriceHistoryRange(object):
+    #####################################################
+    # Constructor - This method is part of any class
+    #####################################################
+    def __init__(self, history, firstIndex, stopIndex):
+        self.History = history
+        self.FirstIndex = firstIndex
+        self.StopIndex = stopIndex
+        self.DateColumn = memoryview(history.DateColumn)[firstIndex:stopIndex]
+        self.Columns = {}
+    # End -  __init__
+
+    def __len__(self):
+        return self.StopIndex - self.FirstIndex
+
+    #####################################################
+    # [CPriceHistoryRange::GetDateColumn]
+    #####################################################
+    def GetDateColumn(self):
+        return self.DateColumn
+
+    #####################################################
+    # [CPriceHistoryRange::GetColumn]
+    #####################################################
+    def GetColumn(self, columnName):
+        if (columnName not in self.Columns):
+            self.Columns[columnName] = memoryview(self.History.GetColumn(columnName))[self.FirstIndex:self.StopIndex]
+        return self.Columns[columnName]
+
+    #####################################################
+    # [CPriceHistoryRange::GetDate]
+    #####################################################
+    def GetDate(self, index):
+        return GetDateFromOrdinal(self.DateColumn[index])
+
+    #####################################################
+    # [CPriceHistoryRange::Release]
+    #####################################################
+    def Release(self):
+        self.DateColumn.release()
+        for view in self.Columns.values():
+            view.release()
+        self.Columns = {}
+    # End - Release
+
+# End - CPriceHistoryRange
+
+
+
+
+
+################################################################################
+#
+# class CPriceRow
+#
+# This looks like one of the old per-day dictionaries, but it reads and
+# writes the columns of a CPriceHistory.
+################################################################################
+class CPriceRow(object):
+    __slots__ = ('History', 'Index')
+
+    #####################################################
+    # Constructor - This method is part of any class
+    #####################################################
+    def __init__(self, history, index):
+        self.History = history
+        self.Index = index
+
+    def __getitem__(self, key):
+        if (not self.History.HasColumn(key)):
+            raise KeyError(key)
+        return self.History.GetValue(key, self.Index)
+
+    def __setitem__(self, key, value):
+        if (key not in self.History.Columns):
+            raise KeyError(key)
+        self.History.SetValue(key, self.Index, value)
+
+    def __contains__(self, key):
+        return self.History.HasColumn(key)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(g_DateKeyNameList) + len(self.History.Columns)
+
+    def get(self, key, defaultValue=None):
+        if (not self.History.HasColumn(key)):
+            return defaultValue
+        return self.History.GetValue(key, self.Index)
+
+    def keys(self):
+        return g_DateKeyNameList + list(self.History.Columns.keys())
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def __eq__(self, other):
+        return dict(self.items()) == dict(other.items())
+
+    def __repr__(self):
+        return str(dict(self.items()))
+# End - CPriceRow
+
+
+
+
+
+################################################################################
+#
+# class CPriceRowList
+#
+# A read-only sequence of CPriceRow, in the order of the history.
+# This is what CStockTicker.PastPriceList returns.
+################################################################################
+class CPriceRowList(object):
+    #####################################################
+    # Constructor - This method is part of any class
+    #####################################################
+    def __init__(self, history):
+        self.History = history
+
+    def __len__(self):
+        return len(self.History)
+
+    def __getitem__(self, index):
+        if (isinstance(index, slice)):
+            return [self.History.GetRow(rowIndex) for rowIndex in range(*index.indices(len(self.History)))]
+        return self.History.GetRow(index)
+
+    def __iter__(self):
+        for index in range(len(self.History)):
+            yield CPriceRow(self.History, index)
+
+    #####################################################
+    # Old code built the list by appending dictionaries.
+    #####################################################
+    def append(self, valueDict):
+        self.History.AppendRow(valueDict['y'], valueDict['m'], valueDict['d'], valueDict)
+
+    def __repr__(self):
+        return str([row for row in self])
+# End - CPriceRowList
+
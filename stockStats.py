@@ -0,0 +1,863 @@
+#!/usr/bin/python3
+################################################################################
+#
+# Copyright (c) 2024-2025 Dawson Dean
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+#
+# Column-at-a-time indicator engine.
+#
+# Each function takes a whole column of closing prices (oldest first) and
+# returns a whole column of results, one value per day, in a single pass.
+# The results match the per-day methods of CStockTicker (ComputeRSI,
+# GetExponentialMovingAverage, GetStochastic, ComputeBiggestRecentDrop),
+# including how they shorten the window at the start of the history.
+#
+# A per-day method called with startingFromNDaysBeforeNow = N-1-e looks at
+# the window GetPastPrices returns for row e, which is the
+# min(numPrices - 1, e) closes that end at row e.
+################################################################################
+import math
+import heapq
+import operator
+from array import array
+from collections import deque
+
+import priceHistory as PriceHistory
+
+VALUE_COLUMN_TYPECODE = 'd'
+
+DEFAULT_RSI_NUM_DATA = 15
+DEFAULT_SHORT_EMA_NUM_DATA = 12
+DEFAULT_LONG_EMA_NUM_DATA = 26
+DEFAULT_STOCHASTIC_K_NUM_DATA = 14
+DEFAULT_STOCHASTIC_D_NUM_DATA = 3
+DEFAULT_RECENT_DROP_NUM_DATA = 7
+
+
+
+
+################################################################################
+#
+# [MakeEmptyColumn]
+#
+################################################################################
+def MakeEmptyColumn(numValues):
+    return array(VALUE_COLUMN_TYPECODE, [0.0]) * numValues
+# End - MakeEmptyColumn
+
+
+
+################################################################################
+#
+# class CSlidingWindowExtreme
+#
+# The largest (or smallest) value in a sliding window, in amortized constant
+# time per day for any window length.
+#
+# This is a monotonic deque of (index, value) pairs. When a new value is added,
+# every older value that can never be the extreme again is dropped from the back,
+# so the values in the deque are always sorted and the extreme is at the front.
+# Each value is added and removed at most once.
+################################################################################
+class CSlidingWindowExtreme(object):
+    #####################################################
+    # Constructor - This method is part of any class
+    #####################################################
+    def __init__(self, fFindMax):
+        self.fFindMax = fFindMax
+        self.Window = deque()
+
+    #####################################################
+    # [CSlidingWindowExtreme::Add]
+    # Indexes must be added in increasing order.
+    #####################################################
+    def Add(self, index, value):
+        window = self.Window
+        if (self.fFindMax):
+            while ((window) and (window[-1][1] <= value)):
+                window.pop()
+        else:
+            while ((window) and (window[-1][1] >= value)):
+                window.pop()
+        window.append((index, value))
+    # End - Add
+
+    #####################################################
+    # [CSlidingWindowExtreme::RemoveBefore]
+    # Drop every value with an index less than firstIndex.
+    #####################################################
+    def RemoveBefore(self, firstIndex):
+        window = self.Window
+        while ((window) and (window[0][0] < firstIndex)):
+            window.popleft()
+    # End - RemoveBefore
+
+    #####################################################
+    # [CSlidingWindowExtreme::GetExtreme]
+    # Returns None if the window is empty.
+    #####################################################
+    def GetExtreme(self):
+        if (not self.Window):
+            return None
+        return self.Window[0][1]
+
+    #####################################################
+    # [CSlidingWindowExtreme::Clear]
+    #####################################################
+    def Clear(self):
+        self.Window.clear()
+
+# End - CSlidingWindowExtreme
+
+
+
+################################################################################
+#
+# [ComputeRollingExtremeColumn]
+#
+# Entry e is the max (or min) of valueColumn[max(0, e - windowLength + 1) : e + 1].
+# This takes O(N) for any windowLength.
+################################################################################
+def ComputeRollingExtremeColumn(valueColumn, windowLength, fFindMax):
+    numRows = len(valueColumn)
+    resultColumn = MakeEmptyColumn(numRows)
+    windowExtreme = CSlidingWindowExtreme(fFindMax)
+
+    for rowIndex in range(numRows):
+        windowExtreme.Add(rowIndex, valueColumn[rowIndex])
+        windowExtreme.RemoveBefore(rowIndex - windowLength + 1)
+        resultColumn[rowIndex] = windowExtreme.GetExtreme()
+    # End - for rowIndex in range(numRows):
+
+    return resultColumn
+# End - ComputeRollingExtremeColumn
+
+
+
+################################################################################
+#
+# class CStreamingTopK
+#
+# Keeps the numValues most extreme values seen so far, in O(log numValues)
+# per value. fFindLargest selects the largest values, otherwise the smallest.
+#
+# The heap root is the kept value that would be dropped first: the least
+# extreme one, and the newest of several equal values. A new value only
+# replaces it if it is strictly more extreme, so older values win ties.
+################################################################################
+class CStreamingTopK(object):
+    #####################################################
+    # Constructor - This method is part of any class
+    #####################################################
+    def __init__(self, numValues, fFindLargest):
+        self.NumValues = numValues
+        self.fFindLargest = fFindLargest
+        self.Heap = []
+        self.NumAdded = 0
+
+    #####################################################
+    # [CStreamingTopK::Add]
+    # item is returned with the value by GetSortedList, for example a row index.
+    #####################################################
+    def Add(self, value, item):
+        if (self.fFindLargest):
+            sortKey = value
+        else:
+            sortKey = -value
+        # The sequence number keeps heapq from ever comparing the items.
+        entry = (sortKey, -self.NumAdded, value, item)
+        self.NumAdded += 1
+
+        if (len(self.Heap) < self.NumValues):
+            heapq.heappush(self.Heap, entry)
+        elif ((self.NumValues > 0) and (sortKey > self.Heap[0][0])):
+            heapq.heapreplace(self.Heap, entry)
+    # End - Add
+
+    #####################################################
+    # [CStreamingTopK::GetSortedList]
+    # Returns a list of (value, item), the most extreme first.
+    #####################################################
+    def GetSortedList(self):
+        sortedEntryList = sorted(self.Heap, reverse=True)
+        return [(entry[2], entry[3]) for entry in sortedEntryList]
+
+# End - CStreamingTopK
+
+
+
+################################################################################
+#
+# [FindExtremeIndexes]
+#
+# Returns the indexes of the numValues largest (or smallest) entries of
+# valueColumn, the most extreme first. Earlier entries win ties.
+# This is a partial selection, O(N log numValues), not a full sort.
+################################################################################
+def FindExtremeIndexes(valueColumn, numValues, fFindLargest):
+    if (fFindLargest):
+        return heapq.nlargest(numValues, range(len(valueColumn)), key=valueColumn.__getitem__)
+    return heapq.nsmallest(numValues, range(len(valueColumn)), key=valueColumn.__getitem__)
+# End - FindExtremeIndexes
+
+
+
+################################################################################
+#
+# [ComputePriceChangeColumn]
+#
+# Entry k is close k minus close k-1. Entry 0 is 0.
+################################################################################
+def ComputePriceChangeColumn(closeColumn):
+    numPrices = len(closeColumn)
+    resultColumn = MakeEmptyColumn(numPrices)
+    for index in range(1, numPrices):
+        resultColumn[index] = closeColumn[index] - closeColumn[index - 1]
+    return resultColumn
+# End - ComputePriceChangeColumn
+
+
+
+################################################################################
+#
+# [ComputeAbsoluteValueColumn]
+#
+################################################################################
+def ComputeAbsoluteValueColumn(valueColumn):
+    return array(VALUE_COLUMN_TYPECODE, map(abs, valueColumn))
+# End - ComputeAbsoluteValueColumn
+
+
+
+################################################################################
+#
+# [ComputePercentChangeColumn]
+#
+# Entry k is the percent change from close k-1 to close k. Entry 0 is 0.
+################################################################################
+def ComputePercentChangeColumn(closeColumn):
+    numPrices = len(closeColumn)
+    resultColumn = MakeEmptyColumn(numPrices)
+    for index in range(1, numPrices):
+        oldVal = closeColumn[index - 1]
+        resultColumn[index] = float((closeColumn[index] - oldVal) / oldVal) * 100.0
+    return resultColumn
+# End - ComputePercentChangeColumn
+
+
+
+################################################################################
+#
+# [ComputeFutureReturnColumn]
+#
+# Entry k is the percent change from close k to close k+numDays, so the result
+# has numDays fewer entries than closeColumn. A close of 0 gives 0.
+################################################################################
+def ComputeFutureReturnColumn(closeColumn, numDays):
+    numResults = max(0, len(closeColumn) - numDays)
+    resultColumn = MakeEmptyColumn(numResults)
+    for index in range(numResults):
+        oldVal = closeColumn[index]
+        if (oldVal != 0):
+            resultColumn[index] = float((closeColumn[index + numDays] - oldVal) / oldVal) * 100.0
+    return resultColumn
+# End - ComputeFutureReturnColumn
+
+
+
+################################################################################
+#
+# [ComputePearsonCorrelation]
+#
+# xValues and yValues have the same length. Returns 0 if there are fewer than
+# 2 values or either one does not change.
+################################################################################
+def ComputePearsonCorrelation(xValues, yValues):
+    numValues = len(xValues)
+    if (numValues < 2):
+        return 0.0
+
+    xMean = math.fsum(xValues) / numValues
+    yMean = math.fsum(yValues) / numValues
+    sumXY = 0.0
+    sumXX = 0.0
+    sumYY = 0.0
+    for xValue, yValue in zip(xValues, yValues):
+        xDelta = xValue - xMean
+        yDelta = yValue - yMean
+        sumXY += xDelta * yDelta
+        sumXX += xDelta * xDelta
+        sumYY += yDelta * yDelta
+    # End - for xValue, yValue in zip(xValues, yValues):
+
+    if ((sumXX <= 0) or (sumYY <= 0)):
+        return 0.0
+    return sumXY / math.sqrt(sumXX * sumYY)
+# End - ComputePearsonCorrelation
+
+
+
+################################################################################
+#
+# [ComputeRankColumn]
+#
+# The rank of each value, starting at 1. Equal values all get the average
+# of their ranks.
+################################################################################
+def ComputeRankColumn(valueColumn):
+    numValues = len(valueColumn)
+    rankColumn = MakeEmptyColumn(numValues)
+    sortedIndexList = sorted(range(numValues), key=valueColumn.__getitem__)
+
+    runStart = 0
+    while (runStart < numValues):
+        runStop = runStart + 1
+        while ((runStop < numValues) and (valueColumn[sortedIndexList[runStop]] == valueColumn[sortedIndexList[runStart]])):
+            runStop += 1
+        averageRank = (runStart + runStop + 1) / 2.0
+        for sortedIndex in range(runStart, runStop):
+            rankColumn[sortedIndexList[sortedIndex]] = averageRank
+        runStart = runStop
+    # End - while (runStart < numValues):
+
+    return rankColumn
+# End - ComputeRankColumn
+
+
+
+################################################################################
+#
+# [ComputeSpearmanCorrelation]
+#
+# The Pearson correlation of the ranks.
+################################################################################
+def ComputeSpearmanCorrelation(xValues, yValues):
+    return ComputePearsonCorrelation(ComputeRankColumn(xValues), ComputeRankColumn(yValues))
+# End - ComputeSpearmanCorrelation
+
+
+
+################################################################################
+#
+# [ComputeRSIColumn]
+#
+# Same result as CStockTicker.ComputeRSI for every day. The window of row e
+# holds the last min(numPrices - 2, e - 1) percent changes, and this keeps
+# running sums and counts of the gains and losses as the window slides.
+# A change of exactly 0 counts as a loss, just like ComputeRSI.
+################################################################################
+def ComputeRSIColumn(closeColumn, numPrices, percentChangeColumn=None):
+    numRows = len(closeColumn)
+    resultColumn = MakeEmptyColumn(numRows)
+    if (percentChangeColumn is None):
+        percentChangeColumn = ComputePercentChangeColumn(closeColumn)
+
+    sumGains = 0.0
+    numGains = 0
+    sumLosses = 0.0
+    numLosses = 0
+    # Only used to decide whether the average loss is exactly 0
+    numNonZeroLosses = 0
+    # The changes in the current window are [windowStart, windowStop)
+    windowStart = 0
+    windowStop = 0
+    for rowIndex in range(numRows):
+        numWindowPrices = min(numPrices - 1, rowIndex)
+        numChanges = max(0, numWindowPrices - 1)
+        newWindowStart = rowIndex - numChanges + 1
+
+        if (windowStop < newWindowStart):
+            # Nothing in the old window is still used
+            windowStart = newWindowStart
+            windowStop = newWindowStart
+            sumGains = 0.0
+            numGains = 0
+            sumLosses = 0.0
+            numLosses = 0
+            numNonZeroLosses = 0
+
+        # Remove the changes that left the window
+        while (windowStart < newWindowStart):
+            percentChange = percentChangeColumn[windowStart]
+            if (percentChange > 0):
+                sumGains -= percentChange
+                numGains -= 1
+            else:
+                sumLosses += percentChange
+                numLosses -= 1
+                if (percentChange != 0):
+                    numNonZeroLosses -= 1
+            windowStart += 1
+        # End - while (windowStart < newWindowStart):
+
+        # Add the changes that entered the window
+        while (windowStop <= rowIndex):
+            percentChange = percentChangeColumn[windowStop]
+            if (percentChange > 0):
+                sumGains += percentChange
+                numGains += 1
+            else:
+                sumLosses -= percentChange
+                numLosses += 1
+                if (percentChange != 0):
+                    numNonZeroLosses += 1
+            windowStop += 1
+        # End - while (windowStop <= rowIndex):
+
+        # Reset the sums when they are empty so rounding errors do not build up.
+        if (numGains == 0):
+            sumGains = 0.0
+        if (numNonZeroLosses == 0):
+            sumLosses = 0.0
+
+        if (numGains > 0):
+            avgPercentGain = sumGains / numGains
+        else:
+            avgPercentGain = 0
+        if (numLosses > 0):
+            avgPercentLoss = sumLosses / numLosses
+        else:
+            avgPercentLoss = 0
+
+        if (avgPercentLoss == 0):
+            resultColumn[rowIndex] = 100.0
+        else:
+            relativeStrength = avgPercentGain / avgPercentLoss
+            resultColumn[rowIndex] = 100.0 - (100.0 / (1.0 + relativeStrength))
+    # End - for rowIndex in range(numRows):
+
+    return resultColumn
+# End - ComputeRSIColumn
+
+
+
+################################################################################
+#
+# [ComputeEMAColumn]
+#
+# Same result as CStockTicker.GetExponentialMovingAverage for every day.
+#
+# That method restarts the recurrence at the start of each window with
+# alpha = 2 / (k + 1) for the k'th step, so the first step has alpha = 1 and
+# throws away the first price. Multiplying out the (1 - alpha) terms, the
+# result is a linearly weighted average of the other M prices in the window,
+# where the oldest has weight 1 and the newest has weight M.
+# A weighted average like this can slide one day in constant time:
+#   - Drop the oldest price. Every weight goes down by 1, so subtract the plain sum.
+#   - Add the newest price with weight M.
+# Each slide adds a rounding error to the sums, so they are summed again from
+# the window every time the window has moved by its own length. This keeps the
+# result as close to the per-day engine on long histories as on short ones.
+################################################################################
+def ComputeEMAColumn(closeColumn, numPrices):
+    numRows = len(closeColumn)
+    resultColumn = MakeEmptyColumn(numRows)
+
+    plainSum = 0.0
+    weightedSum = 0.0
+    # The prices in the current window are [windowStart, windowStop)
+    windowStart = 0
+    windowStop = 0
+    numSlides = 0
+    for rowIndex in range(numRows):
+        numWindowPrices = min(numPrices - 1, rowIndex)
+        if (numWindowPrices <= 0):
+            continue
+        numWeightedPrices = max(1, numWindowPrices - 1)
+        newWindowStart = rowIndex - numWeightedPrices + 1
+
+        if (windowStop < newWindowStart):
+            # Nothing in the old window is still used
+            windowStart = newWindowStart
+            windowStop = newWindowStart
+            plainSum = 0.0
+            weightedSum = 0.0
+        while (windowStart < newWindowStart):
+            weightedSum -= plainSum
+            plainSum -= closeColumn[windowStart]
+            windowStart += 1
+            numSlides += 1
+        while (windowStop <= rowIndex):
+            currentPrice = closeColumn[windowStop]
+            windowStop += 1
+            weightedSum += (windowStop - windowStart) * currentPrice
+            plainSum += currentPrice
+
+        if (numSlides >= numWeightedPrices):
+            plainSum, weightedSum = SumEMAWindow(closeColumn[windowStart:windowStop])
+            numSlides = 0
+
+        resultColumn[rowIndex] = weightedSum / ((numWeightedPrices * (numWeightedPrices + 1)) / 2.0)
+    # End - for rowIndex in range(numRows):
+
+    return resultColumn
+# End - ComputeEMAColumn
+
+
+
+################################################################################
+#
+# [SumEMAWindow]
+#
+# The plain sum and the weighted sum of the prices in an EMA window, where the
+# oldest price has weight 1. Returns plainSum, weightedSum
+################################################################################
+def SumEMAWindow(priceList):
+    plainSum = math.fsum(priceList)
+    weightedSum = math.fsum(map(operator.mul, priceList, range(1, len(priceList) + 1)))
+    return plainSum, weightedSum
+# End - SumEMAWindow
+
+
+
+################################################################################
+#
+# [ComputeStochasticColumns]
+#
+# Same result as CStockTicker.GetStochastic for every day, when kNumPrices
+# and dNumPrices are the defaults of 14 and 3. Returns 2 columns, K and D.
+# This takes O(N) for any window lengths.
+################################################################################
+def ComputeStochasticColumns(closeColumn, kNumPrices=DEFAULT_STOCHASTIC_K_NUM_DATA, dNumPrices=DEFAULT_STOCHASTIC_D_NUM_DATA):
+    numRows = len(closeColumn)
+    kColumn = MakeEmptyColumn(numRows)
+    dColumn = MakeEmptyColumn(numRows)
+    lowestInKDaysColumn = ComputeRollingExtremeColumn(closeColumn, kNumPrices, False)
+    highestInKDaysColumn = ComputeRollingExtremeColumn(closeColumn, kNumPrices, True)
+    lowestInDDaysColumn = ComputeRollingExtremeColumn(closeColumn, dNumPrices, False)
+    highestInDDaysColumn = ComputeRollingExtremeColumn(closeColumn, dNumPrices, True)
+
+    for rowIndex in range(numRows):
+        lowestPriceInKDays = lowestInKDaysColumn[rowIndex]
+        denom = highestInKDaysColumn[rowIndex] - lowestPriceInKDays
+        if (denom > 0):
+            kColumn[rowIndex] = 100.0 * (float(closeColumn[rowIndex] - lowestPriceInKDays) / float(denom))
+
+        lowestPriceInDDays = lowestInDDaysColumn[rowIndex]
+        if (lowestPriceInDDays > 0):
+            dColumn[rowIndex] = 100.0 * (float(highestInDDaysColumn[rowIndex]) / float(lowestPriceInDDays))
+    # End - for rowIndex in range(numRows):
+
+    return kColumn, dColumn
+# End - ComputeStochasticColumns
+
+
+
+################################################################################
+#
+# [ComputeBiggestRecentDropColumn]
+#
+# Same result as CStockTicker.ComputeBiggestRecentDrop for every day.
+# The window of row e is the last min(numPrices - 1, e) closes, so it never
+# includes row 0. This takes O(N) for any window length.
+################################################################################
+def ComputeBiggestRecentDropColumn(closeColumn, numPrices):
+    numRows = len(closeColumn)
+    resultColumn = MakeEmptyColumn(numRows)
+    windowExtreme = CSlidingWindowExtreme(True)
+
+    for rowIndex in range(1, numRows):
+        windowExtreme.Add(rowIndex, closeColumn[rowIndex])
+        windowExtreme.RemoveBefore(rowIndex - numPrices + 2)
+        if (numPrices <= 1):
+            continue
+        latestClosingPrice = closeColumn[rowIndex]
+        highestPastPrice = windowExtreme.GetExtreme()
+        if (highestPastPrice > latestClosingPrice):
+            resultColumn[rowIndex] = float(highestPastPrice - latestClosingPrice)
+    # End - for rowIndex in range(1, numRows):
+
+    return resultColumn
+# End - ComputeBiggestRecentDropColumn
+
+
+
+################################################################################
+#
+# [ComputeAllStatColumns]
+#
+# This returns a dictionary with a column for each of the indicators
+# that CStockTicker.ComputeAllStats stores in the history.
+################################################################################
+def ComputeAllStatColumns(closeColumn):
+    resultDict = {}
+    resultDict['RSI'] = ComputeRSIColumn(closeColumn, DEFAULT_RSI_NUM_DATA)
+    resultDict['EMA12'] = ComputeEMAColumn(closeColumn, DEFAULT_SHORT_EMA_NUM_DATA)
+    resultDict['EMA26'] = ComputeEMAColumn(closeColumn, DEFAULT_LONG_EMA_NUM_DATA)
+
+    resultDict['MACD'] = ComputeMACDColumn(resultDict['EMA12'], resultDict['EMA26'])
+
+    resultDict['KStochastic'], resultDict['DStochastic'] = ComputeStochasticColumns(closeColumn)
+    resultDict['BiggestRecentDropPercent'] = ComputeBiggestRecentDropColumn(closeColumn, DEFAULT_RECENT_DROP_NUM_DATA)
+
+    return resultDict
+# End - ComputeAllStatColumns
+
+
+
+
+
+################################################################################
+#
+# [ComputeMACDColumn]
+#
+################################################################################
+def ComputeMACDColumn(shortEMAColumn, longEMAColumn):
+    macdColumn = MakeEmptyColumn(len(shortEMAColumn))
+    for index in range(len(shortEMAColumn)):
+        macdColumn[index] = shortEMAColumn[index] - longEMAColumn[index]
+    return macdColumn
+# End - ComputeMACDColumn
+
+
+
+
+
+################################################################################
+#
+# [MakeIndicatorColumnProviderList]
+#
+# The providers of the indicator columns of a PriceHistory.CPriceHistory, with
+# the same windows as ComputeAllStatColumns. Each column is computed only when
+# it is read, along with the columns it depends on.
+################################################################################
+def MakeIndicatorColumnProviderList():
+    return [
+        PriceHistory.CColumnProvider(['RSI'], ['Cl'], ComputeRSIColumn, (DEFAULT_RSI_NUM_DATA,)),
+        PriceHistory.CColumnProvider(['EMA12'], ['Cl'], ComputeEMAColumn, (DEFAULT_SHORT_EMA_NUM_DATA,)),
+        PriceHistory.CColumnProvider(['EMA26'], ['Cl'], ComputeEMAColumn, (DEFAULT_LONG_EMA_NUM_DATA,)),
+        PriceHistory.CColumnProvider(['MACD'], ['EMA12', 'EMA26'], ComputeMACDColumn),
+        PriceHistory.CColumnProvider(['KStochastic', 'DStochastic'], ['Cl'], ComputeStochasticColumns),
+        PriceHistory.CColumnProvider(['BiggestRecentDropPercent'], ['Cl'], ComputeBiggestRecentDropColumn, 
+                                    (DEFAULT_RECENT_DROP_NUM_DATA,)),
+    ]
+# End - MakeIndicatorColumnProviderList
+
+# The providers have no state, so every history shares them.
+g_IndicatorColumnProviderList = MakeIndicatorColumnProviderList()
+
+
+
+
+
+################################################################################
+#
+# class CIncrementalStats
+#
+# Running state for all of the indicators, so a new day can be added in
+# constant time. AddClose(closePrice) takes the close of the next row and
+# returns the indicators for that row. The values are the same as the
+# column functions above would compute for that row.
+#
+# Every window ends at the newest row and is at most 26 rows long, so the
+# state can be rebuilt from the tail of an existing history, see Prime().
+################################################################################
+class CIncrementalStats(object):
+    #####################################################
+    # Constructor - This method is part of any class
+    #####################################################
+    def __init__(self):
+        self.NumRows = 0
+        self.PrevClose = None
+
+        # RSI. The percent changes in the window, plus running sums and counts.
+        self.RSIChangeList = deque()
+        self.SumGains = 0.0
+        self.NumGains = 0
+        self.SumLosses = 0.0
+        self.NumLosses = 0
+        self.NumNonZeroLosses = 0
+
+        # EMA. The prices in each window, the plain and weighted sums, and the
+        # number of slides since the sums were last summed again from the window.
+        self.ShortEMAState = [deque(), 0.0, 0.0, 0]
+        self.LongEMAState = [deque(), 0.0, 0.0, 0]
+
+        # Stochastic and recent drop
+        self.LowestInKDays = CSlidingWindowExtreme(False)
+        self.HighestInKDays = CSlidingWindowExtreme(True)
+        self.LowestInDDays = CSlidingWindowExtreme(False)
+        self.HighestInDDays = CSlidingWindowExtreme(True)
+        self.HighestInDropWindow = CSlidingWindowExtreme(True)
+    # End -  __init__
+
+
+    #####################################################
+    #
+    # [CIncrementalStats::Prime]
+    #
+    # Build the state of a new CIncrementalStats for an existing history,
+    # by replaying only the newest rows of closeColumn.
+    #####################################################
+    def Prime(self, closeColumn):
+        numRows = len(closeColumn)
+        # One extra row, so the oldest change in the RSI window has a previous close.
+        firstIndex = max(0, numRows - (DEFAULT_LONG_EMA_NUM_DATA + 1))
+        self.NumRows = firstIndex
+        for index in range(firstIndex, numRows):
+            self.AddClose(closeColumn[index])
+    # End - Prime
+
+
+    #####################################################
+    #
+    # [CIncrementalStats::AddClose]
+    #
+    # Returns a dictionary of indicator values for the new row.
+    #####################################################
+    def AddClose(self, closePrice):
+        rowIndex = self.NumRows
+        resultDict = {}
+
+        ##################################
+        # RSI
+        if (self.PrevClose is None):
+            percentChange = 0.0
+        else:
+            percentChange = float((closePrice - self.PrevClose) / self.PrevClose) * 100.0
+        numChanges = max(0, min(DEFAULT_RSI_NUM_DATA - 1, rowIndex) - 1)
+        self.RSIChangeList.append(percentChange)
+        self.AddRSIChange(percentChange, 1)
+        while (len(self.RSIChangeList) > numChanges):
+            self.AddRSIChange(self.RSIChangeList.popleft(), -1)
+        resultDict['RSI'] = self.GetRSI()
+
+        ##################################
+        # EMA and MACD
+        resultDict['EMA12'] = self.AddEMAPrice(self.ShortEMAState, DEFAULT_SHORT_EMA_NUM_DATA, rowIndex, closePrice)
+        resultDict['EMA26'] = self.AddEMAPrice(self.LongEMAState, DEFAULT_LONG_EMA_NUM_DATA, rowIndex, closePrice)
+        resultDict['MACD'] = resultDict['EMA12'] - resultDict['EMA26']
+
+        ##################################
+        # Stochastic
+        for windowExtreme in (self.LowestInKDays, self.HighestInKDays):
+            windowExtreme.Add(rowIndex, closePrice)
+            windowExtreme.RemoveBefore(rowIndex - DEFAULT_STOCHASTIC_K_NUM_DATA + 1)
+        for windowExtreme in (self.LowestInDDays, self.HighestInDDays):
+            windowExtreme.Add(rowIndex, closePrice)
+            windowExtreme.RemoveBefore(rowIndex - DEFAULT_STOCHASTIC_D_NUM_DATA + 1)
+        lowestPriceInKDays = self.LowestInKDays.GetExtreme()
+        denom = self.HighestInKDays.GetExtreme() - lowestPriceInKDays
+        if (denom > 0):
+            resultDict['KStochastic'] = 100.0 * (float(closePrice - lowestPriceInKDays) / float(denom))
+        else:
+            resultDict['KStochastic'] = 0.0
+        lowestPriceInDDays = self.LowestInDDays.GetExtreme()
+        if (lowestPriceInDDays > 0):
+            resultDict['DStochastic'] = 100.0 * (float(self.HighestInDDays.GetExtreme()) / float(lowestPriceInDDays))
+        else:
+            resultDict['DStochastic'] = 0.0
+
+        ##################################
+        # Recent drop. The window is the last min(6, rowIndex) closes.
+        numWindowPrices = min(DEFAULT_RECENT_DROP_NUM_DATA - 1, rowIndex)
+        self.HighestInDropWindow.Add(rowIndex, closePrice)
+        self.HighestInDropWindow.RemoveBefore(rowIndex - numWindowPrices + 1)
+        resultDict['BiggestRecentDropPercent'] = 0.0
+        if (numWindowPrices > 0):
+            highestPastPrice = self.HighestInDropWindow.GetExtreme()
+            if (highestPastPrice > closePrice):
+                resultDict['BiggestRecentDropPercent'] = float(highestPastPrice - closePrice)
+
+        self.PrevClose = closePrice
+        self.NumRows += 1
+        return resultDict
+    # End - AddClose
+
+
+    #####################################################
+    # [CIncrementalStats::AddRSIChange]
+    #
+    # sign is 1 to add a change to the window and -1 to remove it.
+    #####################################################
+    def AddRSIChange(self, percentChange, sign):
+        if (percentChange > 0):
+            self.SumGains += sign * percentChange
+            self.NumGains += sign
+        else:
+            self.SumLosses -= sign * percentChange
+            self.NumLosses += sign
+            if (percentChange != 0):
+                self.NumNonZeroLosses += sign
+
+        # Reset the sums when they are empty so rounding errors do not build up.
+        if (self.NumGains == 0):
+            self.SumGains = 0.0
+        if (self.NumNonZeroLosses == 0):
+            self.SumLosses = 0.0
+    # End - AddRSIChange
+
+
+    #####################################################
+    # [CIncrementalStats::GetRSI]
+    #####################################################
+    def GetRSI(self):
+        if (self.NumGains > 0):
+            avgPercentGain = self.SumGains / self.NumGains
+        else:
+            avgPercentGain = 0
+        if (self.NumLosses > 0):
+            avgPercentLoss = self.SumLosses / self.NumLosses
+        else:
+            avgPercentLoss = 0
+
+        if (avgPercentLoss == 0):
+            return 100.0
+        relativeStrength = avgPercentGain / avgPercentLoss
+        return 100.0 - (100.0 / (1.0 + relativeStrength))
+    # End - GetRSI
+
+
+    #####################################################
+    #
+    # [CIncrementalStats::AddEMAPrice]
+    #
+    # emaState is [priceList, plainSum, weightedSum, numSlides]. See ComputeEMAColumn.
+    #####################################################
+    def AddEMAPrice(self, emaState, numPrices, rowIndex, closePrice):
+        priceList = emaState[0]
+        numWindowPrices = min(numPrices - 1, rowIndex)
+        if (numWindowPrices <= 0):
+            priceList.clear()
+            emaState[1] = 0.0
+            emaState[2] = 0.0
+            emaState[3] = 0
+            return 0.0
+        numWeightedPrices = max(1, numWindowPrices - 1)
+
+        # The new price gets the largest weight. Each time the oldest price is dropped,
+        # every weight goes down by 1.
+        priceList.append(closePrice)
+        emaState[1] += closePrice
+        emaState[2] += len(priceList) * closePrice
+        while (len(priceList) > numWeightedPrices):
+            emaState[2] -= emaState[1]
+            emaState[1] -= priceList.popleft()
+            emaState[3] += 1
+        if (emaState[3] >= numWeightedPrices):
+            emaState[1], emaState[2] = SumEMAWindow(priceList)
+            emaState[3] = 0
+
+        return emaState[2] / ((numWeightedPrices * (numWeightedPrices + 1)) / 2.0)
+    # End - AddEMAPrice
+
+# End - CIncrementalStats
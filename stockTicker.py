@@ -35,8 +35,13 @@
 #
 ################################################################################
 import sys
+from array import array
 from datetime import datetime
 
+import priceHistory as PriceHistory
+import stockStats as StockStats
+import tradingCalendar as TradingCalendar
+
 #import statistics
 #from scipy import stats
 #from scipy.stats import spearmanr
@@ -54,6 +59,17 @@ DATE_COMPARE_GREATER_THAN_EQUAL = 1
 
 DEFAULT_RSI_NUM_DATA = 15
 
+# Engines for ComputeAllStats
+# STATS_ENGINE_PER_DAY calls ComputeRSI, GetExponentialMovingAverage, ... once for every day.
+# STATS_ENGINE_COLUMNAR computes each indicator for the whole history in one pass, see stockStats.py
+# STATS_ENGINE_LAZY only marks the stats as stale, and computes each column when it is first read
+STATS_ENGINE_PER_DAY = "perDay"
+STATS_ENGINE_COLUMNAR = "columnar"
+STATS_ENGINE_LAZY = "lazy"
+
+# The stat columns whose newest values are the current stats of a CStockTicker
+g_CurrentStatColumnNameList = ['RSI', 'EMA12', 'EMA26', 'MACD', 'KStochastic', 'DStochastic', 'BiggestRecentDropPercent']
+
 
 
 g_DaysInMonth = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
@@ -61,91 +77,20 @@ g_DaysInMonth = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
 # 
 # [GetDateForNumDaysOffset]
 #
-# Note, g_DaysInMonth is 0-based, while the date strings use months that are 1-based.
+# The date deltaDays calendar days before the start date.
+# This uses ordinal days, so it follows the real leap year rules. To count
+# trading days instead of calendar days, use CStockTicker.GetTradingCalendar()
 ################################################################################
 def GetDateForNumDaysOffset(startYear, startMonth, startDay, deltaDays):
     fDebug = False
-    newYear = startYear
-    newMonth = startMonth
-    newDay = startDay
+    newYear, newMonth, newDay = TradingCalendar.GetDateForNumCalendarDaysOffset(startYear, startMonth, startDay, deltaDays)
 
     if (fDebug):
         print("GetDateForNumDaysOffset. deltaDays=" + str(deltaDays))
         print("     startYear=" + str(startYear) + ", startMonth=" + str(startMonth) + ", startDay=" + str(startDay))
         print("     newYear=" + str(newYear) + ", newMonth=" + str(newMonth) + ", newDay=" + str(newDay))
 
-    # Back up years
-    while (deltaDays >= 365):
-        # 1900 was NOT a leap year but 2000 was a leap year
-        fIsStartDateLeapYear = False
-        if (((newYear - 1900) % 4) == 0):
-            if ((newMonth > 2) or ((newMonth == 2) and (newDay == 29))):
-                fIsStartDateLeapYear = True
-
-        newYear = newYear - 1
-        deltaDays = deltaDays - 365
-        if (fIsStartDateLeapYear):
-            fIsStartDateLeapYear = False
-            deltaDays = deltaDays - 1
-    # End - while (deltaDays >= 365):
-
-    # Decide if we end up on a leap year.
-    # 1900 was NOT a leap year but 2000 was a leap year
-    fInLeapYear = (((newYear - 1900) % 4) == 0)
-
-    if (fDebug):
-        print("GetDateForNumDaysOffset. Subtracted years. deltaDays=" + str(deltaDays))
-        print("     newYear=" + str(newYear) + ", newMonth=" + str(newMonth) + ", newDay=" + str(newDay))
-
-    # Back up months
-    if ((fInLeapYear) and (newMonth == 2)):
-        numDaysInMonth = 29
-    else:
-        numDaysInMonth = g_DaysInMonth[newMonth - 1]
-    while (deltaDays >= numDaysInMonth):
-        deltaDays = deltaDays - numDaysInMonth
-
-        newMonth = newMonth - 1
-        if (newMonth <= 0):
-            newMonth = 12
-            newYear = newYear - 1
-            fInLeapYear = (((newYear - 1900) % 4) == 0)
-
-        # Do this for the next iteration
-        if ((fInLeapYear) and (newMonth == 2)):
-            numDaysInMonth = 29
-        else:
-            numDaysInMonth = g_DaysInMonth[newMonth - 1]
-    # End  - while (deltaDays >= 30):
-
-    if (fDebug):
-        print("GetDateForNumDaysOffset. Subtracted months. deltaDays=" + str(deltaDays))
-        print("     newYear=" + str(newYear) + ", newMonth=" + str(newMonth) + ", newDay=" + str(newDay))
-
-    # Back up days   
-    newDay = newDay - deltaDays
-    while (newDay <= 0):
-        newMonth = newMonth - 1
-        if (newMonth <= 0):
-            newMonth = 12
-            newYear = newYear - 1
-            fInLeapYear = (((newYear - 1900) % 4) == 0)
-
-        if ((fInLeapYear) and (newMonth == 2)):
-            numDaysInMonth = 29
-        else:
-            numDaysInMonth = g_DaysInMonth[newMonth - 1]
-
-        # Add, since we are adding a negtaive number
-        newDay = numDaysInMonth + newDay   
-    # End - while (newDay < 0):
-
-    if (fDebug):
-        print("GetDateForNumDaysOffset. Subtracted days. deltaDays=" + str(deltaDays))
-        print("     newYear=" + str(newYear) + ", newMonth=" + str(newMonth) + ", newDay=" + str(newDay))
-
     return newYear, newMonth, newDay
-# End - GetDateForNumDaysOffset
 
 
 
@@ -220,21 +165,53 @@ class CStockTicker(object):
         self.avgVolume = 0
         self.PEGRatio = 0
 
-        # Derived values for today
-        self.m_RSI = 0
-        self.EMA12 = 0
-        self.EMA26 = 0
-        self.MACD = 0
-        self.BiggestRecentDropPercent = 0
-        self.kStochastic = 0
-        self.dStochastic = 0
+        # Derived values for today, by stat column name. See GetCurrentStat.
+        self.CurrentStatDict = {}
+        for columnName in g_CurrentStatColumnNameList:
+            self.CurrentStatDict[columnName] = 0
+        # The derived values that are read from the history when they are next needed
+        self.StaleCurrentStatSet = set()
 
-        # Past Values
+        # Past Values. These are stored in columns, see priceHistory.py
+        # The indicator columns are computed when they are first read.
         self.OptionDates = 0
-        self.PastPriceList = []
+        self.History = PriceHistory.CPriceHistory()
+        for columnProvider in StockStats.g_IndicatorColumnProviderList:
+            self.History.AddColumnProvider(columnProvider)
+
+        # Running state used by AppendDay. This is built when it is first needed.
+        self.IncrementalStats = None
+
+        # See GetTradingCalendar
+        self.TradingCalendar = None
     # End -  __init__
 
 
+    #####################################################
+    # [CStockTicker::PastPriceList]
+    #
+    # This used to be a list of dictionaries, one per day. It is now a
+    # view of the columnar history, and each entry is a CPriceRow that
+    # reads and writes the columns.
+    #####################################################
+    @property
+    def PastPriceList(self):
+        return self.History.GetRowList()
+
+
+    #####################################################
+    # The derived values for today used to be plain members. They are
+    # read-only now, and may be computed when they are read.
+    #####################################################
+    m_RSI = property(lambda self: self.GetCurrentStat('RSI'))
+    EMA12 = property(lambda self: self.GetCurrentStat('EMA12'))
+    EMA26 = property(lambda self: self.GetCurrentStat('EMA26'))
+    MACD = property(lambda self: self.GetCurrentStat('MACD'))
+    kStochastic = property(lambda self: self.GetCurrentStat('KStochastic'))
+    dStochastic = property(lambda self: self.GetCurrentStat('DStochastic'))
+    BiggestRecentDropPercent = property(lambda self: self.GetCurrentStat('BiggestRecentDropPercent'))
+
+
     #####################################################
     # [CStockTicker::
     # Destructor - This method is part of any class
@@ -300,37 +277,54 @@ class CStockTicker(object):
     # [CStockTicker::GetRSI]
     #####################################################
     def GetRSI(self):
-        return round(self.m_RSI, 2)
+        return round(self.GetCurrentStat('RSI'), 2)
 
     #####################################################
     # [CStockTicker::GetStockEMA]
     #####################################################
     def GetEMA(self):
-        return round(self.EMA26, 2)
+        return round(self.GetCurrentStat('EMA26'), 2)
 
     #####################################################
     # [CStockTicker::GetBiggestRecentDropPercent]
     #####################################################
     def GetBiggestRecentDropPercent(self):
-        return round(self.BiggestRecentDropPercent, 2)
+        return round(self.GetCurrentStat('BiggestRecentDropPercent'), 2)
 
     #####################################################
     # [CStockTicker::GetKStochastic]
     #####################################################
     def GetKStochastic(self):
-        return round(self.kStochastic, 2)
+        return round(self.GetCurrentStat('KStochastic'), 2)
 
     #####################################################
     # [CStockTicker::GetDStochastic]
     #####################################################
     def GetDStochastic(self):
-        return round(self.dStochastic, 2)
+        return round(self.GetCurrentStat('DStochastic'), 2)
 
     #####################################################
     # [CStockTicker::GetMACD]
     #####################################################
     def GetMACD(self):
-        return round(self.MACD, 2)
+        return round(self.GetCurrentStat('MACD'), 2)
+
+    #####################################################
+    #
+    # [CStockTicker::GetCurrentStat]
+    #
+    # The newest value of a stat column, like 'RSI' or 'MACD'. If the current
+    # stats are stale, this reads the newest day of that column, which computes
+    # the column if it is stale too.
+    #####################################################
+    def GetCurrentStat(self, columnName):
+        if (columnName in self.StaleCurrentStatSet):
+            newestPriceIndex = len(self.History) - 1
+            if (newestPriceIndex >= 0):
+                self.CurrentStatDict[columnName] = self.History.GetColumn(columnName)[newestPriceIndex]
+            self.StaleCurrentStatSet.discard(columnName)
+        return self.CurrentStatDict[columnName]
+    # End - GetCurrentStat
 
     #####################################################
     # [CStockTicker::GetPrevDayChange]
@@ -340,12 +334,11 @@ class CStockTicker(object):
         percentChange = 0
         absChange = 0
 
-        newestPriceIndex = len(self.PastPriceList) - 1
+        closeColumn = self.History.GetColumn('Cl')
+        newestPriceIndex = len(closeColumn) - 1
         secondNewestPriceIndex = newestPriceIndex - 1
-        newestPriceInfo = self.PastPriceList[newestPriceIndex]
-        newestClosePrice = newestPriceInfo['Cl']
-        secondNewestPriceInfo = self.PastPriceList[secondNewestPriceIndex]
-        secondNewestClosePrice = secondNewestPriceInfo['Cl']
+        newestClosePrice = closeColumn[newestPriceIndex]
+        secondNewestClosePrice = closeColumn[secondNewestPriceIndex]
 
         absChange = round((newestClosePrice - secondNewestClosePrice), 2)
         percentChange = round(((absChange / secondNewestClosePrice) * 100.0), 2)
@@ -353,8 +346,8 @@ class CStockTicker(object):
         if (fDebug):
             print("GetPrevDayChange")
             print("   self.CurrentPrice = " + str(self.CurrentPrice))
-            print("   newestPriceInfo = " + str(newestPriceInfo))
-            print("   secondNewestPriceInfo = " + str(secondNewestPriceInfo))
+            print("   newestPriceInfo = " + str(self.History.GetRow(newestPriceIndex)))
+            print("   secondNewestPriceInfo = " + str(self.History.GetRow(secondNewestPriceIndex)))
             print("   newestClosePrice = " + str(newestClosePrice))
             print("   secondNewestClosePrice = " + str(secondNewestClosePrice))
             print("   absChange = " + str(absChange))
@@ -366,15 +359,36 @@ class CStockTicker(object):
 
 
 
+    #####################################################
+    #
+    # [CStockTicker::GetTradingCalendar]
+    #
+    # A TradingCalendar.CTradingCalendar for the dates in the history.
+    # It is built the first time it is needed, and again whenever the number
+    # of days or the newest date of the history changed. The newest date
+    # matters because removing a day and appending a different one keeps
+    # the number of days the same.
+    #####################################################
+    def GetTradingCalendar(self):
+        numPastPrices = len(self.History)
+        fStale = (self.TradingCalendar is None) or (self.TradingCalendar.GetNumTradingDays() != numPastPrices)
+        if ((not fStale) and (numPastPrices > 0)):
+            fStale = (self.TradingCalendar.LastOrdinal != self.History.GetDateColumn()[numPastPrices - 1])
+        if (fStale):
+            self.TradingCalendar = TradingCalendar.CTradingCalendar(self.History.GetDateColumn())
+        return self.TradingCalendar
+    # End - GetTradingCalendar
+
+
+
     #####################################################
     # [CStockTicker::GetLatestDate]
     #####################################################
     def GetLatestDate(self):
         fDebug = False
-        newestPriceIndex = len(self.PastPriceList) - 1
-        newestPriceInfo = self.PastPriceList[newestPriceIndex]
+        newestPriceIndex = len(self.History) - 1
 
-        return newestPriceInfo['y'], newestPriceInfo['m'], newestPriceInfo['d']
+        return self.History.GetDate(newestPriceIndex)
     # End - GetLatestDate
 
 
@@ -503,13 +517,83 @@ class CStockTicker(object):
     # [CStockTicker::SetPastValues
     #####################################################
     def SetPastValues(self, year, month, day, openPrice, closePrice, volume, highPrice, lowPrice, rsi, ema12, ema26, macd, kStochastic, dStochastic, biggestPriceDrop):
-        newQueueEntry = {'y': year, 'm': month, 'd': day,
-                        'Cl': closePrice, 'Op': openPrice, 'Hi': highPrice, 'Lo': lowPrice, 'Vo': volume,
+        newQueueEntry = {'Cl': closePrice, 'Op': openPrice, 'Hi': highPrice, 'Lo': lowPrice, 'Vo': volume,
                         'RSI': rsi, 'EMA12': ema12, 'EMA26': ema26, 'MACD': macd, 'KStochastic': kStochastic,
-                        'BiggestRecentDropPercent': biggestPriceDrop }
-        self.PastPriceList.append(newQueueEntry)
+                        'DStochastic': dStochastic, 'BiggestRecentDropPercent': biggestPriceDrop }
+        self.History.AppendRow(year, month, day, newQueueEntry)
     # End - SetPastValues
 
+    #####################################################
+    # [CStockTicker::SetPastValueColumns
+    #
+    # Bulk version of SetPastValues. This appends whole columns at once.
+    # dateOrdinalList holds ordinal days (see PriceHistory.MakeDateOrdinal) and
+    # columnDict maps column names ('Op', 'Cl', 'Hi', 'Lo', 'Vo', 'RSI', ...)
+    # to sequences with one value per date.
+    #####################################################
+    def SetPastValueColumns(self, dateOrdinalList, columnDict):
+        return self.History.AppendColumns(dateOrdinalList, columnDict)
+    # End - SetPastValueColumns
+
+    #####################################################
+    # [CStockTicker::ReplacePastValueColumns
+    #
+    # Like SetPastValueColumns, but this replaces the entire history.
+    # The running state of AppendDay and the trading calendar are rebuilt
+    # when they are next needed.
+    #####################################################
+    def ReplacePastValueColumns(self, dateOrdinalList, columnDict):
+        self.IncrementalStats = None
+        self.TradingCalendar = None
+        return self.History.SetColumns(dateOrdinalList, columnDict)
+    # End - ReplacePastValueColumns
+
+    #####################################################
+    #
+    # [CStockTicker::AppendDay
+    #
+    # Add one new trading day and compute its indicators, without
+    # recomputing the rest of the history. This takes constant time.
+    # The indicators for the new day become the current stats.
+    #####################################################
+    def AppendDay(self, year, month, day, openPrice, closePrice, volume, highPrice, lowPrice):
+        fDebug = False
+
+        # Rebuild the running state if the history was changed some other way.
+        numPastPrices = len(self.History)
+        if ((self.IncrementalStats is None) or (self.IncrementalStats.NumRows != numPastPrices)):
+            if (fDebug):
+                print("AppendDay. Rebuild the incremental stats. numPastPrices=" + str(numPastPrices))
+            self.IncrementalStats = StockStats.CIncrementalStats()
+            self.IncrementalStats.Prime(self.History.GetColumn('Cl'))
+
+        statDict = self.IncrementalStats.AddClose(closePrice)
+        newQueueEntry = {'Cl': closePrice, 'Op': openPrice, 'Hi': highPrice, 'Lo': lowPrice, 'Vo': volume}
+        newQueueEntry.update(statDict)
+        self.History.AppendRow(year, month, day, newQueueEntry)
+        self.TradingCalendar = None
+
+        for columnName in g_CurrentStatColumnNameList:
+            self.CurrentStatDict[columnName] = statDict[columnName]
+        self.StaleCurrentStatSet = set()
+    # End - AppendDay
+
+    #####################################################
+    #
+    # [CStockTicker::RemoveNewestDays
+    #
+    # Remove the newest numDays days from the history, for example to replace
+    # them with revised prices. The current stats are not changed.
+    # The running state of AppendDay and the trading calendar are rebuilt
+    # when they are next needed.
+    #####################################################
+    def RemoveNewestDays(self, numDays):
+        numPastPrices = len(self.History)
+        self.History.Truncate(max(0, numPastPrices - numDays))
+        self.IncrementalStats = None
+        self.TradingCalendar = None
+    # End - RemoveNewestDays
+
 
 
 
@@ -522,40 +606,102 @@ class CStockTicker(object):
 
     #####################################################
     # [CStockTicker::ComputeAllStats]
-    #####################################################
-    def ComputeAllStats(self):
+    #
+    # engineName is STATS_ENGINE_COLUMNAR, STATS_ENGINE_LAZY or STATS_ENGINE_PER_DAY.
+    # All of them compute the same values. The default, columnar, computes every
+    # stat column before it returns. The lazy engine only marks the stats as
+    # stale, and each stat column is computed when it is first read, so a caller
+    # that only reads GetRSI() only computes the RSI column. The compute then
+    # happens in whichever thread first reads the stat.
+    #####################################################
+    def ComputeAllStats(self, engineName=STATS_ENGINE_COLUMNAR):
         fDebug = False
         if (fDebug):
-            print("ComputeAllStats")
+            print("ComputeAllStats. engineName=" + engineName)
+
+        if (engineName == STATS_ENGINE_LAZY):
+            self.History.InvalidateComputedColumns()
+            self.SetCurrentStatsFromHistory()
+            return
+        if (engineName == STATS_ENGINE_COLUMNAR):
+            self.ComputeAllStatsColumnar()
+            return
+        if (engineName != STATS_ENGINE_PER_DAY):
+            print("ERROR! ComputeAllStats given an Invalid engineName: " + str(engineName))
+            return
 
         # Compute the current stats for the latest pric information
-        self.m_RSI = self.ComputeRSI(0, DEFAULT_RSI_NUM_DATA)
-        self.EMA12 = self.GetExponentialMovingAverage(0, 12)
-        self.EMA26 = self.GetExponentialMovingAverage(0, 26)
-        self.MACD = self.EMA12 - self.EMA26
-        self.kStochastic, self.dStochastic = self.GetStochastic(0)
-        self.BiggestRecentDropPercent = self.ComputeBiggestRecentDrop(0, 7)
+        currentStatDict = self.CurrentStatDict
+        currentStatDict['RSI'] = self.ComputeRSI(0, DEFAULT_RSI_NUM_DATA)
+        currentStatDict['EMA12'] = self.GetExponentialMovingAverage(0, 12)
+        currentStatDict['EMA26'] = self.GetExponentialMovingAverage(0, 26)
+        currentStatDict['MACD'] = currentStatDict['EMA12'] - currentStatDict['EMA26']
+        currentStatDict['KStochastic'], currentStatDict['DStochastic'] = self.GetStochastic(0)
+        currentStatDict['BiggestRecentDropPercent'] = self.ComputeBiggestRecentDrop(0, 7)
+        self.StaleCurrentStatSet = set()
 
         # Compute the stats for each historical day
-        newestPriceIndex = len(self.PastPriceList) - 1
-        numPastPrices = len(self.PastPriceList)
+        rsiColumn = self.History.GetStoredColumn('RSI')
+        ema12Column = self.History.GetStoredColumn('EMA12')
+        ema26Column = self.History.GetStoredColumn('EMA26')
+        macdColumn = self.History.GetStoredColumn('MACD')
+        kStochasticColumn = self.History.GetStoredColumn('KStochastic')
+        dStochasticColumn = self.History.GetStoredColumn('DStochastic')
+        dropColumn = self.History.GetStoredColumn('BiggestRecentDropPercent')
+        newestPriceIndex = len(self.History) - 1
+        numPastPrices = len(self.History)
         for index in range(numPastPrices):
             #print("ComputeAllStats - index=" + str(index))
-            currentPriceInfo = self.PastPriceList[newestPriceIndex]
-
-            currentPriceInfo['RSI'] = self.ComputeRSI(index, DEFAULT_RSI_NUM_DATA)
-            currentPriceInfo['EMA12'] = self.GetExponentialMovingAverage(index, 12)
-            currentPriceInfo['EMA26'] = self.GetExponentialMovingAverage(index, 26)
-            currentPriceInfo['MACD'] = currentPriceInfo['EMA12'] - currentPriceInfo['EMA26']
-            currentPriceInfo['KStochastic'], currentPriceInfo['DStochastic'] = self.GetStochastic(index)
-            currentPriceInfo['BiggestRecentDropPercent'] = self.ComputeBiggestRecentDrop(index, 7)
+            rsiColumn[newestPriceIndex] = self.ComputeRSI(index, DEFAULT_RSI_NUM_DATA)
+            ema12Column[newestPriceIndex] = self.GetExponentialMovingAverage(index, 12)
+            ema26Column[newestPriceIndex] = self.GetExponentialMovingAverage(index, 26)
+            macdColumn[newestPriceIndex] = ema12Column[newestPriceIndex] - ema26Column[newestPriceIndex]
+            kStochasticColumn[newestPriceIndex], dStochasticColumn[newestPriceIndex] = self.GetStochastic(index)
+            dropColumn[newestPriceIndex] = self.ComputeBiggestRecentDrop(index, 7)
 
             newestPriceIndex = newestPriceIndex - 1
         # End - for index in range(numPastPrices):
+
+        for columnName in g_CurrentStatColumnNameList:
+            self.History.MarkColumnComputed(columnName)
     # End - ComputeAllStats(self)
 
 
 
+    #####################################################
+    # [CStockTicker::ComputeAllStatsColumnar]
+    #
+    # This computes every indicator column in one pass over the close prices,
+    # and then copies the newest value of each into the current stats.
+    #####################################################
+    def ComputeAllStatsColumnar(self):
+        numPastPrices = len(self.History)
+        if (numPastPrices <= 0):
+            return
+
+        statColumnDict = StockStats.ComputeAllStatColumns(self.History.GetColumn('Cl'))
+        for columnName, newColumn in statColumnDict.items():
+            self.History.SetComputedColumn(columnName, newColumn)
+
+        self.SetCurrentStatsFromHistory()
+    # End - ComputeAllStatsColumnar
+
+
+
+    #####################################################
+    # [CStockTicker::SetCurrentStatsFromHistory]
+    #
+    # Use the stats of the newest day as the current stats. Each one is read
+    # when it is first needed, see GetCurrentStat.
+    #####################################################
+    def SetCurrentStatsFromHistory(self):
+        if (len(self.History) <= 0):
+            return
+        self.StaleCurrentStatSet = set(g_CurrentStatColumnNameList)
+    # End - SetCurrentStatsFromHistory
+
+
+
 
 
 
@@ -570,7 +716,8 @@ class CStockTicker(object):
         if (fDebug):
             print("GetPastPrices. startingFromNDaysBeforeNow=" + str(startingFromNDaysBeforeNow) + ", numPrices=" + str(numPrices))
  
-        maxAvailPrices = len(self.PastPriceList) - abs(startingFromNDaysBeforeNow)
+        closeColumn = self.History.GetColumn('Cl')
+        maxAvailPrices = len(closeColumn) - abs(startingFromNDaysBeforeNow)
         # Subtract 1 because the indexes are 0-based
         newestPriceIndex = maxAvailPrices - 1
         # Add 1 because the oldest index is a valid result values.
@@ -580,7 +727,7 @@ class CStockTicker(object):
         numPrices = newestPriceIndex - oldestPriceIndex
 
         if (fDebug):
-            print("GetPastPrices. List length=" + str(len(self.PastPriceList)))
+            print("GetPastPrices. List length=" + str(len(closeColumn)))
             print("GetPastPrices. maxAvailPrices=" + str(maxAvailPrices))
             print("GetPastPrices. newestPriceIndex=" + str(newestPriceIndex))
             print("GetPastPrices. oldestPriceIndex=" + str(oldestPriceIndex))
@@ -589,7 +736,7 @@ class CStockTicker(object):
         resultList = [0] * numPrices
         lastDestIndex = numPrices - 1
         for index in range(numPrices):
-            resultList[lastDestIndex - index] = self.PastPriceList[newestPriceIndex - index]['Cl']
+            resultList[lastDestIndex - index] = closeColumn[newestPriceIndex - index]
             if (fDebug):
                 print("Copy from " + str(newestPriceIndex - index) + " to " + str(lastDestIndex - index) + ": " + str(resultList[lastDestIndex - index]))
         # End - for index in range(numPrices):
@@ -603,6 +750,33 @@ class CStockTicker(object):
 
 
 
+    #####################################################
+    #
+    # [CStockTicker::GetPastPricesView]
+    #
+    # The same prices as GetPastPrices, but as a memoryview of the close
+    # column instead of a new list, so nothing is copied.
+    # The oldest price is index 0, and the latest price is at index numPrices-1
+    #
+    # The history cannot grow while a view exists. Callers should not keep
+    # the view, or should call release() on it when they are done.
+    # Callers that want a list should call GetPastPrices instead.
+    #####################################################
+    def GetPastPricesView(self, startingFromNDaysBeforeNow, numPrices):
+        closeColumn = self.History.GetColumn('Cl')
+        maxAvailPrices = len(closeColumn) - abs(startingFromNDaysBeforeNow)
+        # Subtract 1 because the indexes are 0-based
+        newestPriceIndex = maxAvailPrices - 1
+        oldestPriceIndex = max(0, (newestPriceIndex - numPrices) + 1)
+
+        # Like GetPastPrices, this leaves out the price at oldestPriceIndex.
+        stopIndex = max(0, newestPriceIndex + 1)
+        startIndex = min(oldestPriceIndex + 1, stopIndex)
+        return memoryview(closeColumn)[startIndex:stopIndex]
+    # End - GetPastPricesView()
+
+
+
 
 
     #####################################################
@@ -620,26 +794,31 @@ class CStockTicker(object):
             print("     startOffset=" + str(startOffset))
             print("     daysInFuturePrice=" + str(daysInFuturePrice))
  
-        maxAvailPrices = len(self.PastPriceList) - abs(daysInFuturePrice)
+        maxAvailPrices = len(self.History) - abs(daysInFuturePrice)
         if (fDebug):
-            print("GetPastPrices. List length=" + str(len(self.PastPriceList)))
+            print("GetPastPrices. List length=" + str(len(self.History)))
             print("GetPastPrices. maxAvailPrices=" + str(maxAvailPrices))
 
-        for index in range(maxAvailPrices):
-            currentPriceInfo = self.PastPriceList[index]
-            if (markerName not in currentPriceInfo):
-                continue
-            currentMarker = currentPriceInfo[markerName]
+        # Every row has every column, so either all rows have the marker or none do.
+        if (not self.History.HasColumn(markerName)):
+            return statList, futurePriceList
+        closeColumn = self.History.GetColumn('Cl')
 
-            futurePriceInfo = self.PastPriceList[index + daysInFuturePrice]
-            if ('Cl' not in futurePriceInfo):
-                continue
-            futurePrice = futurePriceInfo['Cl']
+        # Usually both lists are just slices of the columns.
+        if ((markerName not in PriceHistory.g_DateKeyNameList) and (daysInFuturePrice >= 0)):
+            maxAvailPrices = max(0, maxAvailPrices)
+            statList = list(self.History.GetColumn(markerName)[:maxAvailPrices])
+            futurePriceList = list(closeColumn[daysInFuturePrice:daysInFuturePrice + maxAvailPrices])
+            return statList, futurePriceList
+
+        for index in range(maxAvailPrices):
+            currentMarker = self.History.GetValue(markerName, index)
+            futurePrice = closeColumn[index + daysInFuturePrice]
 
             if (fDebug):
                 print("Iteration. index = " + str(index))
                 print("     index + daysInFuturePrice = " + str(index + daysInFuturePrice))
-                print("     len(self.PastPriceList) = " + str(len(self.PastPriceList)))
+                print("     len(self.History) = " + str(len(self.History)))
                 print("     len(currentMarker) = " + str(currentMarker))
                 print("     len(futurePrice) = " + str(futurePrice))
 
@@ -657,6 +836,63 @@ class CStockTicker(object):
 
 
 
+    #####################################################
+    #
+    # [CStockTicker::GetSynchronizedStatAndFutureReturnColumns]
+    #
+    # The batch version of GetSynchronizedStatAndFuturePriceLists, for many
+    # markers and many horizons at once, using the percent change in price
+    # over the horizon instead of the future price.
+    #
+    # Returns a dictionary from each (markerName, numDaysInFuture) to a pair of
+    # arrays (markerValues, futureReturns) of the same length. Entry k of
+    # futureReturns is the percent change from the close of day k to the close
+    # numDaysInFuture days later. The future returns of each horizon are
+    # computed once and shared by all of the markers.
+    # Markers that are not value columns of the history are left out.
+    #####################################################
+    def GetSynchronizedStatAndFutureReturnColumns(self, markerNameList, horizonList):
+        resultDict = {}
+        closeColumn = self.History.GetColumn('Cl')
+
+        futureReturnDict = {}
+        for numDaysInFuture in horizonList:
+            futureReturnDict[numDaysInFuture] = StockStats.ComputeFutureReturnColumn(closeColumn, abs(numDaysInFuture))
+
+        for markerName in markerNameList:
+            if ((markerName in PriceHistory.g_DateKeyNameList) or (not self.History.HasColumn(markerName))):
+                print("GetSynchronizedStatAndFutureReturnColumns. Not a value column: " + str(markerName))
+                continue
+            markerColumn = self.History.GetColumn(markerName)
+            for numDaysInFuture, futureReturnColumn in futureReturnDict.items():
+                markerValues = array(PriceHistory.VALUE_COLUMN_TYPECODE, markerColumn[:len(futureReturnColumn)])
+                resultDict[(markerName, numDaysInFuture)] = (markerValues, futureReturnColumn)
+        # End - for markerName in markerNameList:
+
+        return resultDict
+    # End - GetSynchronizedStatAndFutureReturnColumns()
+
+
+
+    #####################################################
+    #
+    # [CStockTicker::ComputeMarkerCorrelations]
+    #
+    # For each marker and horizon, how well the marker predicts the future
+    # return. Returns a dictionary from each (markerName, numDaysInFuture)
+    # to a pair (pearsonCorrelation, spearmanCorrelation).
+    #####################################################
+    def ComputeMarkerCorrelations(self, markerNameList, horizonList):
+        resultDict = {}
+        pairDict = self.GetSynchronizedStatAndFutureReturnColumns(markerNameList, horizonList)
+        for key, (markerValues, futureReturns) in pairDict.items():
+            resultDict[key] = (StockStats.ComputePearsonCorrelation(markerValues, futureReturns), 
+                            StockStats.ComputeSpearmanCorrelation(markerValues, futureReturns))
+        return resultDict
+    # End - ComputeMarkerCorrelations()
+
+
+
 
 
 
@@ -676,10 +912,10 @@ class CStockTicker(object):
         if (fDebug):
             print("GetExponentialMovingAverage. numPrices=" + str(numPrices))
 
-        pastPriceList = self.GetPastPrices(startingFromNDaysBeforeNow, numPrices)
+        pastPriceList = self.GetPastPricesView(startingFromNDaysBeforeNow, numPrices)
         numActualPrices = len(pastPriceList)
         if (fDebug):
-            print("     pastPriceList = " + str(pastPriceList))
+            print("     pastPriceList = " + str(pastPriceList.tolist()))
         if (numActualPrices == 0):
             return 0
 
@@ -729,9 +965,9 @@ class CStockTicker(object):
         if (fDebug):
             print("ComputeRSI. numPrices=" + str(numPrices))
 
-        pastPriceList = self.GetPastPrices(startingFromNDaysBeforeNow, numPrices)
+        pastPriceList = self.GetPastPricesView(startingFromNDaysBeforeNow, numPrices)
         if (fDebug):
-            print("    pastPriceList = " + str(pastPriceList))
+            print("    pastPriceList = " + str(pastPriceList.tolist()))
 
         numPriceChanges = len(pastPriceList) - 1
         percentChangeList = [0] * numPriceChanges
@@ -802,13 +1038,14 @@ class CStockTicker(object):
     def GetStochastic(self, startingFromNDaysBeforeNow):
         fDebug = False
  
-        maxAvailPrices = len(self.PastPriceList) - abs(startingFromNDaysBeforeNow)
-        newestPriceIndex = (len(self.PastPriceList) - 1) - startingFromNDaysBeforeNow
+        closeColumn = self.History.GetColumn('Cl')
+        maxAvailPrices = len(closeColumn) - abs(startingFromNDaysBeforeNow)
+        newestPriceIndex = (len(closeColumn) - 1) - startingFromNDaysBeforeNow
         lowestPriceIn14Days = -1
         highestPriceIn14Days = -1
         lowestPriceIn3Days = -1
         highestPriceIn3Days = -1
-        latestClosingPrice = self.PastPriceList[newestPriceIndex]['Cl']
+        latestClosingPrice = closeColumn[newestPriceIndex]
 
         ##################################
         # Get the highest and lowest price in the past 14 trading days
@@ -822,9 +1059,9 @@ class CStockTicker(object):
             print("    numPrices=" + str(numPrices))
         for index in range(numPrices):
             if (fDebug):
-                print("GetStochastic. Current=" + str(self.PastPriceList[newestPriceIndex - index]))
+                print("GetStochastic. Current=" + str(self.History.GetRow(newestPriceIndex - index)))
 
-            closingPrice = self.PastPriceList[newestPriceIndex - index]['Cl']
+            closingPrice = closeColumn[newestPriceIndex - index]
             if ((lowestPriceIn14Days < 0) or (closingPrice < lowestPriceIn14Days)):
                 lowestPriceIn14Days = closingPrice
             if ((highestPriceIn14Days < 0) or (closingPrice > highestPriceIn14Days)):
@@ -842,9 +1079,9 @@ class CStockTicker(object):
         numPrices = (newestPriceIndex - oldestPriceIndex) + 1
         for index in range(numPrices):
             if (fDebug):
-                print("GetStochastic. Current=" + str(self.PastPriceList[newestPriceIndex - index]))
+                print("GetStochastic. Current=" + str(self.History.GetRow(newestPriceIndex - index)))
 
-            closingPrice = self.PastPriceList[newestPriceIndex - index]['Cl']
+            closingPrice = closeColumn[newestPriceIndex - index]
             if ((lowestPriceIn3Days < 0) or (closingPrice < lowestPriceIn3Days)):
                 lowestPriceIn3Days = closingPrice
             if ((highestPriceIn3Days < 0) or (closingPrice > highestPriceIn3Days)):
@@ -891,16 +1128,17 @@ class CStockTicker(object):
         if (fDebug):
             print("ComputeBiggestRecentDrop. numPrices=" + str(numPrices))
 
-        pastPriceList = self.GetPastPrices(startingFromNDaysBeforeNow, numPrices)
+        pastPriceList = self.GetPastPricesView(startingFromNDaysBeforeNow, numPrices)
         numActualPrices = len(pastPriceList)
         if (fDebug):
-            print("ComputeBiggestRecentDrop. pastPriceList = " + str(pastPriceList))
+            print("ComputeBiggestRecentDrop. pastPriceList = " + str(pastPriceList.tolist()))
             print("ComputeBiggestRecentDrop. numActualPrices = " + str(numActualPrices))
         if (numActualPrices == 0):
             return 0
 
-        newestPriceIndex = (len(self.PastPriceList) - 1) - startingFromNDaysBeforeNow
-        latestClosingPrice = self.PastPriceList[newestPriceIndex]['Cl']
+        closeColumn = self.History.GetColumn('Cl')
+        newestPriceIndex = (len(closeColumn) - 1) - startingFromNDaysBeforeNow
+        latestClosingPrice = closeColumn[newestPriceIndex]
         highestPastPrice = max(pastPriceList)
         if (fDebug):
             print("ComputeBiggestRecentDrop. highestPastPrice=" + str(highestPastPrice))
@@ -930,14 +1168,11 @@ class CStockTicker(object):
     # [CStockTicker::GetDaysWithExtremePrices]
     #
     # The oldest price is index 0, and the latest price is at index numPrices-1
+    # The results are sorted, the most extreme first.
     #####################################################
     def GetDaysWithExtremePrices(self, opCodeStr, numExtremePrices):
         fDebug = False
         fLookForLargestValues = False
-        numPrices = 0
-        priceList = [0] * numExtremePrices
-        priceDateList = [{'y': 0}] * numExtremePrices
-        pricePrevDateList = [{'y': 0}] * numExtremePrices
 
         if (fDebug):
             print("GetDaysWithExtremePrices. opCodeStr=" + opCodeStr)
@@ -958,105 +1193,111 @@ class CStockTicker(object):
         if (opCodeStr in [EXTREMES_MAX_PRICE_CHANGES]):
             fCompareAbsoluteValues = True
 
-
-        ####################
-        # Get the array indexes. Subtract 1 because the indexes are 0-based
-        newestPriceIndex = len(self.PastPriceList) - 1
-        newestPriceIndex = max(0, newestPriceIndex)
-        #oldestPriceIndex = (newestPriceIndex - numPricesToSearch) + 1
-        #oldestPriceIndex = max(0, oldestPriceIndex)
-        oldestPriceIndex = 0
-        # Add 1 because we include both the oldest and newest indexes as result values.
-        numPricesToSearch = (newestPriceIndex - oldestPriceIndex) + 1
-
+        closeColumn = self.History.GetColumn('Cl')
+        numPricesToSearch = len(closeColumn)
         if (fDebug):
-            print("GetDaysWithExtremePrices. List length=" + str(len(self.PastPriceList)))
-            print("     newestPriceIndex=" + str(newestPriceIndex))
-            print("     oldestPriceIndex=" + str(oldestPriceIndex))
-            print("     numExtremePrices=" + str(numExtremePrices))
-            print("     numPricesToSearch=" + str(numPricesToSearch))
+            print("GetDaysWithExtremePrices. List length=" + str(numPricesToSearch))
 
 
         #############################
-        # Look at every available price
-        prevDate = {'y': 0, 'm': 0, 'd': 0}
-        prevPrice = (self.PastPriceList[oldestPriceIndex])['Cl']
+        # Look at every available price. The heap only keeps the numExtremePrices
+        # most extreme values, so this is O(N log numExtremePrices).
+        topKValues = StockStats.CStreamingTopK(numExtremePrices, fLookForLargestValues)
+        if (numPricesToSearch > 0):
+            prevPrice = closeColumn[0]
         for index in range(numPricesToSearch):
             # Search in forward direction, so we can record the previous date.
             # We are looking for peaks and valleys, so it does not matter whether we approach
             # them from the future or the past.
-            # currentPriceInfo = self.PastPriceList[newestPriceIndex - index]
-            currentPriceInfo = self.PastPriceList[oldestPriceIndex + index]
-            currentPrice = currentPriceInfo['Cl']
-            currentDate = {'y': currentPriceInfo['y'], 'm': currentPriceInfo['m'], 'd': currentPriceInfo['d'] }
-
+            currentPrice = closeColumn[index]
             if (fComparePriceChanges):
                 currentValue = (currentPrice - prevPrice)
-            else:  # elif (opCodeStr in (EXTREMES_MAX_PRICE_CHANGES, EXTREMES_MIN_PRICE_CHANGES)):
+            else:
                 currentValue = currentPrice
 
             if (fCompareAbsoluteValues):
                 currentValue = abs(currentValue)
 
-            if (fDebug):
-                print("GetDaysWithExtremePrices. currentValue=" + str(currentValue) + ", currentDate=" + str(currentDate))
-
-            ###################################
-            # Look to see if this is one of the extreme prices
-            if (numPrices < numExtremePrices):
-                if (fDebug):
-                    print("GetDaysWithExtremePrices. numPrices=" + str(numPrices) + ", numExtremePrices=" + str(numExtremePrices))
-                priceList[numPrices] = currentValue
-                priceDateList[numPrices] = currentDate
-                pricePrevDateList[numPrices] = prevDate
-                numPrices += 1
-            ###################################
-            else:
-                bestMatchIndex = -1
-                if (fLookForLargestValues):
-                    bestMatchValue = 100000000
-                else:
-                    bestMatchValue = -100000000                
-
-                for compareIndex in range(numExtremePrices):
-                    compareValue = priceList[compareIndex]
-                    if (fDebug):
-                        print("     Compare currentValue=" + str(currentValue) + ", compareValue=" + str(compareValue))
-
-                    if (fLookForLargestValues):
-                        # Remove the smallest of the large values
-                        if ((currentValue > compareValue) and (compareValue < bestMatchValue)):
-                            bestMatchIndex = compareIndex
-                            bestMatchValue = compareValue
-                        # End - if ((currentValue > compareValue) and (compareValue < bestMatchValue)):
-                    else:   # if (not fLookForLargestValues):
-                        # Remove the largest of the small values
-                        if ((currentValue < compareValue) and (compareValue > bestMatchValue)):
-                            bestMatchIndex = compareIndex
-                            bestMatchValue = compareValue
-                        # End - if ((currentValue > compareValue) and (compareValue < bestMatchValue)):
-                # End - for compareIndex in range(numExtremePrices):
-
-                if (bestMatchIndex >= 0):
-                    if (fDebug):
-                        print("     GetDaysWithExtremePrices found Match. currentValue=" + str(currentValue))
-                    priceList[bestMatchIndex] = currentValue                    
-                    priceDateList[bestMatchIndex] = currentDate
-                    pricePrevDateList[bestMatchIndex] = prevDate
-                # End - if (bestMatchIndex >= 0)
-            # End - We have already found numExtremePrices extremes, now find the most extreme.
-
+            topKValues.Add(currentValue, index)
             prevPrice = currentPrice
-            prevDate = currentDate
         # End - for index in range(numPricesToSearch):
 
+        return self.MakeExtremePricesResult(topKValues.GetSortedList(), numExtremePrices)
+    # End - GetDaysWithExtremePrices()
+
+
+
+    #####################################################
+    #
+    # [CStockTicker::GetAllDaysWithExtremePrices]
+    #
+    # Batch version of GetDaysWithExtremePrices. This answers several
+    # opcodes at once, and shares one price-change column between them.
+    # Returns a dictionary from each opcode to the same tuple that
+    # GetDaysWithExtremePrices returns, sorted the most extreme first.
+    #####################################################
+    def GetAllDaysWithExtremePrices(self, numExtremePrices, opCodeList=None):
+        fDebug = False
+        if (opCodeList is None):
+            opCodeList = [EXTREMES_MAX_PRICES, EXTREMES_MIN_PRICES, EXTREMES_MAX_PRICE_CHANGES,
+                            EXTREMES_MAX_PRICE_INCREASES, EXTREMES_MAX_PRICE_DECLINES]
         if (fDebug):
-            print("GetDaysWithExtremePrices. numPrices=" + str(numPrices) + ", priceList=" + str(priceList))
-            print("     priceDateList=" + str(priceDateList))
-            print("     pricePrevDateList=" + str(pricePrevDateList))
+            print("GetAllDaysWithExtremePrices. opCodeList=" + str(opCodeList))
+
+        closeColumn = self.History.GetColumn('Cl')
+        priceChangeColumn = None
+        resultDict = {}
+        for opCodeStr in opCodeList:
+            if (opCodeStr == EXTREMES_MAX_PRICES):
+                valueColumn = closeColumn
+                fFindLargest = True
+            elif (opCodeStr == EXTREMES_MIN_PRICES):
+                valueColumn = closeColumn
+                fFindLargest = False
+            else:
+                if (priceChangeColumn is None):
+                    priceChangeColumn = StockStats.ComputePriceChangeColumn(closeColumn)
+                valueColumn = priceChangeColumn
+                fFindLargest = (opCodeStr != EXTREMES_MAX_PRICE_DECLINES)
+                if (opCodeStr == EXTREMES_MAX_PRICE_CHANGES):
+                    valueColumn = StockStats.ComputeAbsoluteValueColumn(priceChangeColumn)
+            # End - if (opCodeStr == EXTREMES_MAX_PRICES):
+
+            indexList = StockStats.FindExtremeIndexes(valueColumn, numExtremePrices, fFindLargest)
+            valueIndexList = [(valueColumn[index], index) for index in indexList]
+            resultDict[opCodeStr] = self.MakeExtremePricesResult(valueIndexList, numExtremePrices)
+        # End - for opCodeStr in opCodeList:
+
+        return resultDict
+    # End - GetAllDaysWithExtremePrices()
+
+
+
+    #####################################################
+    #
+    # [CStockTicker::MakeExtremePricesResult]
+    #
+    # valueIndexList is a list of (value, row index). This makes the
+    # date dictionaries only for the days that are returned.
+    #####################################################
+    def MakeExtremePricesResult(self, valueIndexList, numExtremePrices):
+        numPrices = len(valueIndexList)
+        priceList = [0] * numExtremePrices
+        priceDateList = [{'y': 0}] * numExtremePrices
+        pricePrevDateList = [{'y': 0}] * numExtremePrices
+        for resultIndex, (value, rowIndex) in enumerate(valueIndexList):
+            currentYear, currentMonth, currentDay = self.History.GetDate(rowIndex)
+            priceList[resultIndex] = value
+            priceDateList[resultIndex] = {'y': currentYear, 'm': currentMonth, 'd': currentDay}
+            if (rowIndex > 0):
+                prevYear, prevMonth, prevDay = self.History.GetDate(rowIndex - 1)
+                pricePrevDateList[resultIndex] = {'y': prevYear, 'm': prevMonth, 'd': prevDay}
+            else:
+                pricePrevDateList[resultIndex] = {'y': 0, 'm': 0, 'd': 0}
+        # End - for resultIndex, (value, rowIndex) in enumerate(valueIndexList):
 
         return numPrices, priceList, priceDateList, pricePrevDateList
-    # End - GetDaysWithExtremePrices()
+    # End - MakeExtremePricesResult()
 
 
 
@@ -1075,7 +1316,7 @@ class CStockTicker(object):
     #
     #####################################################
     def GotoFirstDate(self):
-        if (len(self.PastPriceList) <= 0):
+        if (len(self.History) <= 0):
             return False
 
         self.IteratorIndex = 0
@@ -1095,19 +1336,12 @@ class CStockTicker(object):
         if (fDebug):
             print("GotoDate. startYear=" + str(startYear) + ", startMonth=" + str(startMonth) + ", startDay=" + str(startDay))
 
-        self.IteratorIndex = len(self.PastPriceList) - 1
-        while (self.IteratorIndex >= 0):
-            priceInfo = self.PastPriceList[self.IteratorIndex]
+        # The dates are stored as ordinal days in date order, so this is a binary search.
+        self.IteratorIndex = self.History.FindDateIndex(startYear, startMonth, startDay)
+        if (self.IteratorIndex >= 0):
             if (fDebug):
-                print("     priceInfo=" + str(priceInfo))
-            if (CompareDates(DATE_COMPARE_GREATER_THAN_EQUAL, startYear, startMonth, startDay, priceInfo['y'], priceInfo['m'], priceInfo['d'])):
-                if (fDebug):
-                    print("     Found Matching Date")
-                fFoundDate = True
-                break
-
-            self.IteratorIndex = self.IteratorIndex - 1
-        # End - while (self.IteratorIndex >= 0):
+                print("     Found Matching Date. priceInfo=" + str(self.History.GetRow(self.IteratorIndex)))
+            fFoundDate = True
 
         if (self.IteratorIndex < 0):
             self.IteratorIndex = 0
@@ -1117,6 +1351,20 @@ class CStockTicker(object):
 
 
 
+    #####################################################
+    #
+    # [CStockTicker::GetRange]
+    #
+    # Returns the days from startDate to endDate, including both ends, as a
+    # PriceHistory.CPriceHistoryRange. The dates are (year, month, day) tuples.
+    # The columns of the range are views into the history, not copies.
+    #####################################################
+    def GetRange(self, startDate, endDate):
+        return self.History.GetRange(startDate, endDate)
+    # End of GetRange
+
+
+
     #####################################################
     #
     # [CStockTicker::GotoNextDate]
@@ -1127,7 +1375,7 @@ class CStockTicker(object):
         if (fDebug):
             print("GotoNextDate")
 
-        if (self.IteratorIndex >= (len(self.PastPriceList) - 1)):
+        if (self.IteratorIndex >= (len(self.History) - 1)):
             return False
 
         self.IteratorIndex += 1
@@ -1148,14 +1396,16 @@ class CStockTicker(object):
         if (fDebug):
             print("GetIteratorCurrentPriceInfo")
 
-        if ((self.IteratorIndex < 0) or (self.IteratorIndex == len(self.PastPriceList))):
+        if ((self.IteratorIndex < 0) or (self.IteratorIndex == len(self.History))):
             return False, 0, 0, 0, 0, 0, 0, 0, 0, 0
 
-        priceInfo = self.PastPriceList[self.IteratorIndex]
+        index = self.IteratorIndex
+        history = self.History
         if (fDebug):
-            print("GetIteratorCurrentPriceInfo. priceInfo=" + str(priceInfo))
+            print("GetIteratorCurrentPriceInfo. priceInfo=" + str(history.GetRow(index)))
 
-        return True, priceInfo['y'], priceInfo['m'], priceInfo['d'], priceInfo['Cl'], priceInfo['Op'], priceInfo['Lo'], priceInfo['Hi'], priceInfo['Vo'], priceInfo['RSI']
+        year, month, day = history.GetDate(index)
+        return True, year, month, day, history.GetColumn('Cl')[index], history.GetColumn('Op')[index], history.GetColumn('Lo')[index], history.GetColumn('Hi')[index], history.GetColumn('Vo')[index], history.GetColumn('RSI')[index]
     # End of GetIteratorCurrentPriceInfo
 
 
@@ -1171,16 +1421,17 @@ class CStockTicker(object):
         if (fDebug):
             print("GetIteratorCurrentPriceInfo")
 
-        if ((self.IteratorIndex < 0) or (self.IteratorIndex == len(self.PastPriceList))):
+        if ((self.IteratorIndex < 0) or (self.IteratorIndex == len(self.History))):
             return False, 0, 0, 0, 0, 0, 0, 0, 0, 0
 
-        priceInfo = self.PastPriceList[self.IteratorIndex]
-        if (self.IteratorIndex <= 0):
+        index = self.IteratorIndex
+        history = self.History
+        if (index <= 0):
             prevPrice = 0
         else:
-            prevPrice = self.PastPriceList[self.IteratorIndex - 1]['Cl']
+            prevPrice = history.GetColumn('Cl')[index - 1]
 
-        return True, prevPrice, priceInfo['EMA12'], priceInfo['EMA26'], priceInfo['MACD'], priceInfo['KStochastic'], priceInfo['DStochastic'], priceInfo['BiggestRecentDropPercent']
+        return True, prevPrice, history.GetColumn('EMA12')[index], history.GetColumn('EMA26')[index], history.GetColumn('MACD')[index], history.GetColumn('KStochastic')[index], history.GetColumn('DStochastic')[index], history.GetColumn('BiggestRecentDropPercent')[index]
     # End of GetIteratorExtendedCurrentPriceInfo
 
 
@@ -1211,7 +1462,14 @@ class CStockTicker(object):
 
 ################################################################################
 # 
+# The keys of the value dictionaries used by LoadTickerFromValueDict, and
+# the history column each one is loaded into.
 ################################################################################
+g_ValueDictKeyToColumnName = {'op': 'Op', 'cl': 'Cl', 'vo': 'Vo', 'hi': 'Hi', 'lo': 'Lo',
+                            'rsi': 'RSI', 'ema12': 'EMA12', 'ema26': 'EMA26', 'macd': 'MACD',
+                            'kStochastic': 'KStochastic', 'dStochastic': 'DStochastic',
+                            'drop': 'BiggestRecentDropPercent'}
+
 def LoadTickerFromValueDict(tickerSymbol, valueDictList, firstYear):
     fDebug = False
     if (fDebug):
@@ -1243,6 +1501,11 @@ def LoadTickerFromValueDict(tickerSymbol, valueDictList, firstYear):
 
     #######################
     # Set all past info
+    # Collect each field into its own list, then load the history a whole column at a time.
+    dateOrdinalList = []
+    columnDict = {}
+    for columnName in g_ValueDictKeyToColumnName.values():
+        columnDict[columnName] = []
     for valueDict in valueDictList:
         if ((valueDict['y'] == latestDictEntry['y']) and (valueDict['m'] == latestDictEntry['m']) and (valueDict['d'] == latestDictEntry['d'])):
             break
@@ -1251,13 +1514,12 @@ def LoadTickerFromValueDict(tickerSymbol, valueDictList, firstYear):
         if ((firstYear > 0) and (valueDict['y'] < firstYear)):
             continue
 
-        stockTicker.SetPastValues(valueDict['y'], valueDict['m'], valueDict['d'], 
-                                valueDict['op'], valueDict['cl'], valueDict['vo'], 
-                                valueDict['hi'], valueDict['lo'],
-                                valueDict['rsi'], valueDict['ema12'], valueDict['ema26'],
-                                valueDict['macd'], valueDict['kStochastic'], valueDict['dStochastic'],
-                                valueDict['drop'])
-    # for row in hist.itertuples():
+        dateOrdinalList.append(PriceHistory.MakeDateOrdinal(valueDict['y'], valueDict['m'], valueDict['d']))
+        for keyName, columnName in g_ValueDictKeyToColumnName.items():
+            columnDict[columnName].append(valueDict[keyName])
+    # for valueDict in valueDictList:
+
+    stockTicker.SetPastValueColumns(dateOrdinalList, columnDict)
 
     return stockTicker
 # End - LoadTickerFromValueDict
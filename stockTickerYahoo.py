@@ -28,10 +28,17 @@
 #
 ################################################################################
 import sys
-from datetime import datetime
-
-# Yahoo Finance
-import yfinance as yf
+import asyncio
+from array import array
+from datetime import datetime, date
+from concurrent.futures import ThreadPoolExecutor
+
+# Yahoo Finance. This is only needed when no yahooClient is given, so the
+# loaders can be run against a local stand-in without it.
+try:
+    import yfinance as yf
+except ImportError:
+    yf = None
 
 g_libDirPath = "/home/ddean/ddRoot/lib"
 # Allow import to pull from the per-user lib directory.
@@ -41,10 +48,47 @@ g_libDirPath = "/home/ddean/ddRoot/lib"
 
 YAHOO_FINANCE = "yahoo"
 
+# How many times a ticker is requested before it is given up
+MAX_LOAD_ATTEMPTS = 5
+
+# RefreshHistoryFromYahoo always replaces this many of the newest stored days.
+REFRESH_NUM_REPLACED_DAYS = 1
+# The largest relative change in the close of the overlap day that is not a revision.
+REFRESH_CLOSE_TOLERANCE = 1e-6
+
+# datetime64 day numbers count from 1970-01-01, and date ordinals count from 0001-01-01
+UNIX_EPOCH_DATE_ORDINAL = date(1970, 1, 1).toordinal()
+
 import stockTicker as StockTicker
+import priceHistory as PriceHistory
+import tickerInfoCache as TickerInfoCache
+import pipelineMetrics as PipelineMetrics
+
+# The metrics counter for each place the ticker info can come from
+g_InfoSourceCounterDict = {TickerInfoCache.INFO_SOURCE_CACHE: PipelineMetrics.COUNTER_CACHE_HITS,
+                            TickerInfoCache.INFO_SOURCE_QUOTE: PipelineMetrics.COUNTER_CACHE_QUOTE_HITS,
+                            TickerInfoCache.INFO_SOURCE_REMOTE: PipelineMetrics.COUNTER_CACHE_MISSES}
+
+
+
 
 
 
+################################################################################
+#
+# [GetYahooClient]
+#
+# yahooClient if it is given, or else the yfinance module.
+################################################################################
+def GetYahooClient(yahooClient):
+    if (yahooClient is not None):
+        return yahooClient
+    if (yf is None):
+        raise ImportError("stockTickerYahoo needs the yfinance package, or a yahooClient")
+    return yf
+# End - GetYahooClient
+
+
 
 
 
@@ -53,20 +97,47 @@ import stockTicker as StockTicker
 # [LoadTickerFromYahoo]
 #
 # Load a single ticker. All yahoo-specific dependencies should be encapsulated here.
+#
+# yahooClient is the yfinance module by default. Anything with a
+# Ticker(symbol) call that returns an object with .info and .history(period=...)
+# can be used instead, for example a local stand-in for testing.
+#
+# historyColumns is the (dateOrdinalList, columnDict) history of this ticker if
+# it was already downloaded, see DownloadHistoriesFromYahoo. If it is None, then
+# this requests the history of this one ticker.
+#
+# infoCache is an optional tickerInfoCache.CTickerInfoCache. If it is given, the
+# ticker info is read through it instead of always requesting remoteTicker.info.
+#
+# metrics is an optional pipelineMetrics.CPipelineMetrics, which records the
+# time of each stage of this load under the symbol of the ticker.
 ################################################################################
-def LoadTickerFromYahoo(stockTicker):
+def LoadTickerFromYahoo(stockTicker, yahooClient=None, historyColumns=None, infoCache=None, metrics=None):
     fDebug = False
     fSuccess = False
     fRetry = False
     if (fDebug):
         print("CYahooTicker.Load")
 
-    remoteTicker = yf.Ticker(stockTicker.GetStockSymbol())
+    yahooClient = GetYahooClient(yahooClient)
+    if (metrics is None):
+        metrics = PipelineMetrics.g_DisabledMetrics
+    tickerSymbol = stockTicker.GetStockSymbol()
+    remoteTicker = yahooClient.Ticker(tickerSymbol)
     if (remoteTicker is None):
-        print("LoadTickerFromYahoo. remoteTicker is None. Symbol=" + stockTicker.GetStockSymbol())
+        print("LoadTickerFromYahoo. remoteTicker is None. Symbol=" + tickerSymbol)
         fRetry = True
         return fSuccess, fRetry            
-    tickerInfo = remoteTicker.info
+    with metrics.Timer(PipelineMetrics.STAGE_INFO, tickerSymbol):
+        if (infoCache is None):
+            tickerInfo = remoteTicker.info
+        else:
+            tickerInfo, infoSource = infoCache.GetTickerInfoAndSource(tickerSymbol, 
+                                                lambda: remoteTicker.info, 
+                                                lambda: GetQuoteInfoFromYahoo(remoteTicker),
+                                                list(g_FastInfoKeyDict.keys()))
+            metrics.AddCount(g_InfoSourceCounterDict[infoSource], 1, tickerSymbol)
+    # End - with metrics.Timer(PipelineMetrics.STAGE_INFO, tickerSymbol):
     if (tickerInfo is None):
         print("LoadTickerFromYahoo. tickerInfo is None. Symbol=" + stockTicker.GetStockSymbol())
         fRetry = True
@@ -170,30 +241,24 @@ def LoadTickerFromYahoo(stockTicker):
         stockTicker.SetPEGRatio(0)
 
     #######################
-    # Get historical market data. This returns a pandas.core.frame.DataFrame
-    # This must be one of ['1d', '5d', '1mo', '3mo', 'ytd', 'max']
-    hist = remoteTicker.history(period="max")
-    # Each row is a pandas.core.frame.Pandas
-    for row in hist.itertuples():
-        currentTimeStamp = row[0]
-        currentOpen = row[1]
-        currentHigh = row[2]
-        currentLow = row[3]
-        currentClose = row[4]
-        currentVolume = row[5]
-
-        # The timestamp is a pandas._libs.tslibs.timestamps.Timestamp
-        dateTime = currentTimeStamp.to_pydatetime()
-        dateTimeDate = dateTime.date()
-
-        if (fDebug):
-            print("CYahooTicker.Load. row=" + str(row))
-            print("dateTimeDate.year=" + str(dateTimeDate.year))
-
-        stockTicker.SetPastValues(dateTimeDate.year, dateTimeDate.month, dateTimeDate.day, 
-                                currentOpen, currentClose, currentVolume, 
-                                currentHigh, currentLow, 0, 0, 0, 0, 0, 0, 0)
-    # for row in hist.itertuples():
+    # The history may have been downloaded along with other tickers.
+    if (historyColumns is not None):
+        dateOrdinalList, columnDict = historyColumns
+        with metrics.Timer(PipelineMetrics.STAGE_INGEST, tickerSymbol):
+            stockTicker.SetPastValueColumns(dateOrdinalList, columnDict)
+    else:
+        # Get historical market data. This returns a pandas.core.frame.DataFrame
+        # This must be one of ['1d', '5d', '1mo', '3mo', 'ytd', 'max']
+        with metrics.Timer(PipelineMetrics.STAGE_HISTORY, tickerSymbol):
+            hist = remoteTicker.history(period="max")
+        metrics.AddCount(PipelineMetrics.COUNTER_BYTES_FETCHED, GetDataFrameNumBytes(hist), tickerSymbol)
+        with metrics.Timer(PipelineMetrics.STAGE_INGEST, tickerSymbol):
+            dateOrdinalList, columnDict = MakeHistoryColumnsFromDataFrame(hist)
+            if (fDebug):
+                print("LoadTickerFromYahoo. Loaded " + str(len(dateOrdinalList)) + " days")
+            stockTicker.SetPastValueColumns(dateOrdinalList, columnDict)
+    # End - if (historyColumns is not None):
+    metrics.AddCount(PipelineMetrics.COUNTER_ROWS_INGESTED, len(dateOrdinalList), tickerSymbol)
 
 
     #######################
@@ -279,70 +344,653 @@ def LoadTickerFromYahoo(stockTicker):
 
 
 
+################################################################################
+#
+# [GetQuoteInfoFromYahoo]
+#
+# Get today's prices with Ticker.fast_info, which is much cheaper than Ticker.info.
+# The result uses the same keys as Ticker.info, or is None if any of the
+# prices are not available. fast_info has no bid or ask, so those are left out,
+# and a CTickerInfoCache whose quote group has the bid and ask does a full info
+# request instead.
+################################################################################
+# Ticker.info key -> Ticker.fast_info key
+g_FastInfoKeyDict = {'currentPrice': 'lastPrice', 'regularMarketOpen': 'open', 
+                    'previousClose': 'previousClose', 'open': 'open', 
+                    'dayLow': 'dayLow', 'dayHigh': 'dayHigh', 'volume': 'lastVolume'}
+
+def GetQuoteInfoFromYahoo(remoteTicker):
+    quoteInfo = {}
+    try:
+        fastInfo = remoteTicker.fast_info
+        for infoKey, fastInfoKey in g_FastInfoKeyDict.items():
+            value = fastInfo[fastInfoKey]
+            if (value is None):
+                return None
+            quoteInfo[infoKey] = value
+        # End - for infoKey, fastInfoKey in g_FastInfoKeyDict.items():
+    except Exception:
+        return None
+
+    return quoteInfo
+# End - GetQuoteInfoFromYahoo
+
+
+
+
+
+################################################################################
+#
+# [MakeHistoryColumnsFromDataFrame]
+#
+# hist is the price history of one ticker, a DataFrame with a date index and
+# Open, High, Low, Close and Volume columns. This returns the
+# (dateOrdinalList, columnDict) that CStockTicker.SetPastValueColumns takes,
+# as arrays that are copied from the DataFrame a whole column at a time.
+# Days without a close price are skipped.
+################################################################################
+def MakeHistoryColumnsFromDataFrame(hist):
+    hist = hist[['Open', 'High', 'Low', 'Close', 'Volume']].dropna(subset=['Close'])
+
+    # Convert the whole date index at once. The dates are the local dates of the
+    # exchange, so drop the timezone without converting to UTC.
+    dateIndex = hist.index
+    if (getattr(dateIndex, 'tz', None) is not None):
+        dateIndex = dateIndex.tz_localize(None)
+    dayNumbers = dateIndex.values.astype('datetime64[D]').astype('int64') + UNIX_EPOCH_DATE_ORDINAL
+    dateOrdinalList = array(PriceHistory.DATE_COLUMN_TYPECODE)
+    dateOrdinalList.frombytes(dayNumbers.astype('int32').tobytes())
+
+    columnDict = {}
+    for columnName, frameColumnName in (('Op', 'Open'), ('Hi', 'High'), ('Lo', 'Low'), ('Cl', 'Close'), ('Vo', 'Volume')):
+        newColumn = array(PriceHistory.VALUE_COLUMN_TYPECODE)
+        newColumn.frombytes(hist[frameColumnName].to_numpy(dtype='float64').tobytes())
+        columnDict[columnName] = newColumn
+    # End - for columnName, frameColumnName in ...
+
+    return dateOrdinalList, columnDict
+# End - MakeHistoryColumnsFromDataFrame
+
+
+
+
+
+################################################################################
+#
+# [GetDataFrameNumBytes]
+#
+# The memory size of a DataFrame. yfinance does not report how many bytes it
+# downloaded, so this is what the metrics count as the bytes fetched.
+################################################################################
+def GetDataFrameNumBytes(dataFrame):
+    if (dataFrame is None):
+        return 0
+    try:
+        return int(dataFrame.memory_usage(index=True).sum())
+    except Exception:
+        return 0
+# End - GetDataFrameNumBytes
+
+
+
+
+
+################################################################################
+#
+# [DownloadHistoriesFromYahoo]
+#
+# Download the price history of many tickers with one request per chunk of
+# chunkSize symbols, instead of one request per symbol.
+# Returns a dictionary from each symbol to its (dateOrdinalList, columnDict).
+# Symbols that are not in the result, for example because their part of the
+# download failed, are left out, so the caller can load them one at a time.
+################################################################################
+def DownloadHistoriesFromYahoo(symbolList, chunkSize=100, yahooClient=None, metrics=None):
+    fDebug = False
+    yahooClient = GetYahooClient(yahooClient)
+    if (metrics is None):
+        metrics = PipelineMetrics.g_DisabledMetrics
+
+    historyDict = {}
+    for chunkStart in range(0, len(symbolList), chunkSize):
+        chunkSymbolList = symbolList[chunkStart:chunkStart + chunkSize]
+        if (fDebug):
+            print("DownloadHistoriesFromYahoo. chunkSymbolList=" + str(chunkSymbolList))
+
+        # This returns one wide DataFrame, with (symbol, field) columns.
+        # Use the same adjusted prices that Ticker.history() returns.
+        try:
+            with metrics.Timer(PipelineMetrics.STAGE_BULK_HISTORY):
+                wideFrame = yahooClient.download(chunkSymbolList, period="max", group_by="ticker", 
+                                                auto_adjust=True, actions=False, threads=True, progress=False)
+        except Exception:
+            print("DownloadHistoriesFromYahoo. Download raised an exception. Symbols=" + str(chunkSymbolList))
+            continue
+        if ((wideFrame is None) or (wideFrame.empty)):
+            continue
+        metrics.AddCount(PipelineMetrics.COUNTER_BYTES_FETCHED, GetDataFrameNumBytes(wideFrame))
+
+        fHasSymbolLevel = (wideFrame.columns.nlevels > 1)
+        for tickerSymbol in chunkSymbolList:
+            if (fHasSymbolLevel):
+                if (tickerSymbol not in wideFrame.columns.get_level_values(0)):
+                    continue
+                tickerFrame = wideFrame[tickerSymbol]
+            elif (len(chunkSymbolList) == 1):
+                # Some versions of yfinance do not add the symbol level for a single symbol
+                tickerFrame = wideFrame
+            else:
+                continue
+
+            dateOrdinalList, columnDict = MakeHistoryColumnsFromDataFrame(tickerFrame)
+            if (len(dateOrdinalList) > 0):
+                historyDict[tickerSymbol] = (dateOrdinalList, columnDict)
+        # End - for tickerSymbol in chunkSymbolList:
+    # End - for chunkStart in range(0, len(symbolList), chunkSize):
+
+    return historyDict
+# End - DownloadHistoriesFromYahoo
+
+
+
+
+
+################################################################################
+#
+# [RefreshHistoryFromYahoo]
+#
+# Bring the price history of a loaded ticker up to date by requesting only
+# the days after the newest stored day, instead of the whole history.
+#
+# The newest stored day may have been loaded before the market closed, so it
+# is always requested again and replaced. The day before it is the overlap day,
+# and it is requested too. If its close changed, then the history was
+# adjusted (for example for a split or a dividend), so the whole history is
+# loaded again and every stat is recomputed.
+#
+# An empty response, or one that has only the overlap day, means there are no
+# new days yet (for example over a weekend or a holiday, or before the day's bar
+# is published), so the history is left as it is. Only a response
+# that is missing the overlap day, or that changed its close, causes a reload.
+#
+# Returns fSuccess, fReloaded, numNewDays
+################################################################################
+def RefreshHistoryFromYahoo(stockTicker, yahooClient=None):
+    fDebug = False
+    fSuccess = False
+    fReloaded = False
+    numNewDays = 0
+    tickerSymbol = stockTicker.GetStockSymbol()
+    yahooClient = GetYahooClient(yahooClient)
+
+    remoteTicker = yahooClient.Ticker(tickerSymbol)
+    if (remoteTicker is None):
+        print("RefreshHistoryFromYahoo. remoteTicker is None. Symbol=" + tickerSymbol)
+        return fSuccess, fReloaded, numNewDays
+
+    numPastPrices = len(stockTicker.History)
+    overlapIndex = numPastPrices - 1 - REFRESH_NUM_REPLACED_DAYS
+    if (overlapIndex >= 0):
+        overlapYear, overlapMonth, overlapDay = stockTicker.History.GetDate(overlapIndex)
+        startDateStr = "%04d-%02d-%02d" % (overlapYear, overlapMonth, overlapDay)
+        hist = remoteTicker.history(start=startDateStr)
+        dateOrdinalList, columnDict = MakeHistoryColumnsFromDataFrame(hist)
+        if (len(dateOrdinalList) <= 0):
+            if (fDebug):
+                print("RefreshHistoryFromYahoo. No new days. Symbol=" + tickerSymbol)
+            fSuccess = True
+            return fSuccess, fReloaded, numNewDays
+
+        # Check the overlap day
+        fOverlapMatches = False
+        if (dateOrdinalList[0] == stockTicker.History.GetDateColumn()[overlapIndex]):
+            storedClose = stockTicker.History.GetColumn('Cl')[overlapIndex]
+            newClose = columnDict['Cl'][0]
+            fOverlapMatches = (abs(newClose - storedClose) <= (REFRESH_CLOSE_TOLERANCE * max(abs(storedClose), 1.0)))
+        if (fDebug):
+            print("RefreshHistoryFromYahoo. Symbol=" + tickerSymbol + ", fOverlapMatches=" + str(fOverlapMatches))
+
+        if (fOverlapMatches):
+            # The newest day has not been published again yet, so keep the stored one.
+            if (len(dateOrdinalList) <= REFRESH_NUM_REPLACED_DAYS):
+                fSuccess = True
+                return fSuccess, fReloaded, numNewDays
+
+            stockTicker.RemoveNewestDays(REFRESH_NUM_REPLACED_DAYS)
+            for index in range(1, len(dateOrdinalList)):
+                year, month, day = PriceHistory.GetDateFromOrdinal(dateOrdinalList[index])
+                stockTicker.AppendDay(year, month, day, 
+                                    columnDict['Op'][index], columnDict['Cl'][index], columnDict['Vo'][index], 
+                                    columnDict['Hi'][index], columnDict['Lo'][index])
+            # End - for index in range(1, len(dateOrdinalList)):
+
+            fSuccess = True
+            numNewDays = len(stockTicker.History) - numPastPrices
+            return fSuccess, fReloaded, numNewDays
+        # End - if (fOverlapMatches):
+    # End - if (overlapIndex >= 0):
+
+    #######################
+    # There is not enough history to check, or it was revised. Load all of it.
+    print("RefreshHistoryFromYahoo. Reload the entire history. Symbol=" + tickerSymbol)
+    hist = remoteTicker.history(period="max")
+    dateOrdinalList, columnDict = MakeHistoryColumnsFromDataFrame(hist)
+    if (len(dateOrdinalList) <= 0):
+        return fSuccess, fReloaded, numNewDays
+
+    stockTicker.ReplacePastValueColumns(dateOrdinalList, columnDict)
+    stockTicker.ComputeAllStats(StockTicker.STATS_ENGINE_COLUMNAR)
+
+    fSuccess = True
+    fReloaded = True
+    numNewDays = len(stockTicker.History) - numPastPrices
+    return fSuccess, fReloaded, numNewDays
+# End - RefreshHistoryFromYahoo
+
+
+
+
+
+################################################################################
+#
+# [RefreshTickersFromYahoo]
+#
+# Call RefreshHistoryFromYahoo on every ticker in stockTickerDict.
+# A ticker that fails is left unchanged.
+################################################################################
+def RefreshTickersFromYahoo(stockTickerDict, yahooClient=None):
+    fDebug = True
+    numTickersReloaded = 0
+    numNewDays = 0
+
+    for tickerSymbol, stockTicker in stockTickerDict.items():
+        if (stockTicker is None):
+            continue
+        try:
+            fSuccess, fReloaded, numTickerNewDays = RefreshHistoryFromYahoo(stockTicker, yahooClient)
+        except Exception:
+            print("Error. RefreshHistoryFromYahoo raised an exception! Symbol=" + tickerSymbol)
+            continue
+        if (not fSuccess):
+            print("Error. Cannot refresh ticker: " + tickerSymbol)
+            continue
+
+        if (fReloaded):
+            numTickersReloaded += 1
+        numNewDays += numTickerNewDays
+    # End - for tickerSymbol, stockTicker in stockTickerDict.items():
+
+    if (fDebug):
+        print("RefreshTickersFromYahoo. numNewDays=" + str(numNewDays) 
+                + ", numTickersReloaded=" + str(numTickersReloaded))
+    return stockTickerDict
+# End - RefreshTickersFromYahoo
+
+
+
+
+
 #####################################################################################
 #
-# [OpenTickersForStocks]
+# [LoadTickerWithRetries]
 #
+# Make a new ticker and load all information about it, retrying a few times.
+# Returns the ticker with its stats computed by statsEngineName (see
+# CStockTicker.ComputeAllStats), or None if it cannot be loaded.
 #####################################################################################
-def OpenTickersForStocks(tickerSourceName, stockNameList, stockTickerDict):
-    fDebug = True
+def LoadTickerWithRetries(tickerSourceName, tickerSymbol, yahooClient=None, historyColumns=None, infoCache=None,
+                        metrics=None, statsEngineName=StockTicker.STATS_ENGINE_COLUMNAR):
+    if (metrics is None):
+        metrics = PipelineMetrics.g_DisabledMetrics
+    with metrics.Timer(PipelineMetrics.STAGE_LOAD_TICKER, tickerSymbol):
+        return LoadTickerWithRetriesImpl(tickerSourceName, tickerSymbol, yahooClient, historyColumns, infoCache, metrics,
+                                        statsEngineName)
+# End - LoadTickerWithRetries
 
-    tickerSourceName = tickerSourceName.lower()
+
+
+
+
+#####################################################################################
+#
+# [LoadTickerWithRetriesImpl]
+#
+# The body of LoadTickerWithRetries, so the whole load is inside one timer.
+#####################################################################################
+def LoadTickerWithRetriesImpl(tickerSourceName, tickerSymbol, yahooClient, historyColumns, infoCache, metrics,
+                            statsEngineName):
+    # Make a new empty ticker
+    currentTicker = StockTicker.CStockTicker(tickerSymbol)
+
+    ###############################################
+    # Now, load all information about this ticker
+    attemptNum = 1
+    maxAttempts = MAX_LOAD_ATTEMPTS
+    fSuccess = False
+    fRetry = False
+    while (attemptNum <= maxAttempts):
+        try:    
+            if (tickerSourceName == YAHOO_FINANCE):
+                fSuccess, fRetry = LoadTickerFromYahoo(currentTicker, yahooClient, historyColumns, infoCache, metrics)
+            else:
+                #print("OpenTickersForStocks. Unrecognized Loader: " + tickerSourceName)
+                attemptNum += 1
+                continue
+        except Exception:
+            print("Error. LoadTickerFromYahoo raised an exception!")
+            print("  fSuccess = " + str(fSuccess))
+            print("  attemptNum = " + str(attemptNum))
+            attemptNum += 1
+            continue
+        # End try/except
+
+        # We succeeded, or if there is no point to retrying, then stop trying
+        if ((fSuccess) or (not fRetry)):
+            break
+        attemptNum += 1
+    # End - while (attemptNum <= maxAttempts):
+
+    if ((not fSuccess) or (attemptNum > maxAttempts)):
+        print("Error. Cannot find ticker: " + tickerSymbol)
+        print("  fSuccess = " + str(fSuccess))
+        print("  attemptNum = " + str(attemptNum))
+        print("  maxAttempts = " + str(maxAttempts))
+        metrics.AddCount(PipelineMetrics.COUNTER_RETRIES, min(attemptNum, maxAttempts) - 1, tickerSymbol)
+        metrics.AddCount(PipelineMetrics.COUNTER_FAILURES, 1, tickerSymbol)
+        return None
+    metrics.AddCount(PipelineMetrics.COUNTER_RETRIES, attemptNum - 1, tickerSymbol)
+
+    return ComputeTickerStats(currentTicker, metrics, statsEngineName)
+# End - LoadTickerWithRetriesImpl
+
+
+
+
+
+#####################################################################################
+#
+# [SaveTickerInfoCache]
+#
+# Report the cache hits and misses of this load, and save the cache.
+#####################################################################################
+def SaveTickerInfoCache(infoCache, fPrintStats):
+    if (infoCache is None):
+        return
+    if (fPrintStats):
+        infoCache.PrintStats()
+    infoCache.Save()
+# End - SaveTickerInfoCache
+
+
+
+
+
+#####################################################################################
+#
+# [GetSymbolsToLoad]
+#
+# We may combine several lists so avoid duplicates, and skip the
+# tickers that are already in stockTickerDict.
+#####################################################################################
+def GetSymbolsToLoad(stockNameList, stockTickerDict):
+    symbolsToLoadList = []
     for tickerSymbol in stockNameList:
         #tickerSymbol = tickerSymbol.lower()
-        if (fDebug):
-            print("Allocate ticker for " + tickerSymbol)
-
-        # We may combine several lists so avoid duplicates
         if ((stockTickerDict is not None) 
                 and (tickerSymbol in stockTickerDict) 
                 and (stockTickerDict[tickerSymbol] is not None)):
             continue
+        if (tickerSymbol in symbolsToLoadList):
+            continue
+        symbolsToLoadList.append(tickerSymbol)
+    # End - for tickerSymbol in stockNameList:
 
-        # Make a new empty ticker
-        currentTicker = StockTicker.CStockTicker(tickerSymbol)
+    return symbolsToLoadList
+# End - GetSymbolsToLoad
 
-        ###############################################
-        # Now, load all information about this ticker
-        attemptNum = 1
-        maxAttempts = 5
-        fSuccess = False
-        fRetry = False
-        while (attemptNum <= maxAttempts):
-            try:    
-                if (tickerSourceName == YAHOO_FINANCE):
-                    fSuccess, fRetry = LoadTickerFromYahoo(currentTicker)
-                else:
-                    #print("OpenTickersForStocks. Unrecognized Loader: " + tickerSourceName)
-                    attemptNum += 1
-                    continue
-            except Exception:
-                print("Error. LoadTickerFromYahoo raised an exception!")
-                print("  fSuccess = " + str(fSuccess))
-                print("  attemptNum = " + str(attemptNum))
-                attemptNum += 1
-                continue
-            # End try/except
 
-            # We succeeded, or if there is no point to retrying, then stop trying
-            if ((fSuccess) or (not fRetry)):
-                break
-        # End - while (attemptNum <= maxAttempts):
 
-        if ((not fSuccess) or (attemptNum > maxAttempts)):
-            currentTicker = None
-            print("Error. Cannot find ticker: " + tickerSymbol)
+
+
+#####################################################################################
+#
+# [OpenTickersForStocks]
+#
+# numWorkers is the number of tickers that are loaded at the same time.
+# With more than 1 worker, the network requests for different tickers overlap.
+# Either way, each ticker is retried on its own, and the tickers are added to
+# stockTickerDict in the order of stockNameList.
+#
+# If fBulkHistory is True, the price histories are first downloaded together,
+# bulkChunkSize symbols per request. Only the symbols missing from that
+# download request their own history.
+#
+# infoCache is an optional tickerInfoCache.CTickerInfoCache. It is saved
+# after all tickers are loaded.
+#
+# metrics is an optional pipelineMetrics.CPipelineMetrics, see LoadTickerFromYahoo.
+#
+# statsEngineName is passed to CStockTicker.ComputeAllStats. The default computes
+# every stat while loading. STATS_ENGINE_LAZY computes each stat column when it
+# is first read, which is cheaper for a caller that only reads a few stats.
+#####################################################################################
+def OpenTickersForStocks(tickerSourceName, stockNameList, stockTickerDict, numWorkers=1, yahooClient=None,
+                        fBulkHistory=False, bulkChunkSize=100, infoCache=None, metrics=None,
+                        statsEngineName=StockTicker.STATS_ENGINE_COLUMNAR):
+    fDebug = True
+
+    tickerSourceName = tickerSourceName.lower()
+    symbolsToLoadList = GetSymbolsToLoad(stockNameList, stockTickerDict)
+
+    historyDict = {}
+    if ((fBulkHistory) and (tickerSourceName == YAHOO_FINANCE)):
+        historyDict = DownloadHistoriesFromYahoo(symbolsToLoadList, bulkChunkSize, yahooClient, metrics)
+        if (fDebug):
+            print("Downloaded " + str(len(historyDict)) + " of " + str(len(symbolsToLoadList)) + " histories in bulk")
+
+    ###############################################
+    if (numWorkers <= 1):
+        for tickerSymbol in symbolsToLoadList:
+            if (fDebug):
+                print("Allocate ticker for " + tickerSymbol)
+            currentTicker = LoadTickerWithRetries(tickerSourceName, tickerSymbol, yahooClient, 
+                                                historyDict.get(tickerSymbol), infoCache, metrics, statsEngineName)
+            if ((currentTicker is not None) and (stockTickerDict is not None)):
+                stockTickerDict[tickerSymbol] = currentTicker
+        # End - for tickerSymbol in symbolsToLoadList:
+
+        SaveTickerInfoCache(infoCache, fDebug)
+        return stockTickerDict
+    # End - if (numWorkers <= 1):
+
+    ###############################################
+    # Load several tickers at once. Most of the time is spent waiting on the network.
+    with ThreadPoolExecutor(max_workers=numWorkers) as executor:
+        futureList = []
+        for tickerSymbol in symbolsToLoadList:
+            if (fDebug):
+                print("Allocate ticker for " + tickerSymbol)
+            futureList.append((tickerSymbol, executor.submit(LoadTickerWithRetries, tickerSourceName, tickerSymbol, 
+                                                            yahooClient, historyDict.get(tickerSymbol), infoCache,
+                                                            metrics, statsEngineName)))
+
+        for tickerSymbol, future in futureList:
+            currentTicker = future.result()
+            if ((currentTicker is not None) and (stockTickerDict is not None)):
+                stockTickerDict[tickerSymbol] = currentTicker
+        # End - for tickerSymbol, future in futureList:
+    # End - with ThreadPoolExecutor(max_workers=numWorkers) as executor:
+
+    SaveTickerInfoCache(infoCache, fDebug)
+    return stockTickerDict
+# End - OpenTickersForStocks
+
+
+
+
+
+#####################################################################################
+#
+# [ComputeTickerStats]
+#
+# Compute all stats for a loaded ticker and return it. This is a separate
+# function so it can be run on an executor, including a process pool.
+#
+# The lazy engine does not compute anything here, so it is not timed. The stats
+# are computed, and can be timed by the caller, when they are first read.
+#####################################################################################
+def ComputeTickerStats(stockTicker, metrics=None, statsEngineName=StockTicker.STATS_ENGINE_COLUMNAR):
+    if (metrics is None):
+        metrics = PipelineMetrics.g_DisabledMetrics
+    if (statsEngineName == StockTicker.STATS_ENGINE_LAZY):
+        stockTicker.ComputeAllStats(statsEngineName)
+        return stockTicker
+    with metrics.Timer(PipelineMetrics.STAGE_COMPUTE_STATS, stockTicker.GetStockSymbol()):
+        stockTicker.ComputeAllStats(statsEngineName)
+    return stockTicker
+# End - ComputeTickerStats
+
+
+
+
+
+#####################################################################################
+#
+# [LoadTickerWithRetriesAsync]
+#
+# The asyncio version of LoadTickerWithRetries, with the same retries.
+# The blocking fetch runs on an executor thread, and an attempt that takes
+# longer than timeoutSeconds counts as a failed attempt.
+#
+# Each attempt loads into a new ticker. A timed-out attempt cannot be
+# stopped and may still be writing into its own ticker when the next one starts.
+#####################################################################################
+async def LoadTickerWithRetriesAsync(tickerSourceName, tickerSymbol, timeoutSeconds, yahooClient=None, computeExecutor=None,
+                                    infoCache=None, metrics=None, statsEngineName=StockTicker.STATS_ENGINE_COLUMNAR):
+    if (metrics is None):
+        metrics = PipelineMetrics.g_DisabledMetrics
+    with metrics.Timer(PipelineMetrics.STAGE_LOAD_TICKER, tickerSymbol):
+        return await LoadTickerWithRetriesAsyncImpl(tickerSourceName, tickerSymbol, timeoutSeconds, yahooClient, 
+                                                    computeExecutor, infoCache, metrics, statsEngineName)
+# End - LoadTickerWithRetriesAsync
+
+
+
+
+
+#####################################################################################
+#
+# [LoadTickerWithRetriesAsyncImpl]
+#
+# The body of LoadTickerWithRetriesAsync, so the whole load is inside one timer.
+#####################################################################################
+async def LoadTickerWithRetriesAsyncImpl(tickerSourceName, tickerSymbol, timeoutSeconds, yahooClient, computeExecutor,
+                                        infoCache, metrics, statsEngineName):
+    eventLoop = asyncio.get_running_loop()
+
+    attemptNum = 1
+    maxAttempts = MAX_LOAD_ATTEMPTS
+    fSuccess = False
+    fRetry = False
+    currentTicker = None
+    while (attemptNum <= maxAttempts):
+        if (tickerSourceName != YAHOO_FINANCE):
+            #print("OpenTickersForStocksAsync. Unrecognized Loader: " + tickerSourceName)
+            attemptNum += 1
+            continue
+
+        currentTicker = StockTicker.CStockTicker(tickerSymbol)
+        try:
+            fSuccess, fRetry = await asyncio.wait_for(
+                                    eventLoop.run_in_executor(None, LoadTickerFromYahoo, currentTicker, yahooClient, 
+                                                            None, infoCache, metrics),
+                                    timeoutSeconds)
+        except asyncio.TimeoutError:
+            print("Error. LoadTickerFromYahoo timed out. Symbol=" + tickerSymbol)
+            print("  attemptNum = " + str(attemptNum))
+            fSuccess = False
+            attemptNum += 1
+            continue
+        except Exception:
+            print("Error. LoadTickerFromYahoo raised an exception!")
             print("  fSuccess = " + str(fSuccess))
             print("  attemptNum = " + str(attemptNum))
-            print("  maxAttempts = " + str(maxAttempts))
+            attemptNum += 1
             continue
+        # End try/except
+
+        # We succeeded, or if there is no point to retrying, then stop trying
+        if ((fSuccess) or (not fRetry)):
+            break
+        attemptNum += 1
+    # End - while (attemptNum <= maxAttempts):
+
+    if ((not fSuccess) or (attemptNum > maxAttempts)):
+        print("Error. Cannot find ticker: " + tickerSymbol)
+        print("  fSuccess = " + str(fSuccess))
+        print("  attemptNum = " + str(attemptNum))
+        print("  maxAttempts = " + str(maxAttempts))
+        metrics.AddCount(PipelineMetrics.COUNTER_RETRIES, min(attemptNum, maxAttempts) - 1, tickerSymbol)
+        metrics.AddCount(PipelineMetrics.COUNTER_FAILURES, 1, tickerSymbol)
+        return None
+    metrics.AddCount(PipelineMetrics.COUNTER_RETRIES, attemptNum - 1, tickerSymbol)
+
+    if (statsEngineName == StockTicker.STATS_ENGINE_LAZY):
+        return ComputeTickerStats(currentTicker, metrics, statsEngineName)
+
+    # Computing the stats is CPU work, so keep it off the event loop.
+    # A process pool cannot share the metrics, so this times the call from here.
+    with metrics.Timer(PipelineMetrics.STAGE_COMPUTE_STATS, tickerSymbol):
+        return await eventLoop.run_in_executor(computeExecutor, ComputeTickerStats, currentTicker, None, 
+                                            statsEngineName)
+# End - LoadTickerWithRetriesAsyncImpl
+
 
-        currentTicker.ComputeAllStats()
-        if (stockTickerDict is not None):
-            stockTickerDict[tickerSymbol] = currentTicker
-    # End - for securityInfoDict in stockNameList:
 
 
+
+#####################################################################################
+#
+# [OpenTickersForStocksAsync]
+#
+# The asyncio version of OpenTickersForStocks. At most maxConcurrent tickers
+# are loaded at once, and each fetch attempt times out after timeoutSeconds.
+# computeExecutor runs ComputeAllStats; None means the default executor of the loop.
+# infoCache, metrics and statsEngineName are the same as in OpenTickersForStocks.
+#
+# If this is cancelled, every ticker that is still loading is cancelled too.
+#####################################################################################
+async def OpenTickersForStocksAsync(tickerSourceName, stockNameList, stockTickerDict, maxConcurrent=8, 
+                                    timeoutSeconds=60, yahooClient=None, computeExecutor=None, infoCache=None,
+                                    metrics=None, statsEngineName=StockTicker.STATS_ENGINE_COLUMNAR):
+    fDebug = True
+
+    tickerSourceName = tickerSourceName.lower()
+    symbolsToLoadList = GetSymbolsToLoad(stockNameList, stockTickerDict)
+    concurrencyLimit = asyncio.Semaphore(maxConcurrent)
+
+    async def LoadOneTicker(tickerSymbol):
+        async with concurrencyLimit:
+            if (fDebug):
+                print("Allocate ticker for " + tickerSymbol)
+            return await LoadTickerWithRetriesAsync(tickerSourceName, tickerSymbol, timeoutSeconds, yahooClient, 
+                                                    computeExecutor, infoCache, metrics, statsEngineName)
+    # End - LoadOneTicker
+
+    taskList = [asyncio.ensure_future(LoadOneTicker(tickerSymbol)) for tickerSymbol in symbolsToLoadList]
+    try:
+        tickerList = await asyncio.gather(*taskList)
+    except BaseException:
+        for task in taskList:
+            task.cancel()
+        raise
+
+    for tickerSymbol, currentTicker in zip(symbolsToLoadList, tickerList):
+        if ((currentTicker is not None) and (stockTickerDict is not None)):
+            stockTickerDict[tickerSymbol] = currentTicker
+    # End - for tickerSymbol, currentTicker in zip(symbolsToLoadList, tickerList):
+
+    SaveTickerInfoCache(infoCache, fDebug)
     return stockTickerDict
-# End - OpenTickersForStocks
+# End - OpenTickersForStocksAsync
 
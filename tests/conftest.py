@@ -0,0 +1,11 @@
+################################################################################
+#
+# The library modules are in the directory above this one.
+#
+################################################################################
+import os
+import sys
+
+g_RepoDirPath = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if g_RepoDirPath not in sys.path:
+    sys.path.insert(0, g_RepoDirPath)
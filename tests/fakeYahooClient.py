@@ -0,0 +1,118 @@
+################################################################################
+#
+# A local stand-in for the yfinance module, passed to the loaders as yahooClient.
+#
+# Each symbol has a made-up daily history that is always the same. A symbol
+# can be made to fail its next few info requests, to always fail, to be
+# unknown (info is None), or to be slow.
+################################################################################
+import time
+import threading
+from datetime import date, timedelta
+
+import pandas as pd
+
+FIRST_HISTORY_DATE = date(2020, 1, 2)
+DEFAULT_NUM_DAYS = 60
+
+
+class CFakeRemoteTicker(object):
+    def __init__(self, fakeClient, tickerSymbol):
+        self.FakeClient = fakeClient
+        self.TickerSymbol = tickerSymbol
+
+    @property
+    def info(self):
+        self.FakeClient.CountCall("info", self.TickerSymbol)
+        self.FakeClient.Wait(self.TickerSymbol)
+        if (self.FakeClient.TakeFailure(self.TickerSymbol)):
+            raise RuntimeError("Too Many Requests. Rate limited.")
+        if (self.TickerSymbol in self.FakeClient.UnknownSymbolSet):
+            return None
+        closePrice = self.FakeClient.GetHistory(self.TickerSymbol)["Close"].iloc[-1]
+        return {'shortName': self.TickerSymbol + " Inc", 'currentPrice': closePrice, 'previousClose': closePrice,
+                'open': closePrice, 'dayLow': closePrice, 'dayHigh': closePrice, 'volume': 1000,
+                'trailingPE': 20.0, 'forwardPE': 18.0, 'bid': closePrice - 0.01, 'ask': closePrice + 0.01,
+                'fiftyTwoWeekLow': 1.0, 'fiftyTwoWeekHigh': 100.0, 'fiftyDayAverage': 10.0,
+                'twoHundredDayAverage': 10.0, 'averageVolume': 1000, 'pegRatio': 1.5}
+
+    @property
+    def fast_info(self):
+        # Like yfinance, this has no bid or ask
+        self.FakeClient.CountCall("fast_info", self.TickerSymbol)
+        closePrice = self.FakeClient.GetHistory(self.TickerSymbol)["Close"].iloc[-1]
+        return {'lastPrice': closePrice, 'open': closePrice, 'previousClose': closePrice,
+                'dayLow': closePrice, 'dayHigh': closePrice, 'lastVolume': 1000}
+
+    def history(self, period="max", start=None, **kwargs):
+        self.FakeClient.CountCall("history", self.TickerSymbol)
+        self.FakeClient.Wait(self.TickerSymbol)
+        historyFrame = self.FakeClient.GetHistory(self.TickerSymbol)
+        if (start is not None):
+            historyFrame = historyFrame[historyFrame.index >= pd.Timestamp(start)]
+        return historyFrame
+# End - CFakeRemoteTicker
+
+
+
+class CFakeYahooClient(object):
+    # failCountDict is {symbol: number of info requests that fail}, -1 means all of them.
+    # delayDict is {symbol: seconds each info and history request takes}.
+    def __init__(self, numDays=DEFAULT_NUM_DAYS, failCountDict=None, unknownSymbolList=None, delayDict=None):
+        self.NumDays = numDays
+        self.FailCountDict = dict(failCountDict or {})
+        self.UnknownSymbolSet = set(unknownSymbolList or [])
+        self.DelayDict = dict(delayDict or {})
+        self.HistoryDict = {}
+        self.CallCountDict = {}
+        self.Lock = threading.Lock()
+
+    def Ticker(self, tickerSymbol):
+        return CFakeRemoteTicker(self, tickerSymbol)
+
+    def CountCall(self, callName, tickerSymbol):
+        with self.Lock:
+            key = (callName, tickerSymbol)
+            self.CallCountDict[key] = self.CallCountDict.get(key, 0) + 1
+
+    def GetCallCount(self, callName, tickerSymbol):
+        with self.Lock:
+            return self.CallCountDict.get((callName, tickerSymbol), 0)
+
+    def Wait(self, tickerSymbol):
+        delaySeconds = self.DelayDict.get(tickerSymbol, 0)
+        if (delaySeconds > 0):
+            time.sleep(delaySeconds)
+
+    def TakeFailure(self, tickerSymbol):
+        with self.Lock:
+            numFailures = self.FailCountDict.get(tickerSymbol, 0)
+            if (numFailures == 0):
+                return False
+            if (numFailures > 0):
+                self.FailCountDict[tickerSymbol] = numFailures - 1
+            return True
+
+    def GetHistory(self, tickerSymbol):
+        with self.Lock:
+            if (tickerSymbol not in self.HistoryDict):
+                self.HistoryDict[tickerSymbol] = MakeFakeHistory(tickerSymbol, self.NumDays)
+            return self.HistoryDict[tickerSymbol]
+# End - CFakeYahooClient
+
+
+
+def MakeFakeHistory(tickerSymbol, numDays):
+    basePrice = 10.0 + (sum(ord(char) for char in tickerSymbol) % 50)
+    dateList = []
+    closeList = []
+    currentDate = FIRST_HISTORY_DATE
+    while (len(dateList) < numDays):
+        if (currentDate.weekday() < 5):
+            dateList.append(pd.Timestamp(currentDate))
+            closeList.append(basePrice + ((len(dateList) * 7) % 11) * 0.5)
+        currentDate = currentDate + timedelta(days=1)
+    return pd.DataFrame({'Open': closeList, 'High': [price + 1.0 for price in closeList],
+                        'Low': [price - 1.0 for price in closeList], 'Close': closeList,
+                        'Volume': [1000] * numDays}, index=pd.DatetimeIndex(dateList))
+# End - MakeFakeHistory
@@ -0,0 +1,32 @@
+################################################################################
+#
+# benchmark.py command line.
+#
+################################################################################
+import json
+
+import benchmark as Benchmark
+
+SMALL_RUN_ARG_LIST = ["--numDays", "100", "--numTickers", "2", "--universeDays", "100", "--repeats", "1", "--noMemory"]
+
+
+def test_compare_with_the_output_file(tmp_path, capsys):
+    outputFilePathName = str(tmp_path / "bench_output.txt")
+    Benchmark.Main(SMALL_RUN_ARG_LIST + ["--output", outputFilePathName])
+
+    # Make the old results much slower, so a comparison with the old file is not 1.
+    with open(outputFilePathName, "r") as fileH:
+        recordList = [json.loads(line) for line in fileH if (line.strip() != "")]
+    with open(outputFilePathName, "w") as fileH:
+        for recordDict in recordList:
+            recordDict['BestSeconds'] = 1000.0
+            fileH.write(json.dumps(recordDict) + "\n")
+    capsys.readouterr()
+
+    Benchmark.Main(SMALL_RUN_ARG_LIST + ["--output", outputFilePathName, "--compare", outputFilePathName])
+
+    ratioLineList = [line for line in capsys.readouterr().out.splitlines() if ("ratio=" in line)]
+    assert len(ratioLineList) == len(recordList)
+    for line in ratioLineList:
+        assert "old=1000.000000s" in line
+        assert not line.endswith("ratio=1.000")
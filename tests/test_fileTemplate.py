@@ -0,0 +1,121 @@
+################################################################################
+#
+# The compiled and streaming template writers against the original
+# replace-based expansion.
+#
+################################################################################
+import random
+
+import pytest
+
+import fileTemplate as FileTemplate
+
+NUM_RANDOM_CASES = 500
+
+# Text that is likely to make, or almost make, the name of a variable.
+g_FragmentList = ["<!-- ", " -->", "<!--", "-->", "BODY", "TABLE", "JSCRIPTDICT", "LOG", "<", "!", "-", " ", 
+                    "\n", "x", "<td>", "é"] + FileTemplate.g_TemplateVarNameList
+
+
+################################################################################
+# The ExpandTemplate and MakeFileFromTemplate of the original CHTMLFileTemplate,
+# which replaced each variable in the whole page, one after another.
+################################################################################
+def ExpandTemplateByReplacing(htmlTemplate, templateStr):
+    templateStr = templateStr.replace(FileTemplate.BODY_TEXT_VAR_NAME, htmlTemplate.m_Body)
+
+    tableStr = htmlTemplate.m_TableStr
+    for currentStr in htmlTemplate.m_HTMLTableStrList:
+        tableStr = tableStr + currentStr + "\n"
+    templateStr = templateStr.replace(FileTemplate.TABLE_TEXT_VAR_NAME, tableStr)
+
+    dictDeclarationStr = ""
+    for currentStr in htmlTemplate.m_JScriptDictEntryList:
+        dictDeclarationStr = dictDeclarationStr + currentStr + "\n"
+    templateStr = templateStr.replace(FileTemplate.JAVASCRIPT_DICT_TEXT_VAR_NAME, dictDeclarationStr)
+
+    logStr = ""
+    for currentStr in htmlTemplate.m_LogStrList:
+        logStr = logStr + currentStr + "\n<br>"
+    if (logStr != ""):
+        logStr = "Log:\n<br>" + logStr
+    templateStr = templateStr.replace(FileTemplate.LOG_TEXT_VAR_NAME, logStr)
+
+    return templateStr
+
+
+def MakeRandomText(randomGen, maxNumFragments):
+    return "".join(randomGen.choice(g_FragmentList) for _ in range(randomGen.randint(0, maxNumFragments)))
+
+
+def MakeRandomTemplate(randomGen):
+    htmlTemplate = FileTemplate.MakeTemplate()
+    htmlTemplate.SetBodyStr(MakeRandomText(randomGen, 4))
+    if (randomGen.random() < 0.5):
+        htmlTemplate.SetTableStr(MakeRandomText(randomGen, 3))
+    for _ in range(randomGen.randint(0, 3)):
+        htmlTemplate.AddHTMLTableRowToDoc([MakeRandomText(randomGen, 3) for _ in range(randomGen.randint(1, 3))])
+    for _ in range(randomGen.randint(0, 3)):
+        htmlTemplate.AddJavascriptTableRow([{"Name": MakeRandomText(randomGen, 2), "Value": MakeRandomText(randomGen, 2)}])
+    for _ in range(randomGen.randint(0, 2)):
+        htmlTemplate.AddLogStr(MakeRandomText(randomGen, 3))
+    return htmlTemplate
+
+
+def AssertSameAsReplacing(tmp_path, caseName, templateStr, htmlTemplate):
+    templateFilePathName = str(tmp_path / (caseName + ".htm"))
+    outputFilePathName = str(tmp_path / (caseName + ".out"))
+    expectedFilePathName = str(tmp_path / (caseName + ".expected"))
+    with open(templateFilePathName, "w") as fileH:
+        fileH.write(templateStr)
+    with open(expectedFilePathName, "w+") as fileH:
+        fileH.write(ExpandTemplateByReplacing(htmlTemplate, templateStr))
+
+    htmlTemplate.MakeFileFromTemplate(templateFilePathName, outputFilePathName)
+
+    with open(outputFilePathName, "rb") as fileH:
+        outputBytes = fileH.read()
+    with open(expectedFilePathName, "rb") as fileH:
+        expectedBytes = fileH.read()
+    assert outputBytes == expectedBytes, caseName
+    assert htmlTemplate.ExpandTemplate(templateFilePathName) == ExpandTemplateByReplacing(htmlTemplate, templateStr)
+
+
+def test_random_templates_match_replacing(tmp_path):
+    randomGen = random.Random(24)
+    for caseNum in range(NUM_RANDOM_CASES):
+        templateStr = MakeRandomText(randomGen, 12)
+        AssertSameAsReplacing(tmp_path, "random" + str(caseNum), templateStr, MakeRandomTemplate(randomGen))
+
+
+@pytest.mark.parametrize("bodyStr,templateStr", [
+    # The body is the name of a later variable, so replacing fills it in too.
+    ("<!-- TABLE -->", "<html><!-- BODY --><!-- TABLE --></html>"),
+    ("<!-- LOG -->", "<!-- BODY -->|<!-- LOG -->"),
+    # The body makes the name of a later variable together with the text after it.
+    ("<!-- TA", "<!-- BODY -->BLE --> and <!-- TABLE -->"),
+    # ... or with the text before it.
+    ("JSCRIPTDICT -->", "a <!-- <!-- BODY --> b <!-- JSCRIPTDICT -->"),
+    # An earlier variable is not replaced again.
+    ("<!-- BODY -->", "x<!-- BODY -->y<!-- BODY -->z"),
+])
+def test_text_that_makes_a_variable_name_uses_replacing(tmp_path, bodyStr, templateStr):
+    htmlTemplate = FileTemplate.MakeTemplate()
+    htmlTemplate.SetBodyStr(bodyStr)
+    htmlTemplate.AddHTMLTableRowToDoc(["row"])
+    htmlTemplate.AddJavascriptTableRow([{"Name": "Price", "Value": 1}])
+    htmlTemplate.AddLogStr("logged")
+
+    assert not FileTemplate.CCompiledTemplate(templateStr).CanFillSlots(htmlTemplate)
+    AssertSameAsReplacing(tmp_path, "fallback", templateStr, htmlTemplate)
+
+
+def test_ordinary_page_does_not_use_replacing(tmp_path):
+    htmlTemplate = FileTemplate.MakeTemplate()
+    htmlTemplate.SetBodyStr("Collected today")
+    htmlTemplate.AddHTMLTableRowToDoc(["<b>Stock</b>", "<td bgcolor=\"green\">1.5</td>"])
+    htmlTemplate.AddJavascriptTableRow([{"Name": "Price", "Value": 1.5}])
+    templateStr = "<html><!-- BODY --><table><!-- TABLE --></table><script><!-- JSCRIPTDICT --></script><!-- LOG --></html>"
+
+    assert FileTemplate.CCompiledTemplate(templateStr).CanFillSlots(htmlTemplate)
+    AssertSameAsReplacing(tmp_path, "ordinary", templateStr, htmlTemplate)
@@ -0,0 +1,89 @@
+################################################################################
+#
+# CHistoryStore symbols and round trips.
+#
+################################################################################
+import pytest
+
+pytest.importorskip("pandas")
+
+import historyStore as HistoryStore
+import stockTickerYahoo as StockTickerYahoo
+from fakeYahooClient import CFakeYahooClient
+
+
+def test_symbols_round_trip(tmp_path):
+    symbolList = ['AAA', 'BRK/B', 'BRK_B', '^GSPC', 'A%2FB']
+    stockTickerDict = StockTickerYahoo.OpenTickersForStocks("yahoo", symbolList, {},
+                                                            yahooClient=CFakeYahooClient())
+    historyStore = HistoryStore.CHistoryStore(str(tmp_path))
+    historyStore.SaveTickers(stockTickerDict)
+
+    assert set(historyStore.GetSymbolList()) == set(symbolList)
+    for tickerSymbol in symbolList:
+        assert historyStore.HasTicker(tickerSymbol)
+        storedTicker = historyStore.OpenTicker(tickerSymbol)
+        assert storedTicker.GetStockSymbol() == tickerSymbol
+        assert list(storedTicker.History.GetColumn('Cl')) == list(stockTickerDict[tickerSymbol].History.GetColumn('Cl'))
+
+
+def test_missing_symbols_are_returned(tmp_path):
+    stockTickerDict = StockTickerYahoo.OpenTickersForStocks("yahoo", ['BRK/B'], {}, yahooClient=CFakeYahooClient())
+    historyStore = HistoryStore.CHistoryStore(str(tmp_path))
+    historyStore.SaveTickers(stockTickerDict)
+
+    openedTickerDict = {}
+    missingSymbolList = historyStore.OpenTickers(['BRK/B', 'BRK_B'], openedTickerDict)
+
+    assert missingSymbolList == ['BRK_B']
+    assert list(openedTickerDict.keys()) == ['BRK/B']
+
+
+def test_resave_keeps_open_tickers_and_old_versions(tmp_path):
+    historyStore = HistoryStore.CHistoryStore(str(tmp_path))
+    oldTicker = StockTickerYahoo.OpenTickersForStocks("yahoo", ['AAA'], {}, yahooClient=CFakeYahooClient(numDays=60))['AAA']
+    historyStore.SaveTicker(oldTicker)
+    openedTicker = historyStore.OpenTicker('AAA')
+
+    for numDays in (70, 80, 90):
+        newTicker = StockTickerYahoo.OpenTickersForStocks("yahoo", ['AAA'], {},
+                                                        yahooClient=CFakeYahooClient(numDays=numDays))['AAA']
+        historyStore.SaveTicker(newTicker)
+
+    assert list(openedTicker.History.GetColumn('Cl')) == list(oldTicker.History.GetColumn('Cl'))
+    assert len(historyStore.OpenTicker('AAA').History) == 90
+    assert len(historyStore.GetVersionNameList('AAA')) == HistoryStore.NUM_KEPT_VERSIONS
+
+
+@pytest.mark.parametrize("numSavesDuringOpen", [1, 3])
+def test_open_during_a_save_is_consistent(tmp_path, monkeypatch, numSavesDuringOpen):
+    historyStore = HistoryStore.CHistoryStore(str(tmp_path))
+    tickerList = [StockTickerYahoo.OpenTickersForStocks("yahoo", ['AAA'], {},
+                                                        yahooClient=CFakeYahooClient(numDays=numDays))['AAA']
+                    for numDays in (60, 60, 70, 80)]
+    historyStore.SaveTicker(tickerList[0])
+
+    # Save new versions right after the date column of the current version is opened.
+    openColumnFile = HistoryStore.OpenColumnFile
+    newTickerList = list(tickerList[1:1 + numSavesDuringOpen])
+
+    def OpenColumnFileDuringSave(filePathName, typecode):
+        column = openColumnFile(filePathName, typecode)
+        if (filePathName.endswith(HistoryStore.DATE_COLUMN_FILE_NAME + HistoryStore.COLUMN_FILE_SUFFIX)):
+            while (len(newTickerList) > 0):
+                historyStore.SaveTicker(newTickerList.pop(0))
+        return column
+
+    # The second save has the same length but different prices, so a mix would go unnoticed by the row count.
+    tickerList[1].History.GetColumn('Cl')[0] = -1.0
+    monkeypatch.setattr(HistoryStore, "OpenColumnFile", OpenColumnFileDuringSave)
+
+    openedTicker = historyStore.OpenTicker('AAA')
+
+    closeList = list(openedTicker.History.GetColumn('Cl'))
+    assert closeList in [list(stockTicker.History.GetColumn('Cl')) for stockTicker in tickerList]
+    assert len(openedTicker.History.GetDateColumn()) == len(closeList)
+    if (numSavesDuringOpen == 1):
+        assert closeList == list(tickerList[0].History.GetColumn('Cl'))
+    else:
+        assert closeList == list(tickerList[3].History.GetColumn('Cl'))
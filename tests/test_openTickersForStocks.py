@@ -0,0 +1,114 @@
+################################################################################
+#
+# OpenTickersForStocks against a local stand-in for yfinance.
+#
+################################################################################
+import time
+
+import pytest
+
+pytest.importorskip("pandas")
+
+import stockTicker as StockTicker
+import pipelineMetrics as PipelineMetrics
+import stockTickerYahoo as StockTickerYahoo
+from fakeYahooClient import CFakeYahooClient
+
+
+@pytest.mark.parametrize("numWorkers", [1, 4])
+def test_tickers_are_added_in_input_order(numWorkers):
+    # The first symbols are the slowest, so they finish last on the pool.
+    symbolList = ['AAA', 'BBB', 'CCC', 'DDD', 'EEE']
+    delayDict = {tickerSymbol: 0.01 * (len(symbolList) - index) for index, tickerSymbol in enumerate(symbolList)}
+    fakeClient = CFakeYahooClient(delayDict=delayDict)
+
+    stockTickerDict = StockTickerYahoo.OpenTickersForStocks("yahoo", symbolList, {}, numWorkers=numWorkers,
+                                                            yahooClient=fakeClient)
+
+    assert list(stockTickerDict.keys()) == symbolList
+    for tickerSymbol, stockTicker in stockTickerDict.items():
+        assert stockTicker.GetStockSymbol() == tickerSymbol
+        assert len(stockTicker.History) == fakeClient.NumDays
+
+
+@pytest.mark.parametrize("numWorkers", [1, 4])
+def test_failed_symbols_are_left_out(numWorkers):
+    fakeClient = CFakeYahooClient(failCountDict={'BAD': -1}, unknownSymbolList=['NONE'])
+
+    stockTickerDict = StockTickerYahoo.OpenTickersForStocks("yahoo", ['AAA', 'BAD', 'NONE', 'BBB'], {},
+                                                            numWorkers=numWorkers, yahooClient=fakeClient)
+
+    assert list(stockTickerDict.keys()) == ['AAA', 'BBB']
+
+
+@pytest.mark.parametrize("numWorkers", [1, 4])
+def test_retries_are_bounded(numWorkers):
+    fakeClient = CFakeYahooClient(failCountDict={'BAD': -1, 'FLAKY': 2}, unknownSymbolList=['NONE'])
+
+    stockTickerDict = StockTickerYahoo.OpenTickersForStocks("yahoo", ['BAD', 'FLAKY', 'NONE'], {},
+                                                            numWorkers=numWorkers, yahooClient=fakeClient)
+
+    assert list(stockTickerDict.keys()) == ['FLAKY']
+    assert fakeClient.GetCallCount("info", 'FLAKY') == 3
+    assert fakeClient.GetCallCount("info", 'BAD') == StockTickerYahoo.MAX_LOAD_ATTEMPTS
+    assert fakeClient.GetCallCount("info", 'NONE') == StockTickerYahoo.MAX_LOAD_ATTEMPTS
+    assert fakeClient.GetCallCount("history", 'BAD') == 0
+
+
+def test_loaded_tickers_are_not_requested_again():
+    fakeClient = CFakeYahooClient()
+    stockTickerDict = StockTickerYahoo.OpenTickersForStocks("yahoo", ['AAA', 'BBB'], {}, yahooClient=fakeClient)
+
+    StockTickerYahoo.OpenTickersForStocks("yahoo", ['BBB', 'CCC', 'CCC'], stockTickerDict, numWorkers=4,
+                                        yahooClient=fakeClient)
+
+    assert list(stockTickerDict.keys()) == ['AAA', 'BBB', 'CCC']
+    assert fakeClient.GetCallCount("info", 'BBB') == 1
+    assert fakeClient.GetCallCount("info", 'CCC') == 1
+
+
+def test_loaded_stats_are_computed():
+    fakeClient = CFakeYahooClient()
+
+    stockTickerDict = StockTickerYahoo.OpenTickersForStocks("yahoo", ['AAA'], {}, yahooClient=fakeClient)
+
+    stockTicker = stockTickerDict['AAA']
+    for columnName in StockTicker.g_CurrentStatColumnNameList:
+        assert not stockTicker.History.IsColumnStale(columnName)
+
+
+def test_compute_stats_stage_times_the_compute(monkeypatch):
+    computeAllStatsColumnar = StockTicker.CStockTicker.ComputeAllStatsColumnar
+
+    def SlowComputeAllStatsColumnar(stockTicker):
+        time.sleep(0.05)
+        computeAllStatsColumnar(stockTicker)
+
+    monkeypatch.setattr(StockTicker.CStockTicker, "ComputeAllStatsColumnar", SlowComputeAllStatsColumnar)
+    metrics = PipelineMetrics.CPipelineMetrics()
+
+    StockTickerYahoo.OpenTickersForStocks("yahoo", ['AAA'], {}, yahooClient=CFakeYahooClient(), metrics=metrics)
+
+    stageEntry = metrics.GetTickerMetrics('AAA')["Stages"][PipelineMetrics.STAGE_COMPUTE_STATS]
+    assert stageEntry["Count"] == 1
+    assert stageEntry["Seconds"] >= 0.05
+
+
+@pytest.mark.parametrize("numWorkers", [1, 4])
+def test_lazy_engine_only_computes_the_columns_that_are_read(numWorkers):
+    lazyTickerDict = StockTickerYahoo.OpenTickersForStocks("yahoo", ['AAA', 'BBB'], {}, numWorkers=numWorkers,
+                                                            yahooClient=CFakeYahooClient(),
+                                                            statsEngineName=StockTicker.STATS_ENGINE_LAZY)
+    eagerTickerDict = StockTickerYahoo.OpenTickersForStocks("yahoo", ['AAA', 'BBB'], {}, yahooClient=CFakeYahooClient())
+    for stockTicker in lazyTickerDict.values():
+        for columnName in StockTicker.g_CurrentStatColumnNameList:
+            assert stockTicker.History.IsColumnStale(columnName)
+
+    # RSI only needs the closes. MACD needs both EMA columns.
+    assert lazyTickerDict['AAA'].GetRSI() == eagerTickerDict['AAA'].GetRSI()
+    assert lazyTickerDict['BBB'].GetMACD() == eagerTickerDict['BBB'].GetMACD()
+
+    computedColumnsDict = {'AAA': ['RSI'], 'BBB': ['EMA12', 'EMA26', 'MACD']}
+    for tickerSymbol, stockTicker in lazyTickerDict.items():
+        for columnName in StockTicker.g_CurrentStatColumnNameList:
+            assert stockTicker.History.IsColumnStale(columnName) == (columnName not in computedColumnsDict[tickerSymbol])
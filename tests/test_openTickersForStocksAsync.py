@@ -0,0 +1,117 @@
+################################################################################
+#
+# OpenTickersForStocksAsync against a local stand-in for yfinance.
+#
+################################################################################
+import asyncio
+from concurrent.futures import Executor
+
+import pytest
+
+pytest.importorskip("pandas")
+
+import stockTicker as StockTicker
+import stockTickerYahoo as StockTickerYahoo
+from fakeYahooClient import CFakeYahooClient
+
+
+class CFailingExecutor(Executor):
+    def submit(self, function, *args, **kwargs):
+        raise RuntimeError("The compute executor is broken")
+
+
+def GetOtherTasks():
+    currentTask = asyncio.current_task()
+    return [task for task in asyncio.all_tasks() if ((task is not currentTask) and (not task.done()))]
+
+
+def test_tickers_are_added_in_input_order():
+    symbolList = ['AAA', 'BBB', 'CCC', 'DDD']
+    delayDict = {tickerSymbol: 0.02 * (len(symbolList) - index) for index, tickerSymbol in enumerate(symbolList)}
+    fakeClient = CFakeYahooClient(delayDict=delayDict)
+
+    stockTickerDict = asyncio.run(StockTickerYahoo.OpenTickersForStocksAsync("yahoo", symbolList, {}, maxConcurrent=4,
+                                                                            yahooClient=fakeClient))
+
+    assert list(stockTickerDict.keys()) == symbolList
+    for stockTicker in stockTickerDict.values():
+        assert len(stockTicker.History) == fakeClient.NumDays
+
+
+def test_failures_and_retries_are_bounded():
+    fakeClient = CFakeYahooClient(failCountDict={'BAD': -1, 'FLAKY': 2}, unknownSymbolList=['NONE'])
+
+    stockTickerDict = asyncio.run(StockTickerYahoo.OpenTickersForStocksAsync("yahoo", ['BAD', 'AAA', 'FLAKY', 'NONE'], {},
+                                                                            yahooClient=fakeClient))
+
+    assert list(stockTickerDict.keys()) == ['AAA', 'FLAKY']
+    assert fakeClient.GetCallCount("info", 'FLAKY') == 3
+    assert fakeClient.GetCallCount("info", 'BAD') == StockTickerYahoo.MAX_LOAD_ATTEMPTS
+    assert fakeClient.GetCallCount("info", 'NONE') == StockTickerYahoo.MAX_LOAD_ATTEMPTS
+
+
+def test_timed_out_attempts_count_as_failures():
+    fakeClient = CFakeYahooClient(delayDict={'SLOW': 0.2})
+
+    stockTickerDict = asyncio.run(StockTickerYahoo.OpenTickersForStocksAsync("yahoo", ['SLOW', 'AAA'], {},
+                                                                            timeoutSeconds=0.02, yahooClient=fakeClient))
+
+    assert list(stockTickerDict.keys()) == ['AAA']
+    assert fakeClient.GetCallCount("info", 'SLOW') == StockTickerYahoo.MAX_LOAD_ATTEMPTS
+
+
+def test_an_error_cancels_the_other_tickers():
+    fakeClient = CFakeYahooClient(delayDict={'SLOW': 0.5})
+    stockTickerDict = {}
+
+    async def RunLoad():
+        with pytest.raises(RuntimeError):
+            await StockTickerYahoo.OpenTickersForStocksAsync("yahoo", ['AAA', 'SLOW'], stockTickerDict,
+                                                            yahooClient=fakeClient, computeExecutor=CFailingExecutor())
+        # Much less than the time SLOW takes, so it can only be done if it was cancelled
+        await asyncio.sleep(0.05)
+        return GetOtherTasks()
+
+    otherTaskList = asyncio.run(RunLoad())
+
+    assert otherTaskList == []
+    assert stockTickerDict == {}
+    # No retries were started after the cancel
+    assert fakeClient.GetCallCount("info", 'SLOW') <= 1
+
+
+def test_cancelling_the_load_cancels_every_ticker():
+    fakeClient = CFakeYahooClient(delayDict={'SLOW1': 0.2, 'SLOW2': 0.2})
+    stockTickerDict = {}
+
+    async def RunLoad():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(StockTickerYahoo.OpenTickersForStocksAsync("yahoo", ['SLOW1', 'SLOW2'], stockTickerDict,
+                                                                            yahooClient=fakeClient), 0.05)
+        await asyncio.sleep(0.3)
+        return GetOtherTasks()
+
+    otherTaskList = asyncio.run(RunLoad())
+
+    assert otherTaskList == []
+    assert stockTickerDict == {}
+    # No retries were started after the cancel
+    assert fakeClient.GetCallCount("info", 'SLOW1') <= 1
+    assert fakeClient.GetCallCount("info", 'SLOW2') <= 1
+
+
+@pytest.mark.parametrize("statsEngineName", [StockTicker.STATS_ENGINE_COLUMNAR, StockTicker.STATS_ENGINE_LAZY])
+def test_stats_engine_is_used(statsEngineName):
+    # The lazy engine does not use the compute executor, so a broken one does not matter.
+    computeExecutor = None
+    if (statsEngineName == StockTicker.STATS_ENGINE_LAZY):
+        computeExecutor = CFailingExecutor()
+
+    stockTickerDict = asyncio.run(StockTickerYahoo.OpenTickersForStocksAsync("yahoo", ['AAA'], {},
+                                                                            yahooClient=CFakeYahooClient(),
+                                                                            computeExecutor=computeExecutor,
+                                                                            statsEngineName=statsEngineName))
+
+    stockTicker = stockTickerDict['AAA']
+    for columnName in StockTicker.g_CurrentStatColumnNameList:
+        assert stockTicker.History.IsColumnStale(columnName) == (statsEngineName == StockTicker.STATS_ENGINE_LAZY)
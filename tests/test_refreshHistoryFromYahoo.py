@@ -0,0 +1,86 @@
+################################################################################
+#
+# RefreshHistoryFromYahoo against a local stand-in for yfinance.
+#
+################################################################################
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+import stockTickerYahoo as StockTickerYahoo
+from fakeYahooClient import CFakeYahooClient
+
+
+class CEmptyDeltaYahooClient(CFakeYahooClient):
+    # Has no days after the stored history, and returns an empty frame for a start date.
+    def Ticker(self, tickerSymbol):
+        remoteTicker = CFakeYahooClient.Ticker(self, tickerSymbol)
+        fullHistory = remoteTicker.history
+
+        def history(period="max", start=None, **kwargs):
+            historyFrame = fullHistory(period=period, start=start, **kwargs)
+            if (start is not None):
+                return historyFrame.iloc[0:0]
+            return historyFrame
+
+        remoteTicker.history = history
+        return remoteTicker
+# End - CEmptyDeltaYahooClient
+
+
+
+def OpenFakeTicker(tickerSymbol, numDays):
+    stockTickerDict = StockTickerYahoo.OpenTickersForStocks("yahoo", [tickerSymbol], {},
+                                                            yahooClient=CFakeYahooClient(numDays=numDays))
+    return stockTickerDict[tickerSymbol]
+
+
+def test_new_days_are_appended():
+    stockTicker = OpenFakeTicker('AAA', 60)
+    fakeClient = CFakeYahooClient(numDays=63)
+
+    fSuccess, fReloaded, numNewDays = StockTickerYahoo.RefreshHistoryFromYahoo(stockTicker, yahooClient=fakeClient)
+
+    assert (fSuccess, fReloaded, numNewDays) == (True, False, 3)
+    assert len(stockTicker.History) == 63
+    assert list(stockTicker.History.GetColumn('Cl')) == list(fakeClient.GetHistory('AAA')['Close'])
+
+
+def test_empty_delta_is_no_new_days():
+    stockTicker = OpenFakeTicker('AAA', 60)
+    closeList = list(stockTicker.History.GetColumn('Cl'))
+    fakeClient = CEmptyDeltaYahooClient(numDays=60)
+
+    fSuccess, fReloaded, numNewDays = StockTickerYahoo.RefreshHistoryFromYahoo(stockTicker, yahooClient=fakeClient)
+
+    assert (fSuccess, fReloaded, numNewDays) == (True, False, 0)
+    assert fakeClient.GetCallCount("history", 'AAA') == 1
+    assert list(stockTicker.History.GetColumn('Cl')) == closeList
+
+
+def test_only_the_overlap_day_is_no_new_days():
+    stockTicker = OpenFakeTicker('AAA', 60)
+    closeList = list(stockTicker.History.GetColumn('Cl'))
+    # The newest stored day is not in the response yet, so it only has the overlap day.
+    fakeClient = CFakeYahooClient(numDays=59)
+
+    fSuccess, fReloaded, numNewDays = StockTickerYahoo.RefreshHistoryFromYahoo(stockTicker, yahooClient=fakeClient)
+
+    assert (fSuccess, fReloaded, numNewDays) == (True, False, 0)
+    assert fakeClient.GetCallCount("history", 'AAA') == 1
+    assert len(stockTicker.History) == 60
+    assert list(stockTicker.History.GetColumn('Cl')) == closeList
+
+
+def test_revised_overlap_day_reloads():
+    stockTicker = OpenFakeTicker('AAA', 60)
+    fakeClient = CFakeYahooClient(numDays=61)
+    revisedHistory = fakeClient.GetHistory('AAA').copy()
+    revisedHistory['Close'] = revisedHistory['Close'] / 2.0
+    fakeClient.HistoryDict['AAA'] = revisedHistory
+
+    fSuccess, fReloaded, numNewDays = StockTickerYahoo.RefreshHistoryFromYahoo(stockTicker, yahooClient=fakeClient)
+
+    assert (fSuccess, fReloaded, numNewDays) == (True, True, 1)
+    assert fakeClient.GetCallCount("history", 'AAA') == 2
+    assert list(stockTicker.History.GetColumn('Cl')) == list(revisedHistory['Close'])
@@ -0,0 +1,79 @@
+################################################################################
+#
+# Every stats engine computes the same values.
+#
+# The per-day engine is the reference. The columnar, lazy and AppendDay
+# engines must match it on every stat column and on the current stats.
+#
+################################################################################
+import random
+from datetime import date, timedelta
+
+import pytest
+
+import stockTicker as StockTicker
+
+# The engines add and remove the same prices in a different order, so they
+# only differ by rounding.
+RELATIVE_TOLERANCE = 1e-12
+NUM_APPEND_START_DAYS = 30
+
+
+def MakeRandomDayList(numDays, seed):
+    randomGen = random.Random(seed)
+    dayList = []
+    currentDate = date(1990, 1, 2)
+    closePrice = 20.0
+    while (len(dayList) < numDays):
+        if (currentDate.weekday() < 5):
+            closePrice = max(0.5, closePrice * (1.0 + randomGen.gauss(0, 0.02)))
+            # Repeated prices exercise the ties in the sliding minimum and maximum.
+            if (randomGen.random() < 0.05):
+                closePrice = round(closePrice)
+            dayList.append((currentDate.year, currentDate.month, currentDate.day, 
+                            closePrice * 1.001, closePrice, randomGen.randint(1000, 1000000), 
+                            closePrice * 1.01, closePrice * 0.99))
+        currentDate = currentDate + timedelta(days=1)
+    return dayList
+
+
+def MakeTicker(dayList):
+    stockTicker = StockTicker.CStockTicker("TEST")
+    for year, month, day, openPrice, closePrice, volume, highPrice, lowPrice in dayList:
+        stockTicker.SetPastValues(year, month, day, openPrice, closePrice, volume, highPrice, lowPrice, 
+                                0, 0, 0, 0, 0, 0, 0)
+    return stockTicker
+
+
+def AssertClose(referenceValue, value, description):
+    assert abs(value - referenceValue) <= RELATIVE_TOLERANCE * max(1.0, abs(referenceValue)), \
+            description + ": " + repr(referenceValue) + " != " + repr(value)
+
+
+@pytest.mark.parametrize("numDays,seed", [(1, 0), (2, 0), (15, 1), (40, 2), (500, 3), (3000, 4)])
+def test_engines_match_per_day(numDays, seed):
+    dayList = MakeRandomDayList(numDays, seed)
+
+    referenceTicker = MakeTicker(dayList)
+    referenceTicker.ComputeAllStats(StockTicker.STATS_ENGINE_PER_DAY)
+
+    engineTickerDict = {}
+    for engineName in (StockTicker.STATS_ENGINE_COLUMNAR, StockTicker.STATS_ENGINE_LAZY):
+        engineTickerDict[engineName] = MakeTicker(dayList)
+        engineTickerDict[engineName].ComputeAllStats(engineName)
+    appendTicker = MakeTicker(dayList[:NUM_APPEND_START_DAYS])
+    appendTicker.ComputeAllStats()
+    for dayValues in dayList[NUM_APPEND_START_DAYS:]:
+        appendTicker.AppendDay(*dayValues)
+    engineTickerDict["appendDay"] = appendTicker
+
+    for engineName, stockTicker in engineTickerDict.items():
+        for columnName in StockTicker.g_CurrentStatColumnNameList:
+            referenceColumn = referenceTicker.History.GetColumn(columnName)
+            column = stockTicker.History.GetColumn(columnName)
+            assert len(column) == len(referenceColumn)
+            for index in range(len(referenceColumn)):
+                AssertClose(referenceColumn[index], column[index], 
+                            engineName + " " + columnName + "[" + str(index) + "]")
+            AssertClose(referenceTicker.GetCurrentStat(columnName), stockTicker.GetCurrentStat(columnName), 
+                        engineName + " current " + columnName)
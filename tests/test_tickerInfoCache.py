@@ -0,0 +1,78 @@
+################################################################################
+#
+# Loading tickers through a CTickerInfoCache, with a local stand-in for yfinance.
+#
+################################################################################
+import pytest
+
+pytest.importorskip("pandas")
+
+import stockTickerYahoo as StockTickerYahoo
+import tickerInfoCache as TickerInfoCache
+from fakeYahooClient import CFakeYahooClient
+
+
+def LoadTicker(fakeClient, infoCache, tickerSymbol):
+    return StockTickerYahoo.LoadTickerWithRetries("yahoo", tickerSymbol, fakeClient, None, infoCache)
+
+
+def test_cache_hit_still_gets_bid_and_ask():
+    fakeClient = CFakeYahooClient()
+    infoCache = TickerInfoCache.CTickerInfoCache()
+
+    firstTicker = LoadTicker(fakeClient, infoCache, 'AAA')
+    secondTicker = LoadTicker(fakeClient, infoCache, 'AAA')
+
+    # fast_info has no bid or ask, so with the default groups the second load needs the full info again.
+    assert fakeClient.GetCallCount("fast_info", 'AAA') == 0
+    assert fakeClient.GetCallCount("info", 'AAA') == 2
+    assert infoCache.GetStats() == {"Hits": 0, "QuoteHits": 0, "Misses": 2}
+    for stockTicker in [firstTicker, secondTicker]:
+        assert stockTicker.GetCurrentBid() > 0
+        assert stockTicker.GetCurrentAsk() > stockTicker.GetCurrentBid()
+        assert stockTicker.GetBidAskSpread()[0] == pytest.approx(0.02)
+
+
+def test_cache_hit_without_bid_and_ask_uses_a_quote_request():
+    fakeClient = CFakeYahooClient()
+    infoCache = TickerInfoCache.CTickerInfoCache(fieldGroupDict=TickerInfoCache.g_NoBidAskFieldGroupDict)
+
+    firstTicker = LoadTicker(fakeClient, infoCache, 'AAA')
+    secondTicker = LoadTicker(fakeClient, infoCache, 'AAA')
+
+    assert fakeClient.GetCallCount("info", 'AAA') == 1
+    assert fakeClient.GetCallCount("fast_info", 'AAA') == 1
+    assert infoCache.GetStats() == {"Hits": 0, "QuoteHits": 1, "Misses": 1}
+    assert secondTicker.GetCompanyName() == firstTicker.GetCompanyName()
+    assert secondTicker.GetCurrentPrice() == firstTicker.GetCurrentPrice()
+    assert secondTicker.GetPEGRatio() == firstTicker.GetPEGRatio()
+
+
+def test_quote_missing_a_needed_field_is_a_miss():
+    infoCache = TickerInfoCache.CTickerInfoCache()
+    fullInfo = {'shortName': 'A', 'currentPrice': 2.0, 'bid': 1.9, 'ask': 2.1}
+    infoCache.GetTickerInfo('AAA', lambda: fullInfo)
+
+    tickerInfo, infoSource = infoCache.GetTickerInfoAndSource('AAA', lambda: fullInfo, lambda: {'currentPrice': 3.0})
+
+    assert infoSource == TickerInfoCache.INFO_SOURCE_REMOTE
+    assert tickerInfo['bid'] == 1.9
+
+
+def test_persistent_cache_without_bid_and_ask_requests_info_once(tmp_path):
+    # Like two runs of the report, each with its own cache read from the same file.
+    fakeClient = CFakeYahooClient()
+    cacheFilePathName = str(tmp_path / "tickerInfoCache.json")
+    symbolList = ['AAA', 'BBB']
+
+    for runNum in range(2):
+        infoCache = TickerInfoCache.CTickerInfoCache(cacheFilePathName, TickerInfoCache.g_NoBidAskFieldGroupDict)
+        stockTickerDict = StockTickerYahoo.OpenTickersForStocks("yahoo", symbolList, {}, yahooClient=fakeClient,
+                                                                infoCache=infoCache)
+        assert list(stockTickerDict.keys()) == symbolList
+
+    assert infoCache.GetStats() == {"Hits": 0, "QuoteHits": 2, "Misses": 0}
+    for tickerSymbol in symbolList:
+        assert fakeClient.GetCallCount("info", tickerSymbol) == 1
+        assert fakeClient.GetCallCount("fast_info", tickerSymbol) == 1
+        assert stockTickerDict[tickerSymbol].GetCompanyName() == tickerSymbol + " Inc"
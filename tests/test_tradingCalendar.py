@@ -0,0 +1,48 @@
+################################################################################
+#
+# CTradingCalendar batch lookups.
+#
+################################################################################
+from datetime import date, timedelta
+
+import pytest
+
+import tradingCalendar as TradingCalendar
+
+
+def MakeWeekdayCalendar(numDays):
+    dateOrdinalList = []
+    currentDate = date(2020, 1, 2)
+    while (len(dateOrdinalList) < numDays):
+        if (currentDate.weekday() < 5):
+            dateOrdinalList.append(currentDate.toordinal())
+        currentDate = currentDate + timedelta(days=1)
+    return TradingCalendar.CTradingCalendar(dateOrdinalList), dateOrdinalList
+
+
+def test_single_offset_is_used_for_every_date():
+    tradingCalendar, dateOrdinalList = MakeWeekdayCalendar(30)
+
+    assert list(tradingCalendar.GetIndexesForNumTradingDaysOffset(dateOrdinalList, 5)) == \
+            [index - 5 if index >= 5 else -1 for index in range(30)]
+    assert list(tradingCalendar.GetIndexesForNumCalendarDaysOffset(dateOrdinalList, 7)) == \
+            [tradingCalendar.GetIndexForOrdinal(dateOrdinal - 7) for dateOrdinal in dateOrdinalList]
+
+
+def test_numpy_integers_match_ints():
+    np = pytest.importorskip("numpy")
+    tradingCalendar, dateOrdinalList = MakeWeekdayCalendar(30)
+    offsetList = [index % 4 for index in range(30)]
+
+    for offset in (np.int64(5), np.int32(5)):
+        assert list(tradingCalendar.GetIndexesForNumTradingDaysOffset(dateOrdinalList, offset)) == \
+                list(tradingCalendar.GetIndexesForNumTradingDaysOffset(dateOrdinalList, 5))
+        assert list(tradingCalendar.GetIndexesForNumCalendarDaysOffset(dateOrdinalList, offset)) == \
+                list(tradingCalendar.GetIndexesForNumCalendarDaysOffset(dateOrdinalList, 5))
+
+    numpyDateArray = np.array(dateOrdinalList, dtype=np.int64)
+    numpyOffsetArray = np.array(offsetList, dtype=np.int64)
+    assert list(tradingCalendar.GetIndexesForNumTradingDaysOffset(numpyDateArray, numpyOffsetArray)) == \
+            list(tradingCalendar.GetIndexesForNumTradingDaysOffset(dateOrdinalList, offsetList))
+    assert list(tradingCalendar.GetIndexesForNumCalendarDaysOffset(numpyDateArray, numpyOffsetArray)) == \
+            list(tradingCalendar.GetIndexesForNumCalendarDaysOffset(dateOrdinalList, offsetList))
@@ -0,0 +1,291 @@
+#!/usr/bin/python3
+################################################################################
+#
+# Copyright (c) 2024-2025 Dawson Dean
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+#
+# Ticker info cache.
+#
+# The info of a ticker (company name, PE, PEG, 52-week high/low, moving averages,
+# today's prices) is slow to fetch, and most of it changes at most once a day.
+# This keeps the info of each ticker in a local JSON file, and splits the fields
+# into groups that each have their own time-to-live in seconds.
+#
+# A group with a TTL of 0 is never cached. Those fields are fetched on every load,
+# either with a cheap quote request or, if that is not possible, with a full
+# info request that also refreshes every other group. A quote request is only
+# used if it returns every field of those groups, so a field that only the
+# full info has (like bid and ask from Yahoo) is never silently left out.
+#
+# That means that with g_DefaultFieldGroupDict every Yahoo load still needs the
+# full info request, because the quote request has no bid or ask. A caller that
+# does not need them should use g_NoBidAskFieldGroupDict, so a ticker whose
+# cached groups are fresh only needs the quote request.
+################################################################################
+import os
+import json
+import time
+import threading
+
+FUNDAMENTALS_FIELD_GROUP = "fundamentals"
+AVERAGES_FIELD_GROUP = "averages"
+QUOTE_FIELD_GROUP = "quote"
+
+# Where GetTickerInfoAndSource found the info
+INFO_SOURCE_CACHE = "cache"
+INFO_SOURCE_QUOTE = "quote"
+INFO_SOURCE_REMOTE = "remote"
+
+SECONDS_PER_HOUR = 60 * 60
+
+# Each group is {"TTL": seconds, "Fields": list of info keys}
+g_DefaultFieldGroupDict = {
+    FUNDAMENTALS_FIELD_GROUP: {"TTL": 24 * SECONDS_PER_HOUR, 
+                    "Fields": ['shortName', 'trailingPE', 'forwardPE', 'pegRatio', 'trailingPegRatio']},
+    AVERAGES_FIELD_GROUP: {"TTL": 12 * SECONDS_PER_HOUR, 
+                    "Fields": ['fiftyTwoWeekLow', 'fiftyTwoWeekHigh', 'fiftyDayAverage', 
+                                'twoHundredDayAverage', 'averageVolume']},
+    QUOTE_FIELD_GROUP: {"TTL": 0, 
+                    "Fields": ['currentPrice', 'regularMarketOpen', 'previousClose', 'open', 
+                                'dayLow', 'dayHigh', 'volume', 'bid', 'ask']},
+}
+
+# The same, for callers that do not need the bid and ask. Then a fresh cache
+# entry only needs a quote request, not a full info request.
+g_NoBidAskFieldGroupDict = dict(g_DefaultFieldGroupDict)
+g_NoBidAskFieldGroupDict[QUOTE_FIELD_GROUP] = {"TTL": 0, 
+                    "Fields": [fieldName for fieldName in g_DefaultFieldGroupDict[QUOTE_FIELD_GROUP]["Fields"]
+                                if (fieldName not in ['bid', 'ask'])]}
+
+
+
+
+
+################################################################################
+#
+# class CTickerInfoCache
+#
+################################################################################
+class CTickerInfoCache(object):
+    #####################################################
+    # Constructor - This method is part of any class
+    #
+    # filePathName is the JSON file of the cache. If it is None, then the cache
+    # only lasts as long as this object. fieldGroupDict has the same form as
+    # g_DefaultFieldGroupDict.
+    #####################################################
+    def __init__(self, filePathName=None, fieldGroupDict=None):
+        self.FilePathName = filePathName
+        if (fieldGroupDict is None):
+            fieldGroupDict = g_DefaultFieldGroupDict
+        self.FieldGroupDict = fieldGroupDict
+
+        # Symbol -> {groupName: {"t": fetch time, "f": {field: value}}}
+        self.EntryDict = {}
+        self.Lock = threading.Lock()
+
+        # Hits are served entirely from the cache. Quote hits are served from the
+        # cache plus a quote request. Misses needed a full info request.
+        self.NumHits = 0
+        self.NumQuoteHits = 0
+        self.NumMisses = 0
+
+        if ((self.FilePathName is not None) and (os.path.exists(self.FilePathName))):
+            self.Load()
+    # End -  __init__
+
+
+    #####################################################
+    #
+    # [CTickerInfoCache::Load]
+    #
+    # A missing or unreadable file is an empty cache.
+    #####################################################
+    def Load(self):
+        try:
+            with open(self.FilePathName, "r") as fileH:
+                entryDict = json.load(fileH)
+        except Exception:
+            print("CTickerInfoCache.Load. Cannot read the cache file: " + str(self.FilePathName))
+            entryDict = {}
+
+        with self.Lock:
+            self.EntryDict = entryDict
+    # End - Load
+
+
+    #####################################################
+    #
+    # [CTickerInfoCache::Save]
+    #
+    # Write to a temporary file and then rename it, so an interrupted save
+    # does not leave a half-written cache.
+    #####################################################
+    def Save(self):
+        if (self.FilePathName is None):
+            return
+
+        with self.Lock:
+            fileContents = json.dumps(self.EntryDict)
+        tempFilePathName = self.FilePathName + ".tmp"
+        with open(tempFilePathName, "w") as fileH:
+            fileH.write(fileContents)
+        os.replace(tempFilePathName, self.FilePathName)
+    # End - Save
+
+
+    #####################################################
+    #
+    # [CTickerInfoCache::GetCachedInfo]
+    #
+    # Returns the cached fields of all groups that are still fresh, and a list
+    # of the names of the groups that are stale or missing.
+    #####################################################
+    def GetCachedInfo(self, tickerSymbol, currentTime):
+        cachedInfo = {}
+        staleGroupList = []
+
+        with self.Lock:
+            symbolEntry = self.EntryDict.get(tickerSymbol, {})
+            for groupName, groupInfo in self.FieldGroupDict.items():
+                groupEntry = symbolEntry.get(groupName)
+                if ((groupEntry is None) or ((currentTime - groupEntry["t"]) >= groupInfo["TTL"])):
+                    staleGroupList.append(groupName)
+                    continue
+                cachedInfo.update(groupEntry["f"])
+            # End - for groupName, groupInfo in self.FieldGroupDict.items():
+
+        return cachedInfo, staleGroupList
+    # End - GetCachedInfo
+
+
+    #####################################################
+    #
+    # [CTickerInfoCache::SetCachedInfo]
+    #
+    # Save the fields of every group that may be cached.
+    # Fields that are not in tickerInfo are left out of the cache too.
+    #####################################################
+    def SetCachedInfo(self, tickerSymbol, tickerInfo, currentTime):
+        with self.Lock:
+            symbolEntry = self.EntryDict.setdefault(tickerSymbol, {})
+            for groupName, groupInfo in self.FieldGroupDict.items():
+                if (groupInfo["TTL"] <= 0):
+                    continue
+                fieldDict = {}
+                for fieldName in groupInfo["Fields"]:
+                    if (fieldName in tickerInfo):
+                        fieldDict[fieldName] = tickerInfo[fieldName]
+                symbolEntry[groupName] = {"t": currentTime, "f": fieldDict}
+            # End - for groupName, groupInfo in self.FieldGroupDict.items():
+    # End - SetCachedInfo
+
+
+    #####################################################
+    #
+    # [CTickerInfoCache::GetTickerInfo]
+    #
+    # Read through the cache.
+    #
+    # fetchInfoFunction() returns the full info dictionary of the ticker, or None.
+    # fetchQuoteFunction() returns the fields of the groups that are never
+    # cached, or None if it cannot. It may be None.
+    # quoteFieldList is the list of fields that fetchQuoteFunction can return.
+    # If it is given, and it is missing a field of the groups that are never
+    # cached, then fetchQuoteFunction is not called at all.
+    #####################################################
+    def GetTickerInfo(self, tickerSymbol, fetchInfoFunction, fetchQuoteFunction=None, quoteFieldList=None):
+        tickerInfo, _ = self.GetTickerInfoAndSource(tickerSymbol, fetchInfoFunction, fetchQuoteFunction, quoteFieldList)
+        return tickerInfo
+    # End - GetTickerInfo
+
+
+    #####################################################
+    #
+    # [CTickerInfoCache::GetTickerInfoAndSource]
+    #
+    # Same as GetTickerInfo, but also returns where the info came from:
+    # INFO_SOURCE_CACHE, INFO_SOURCE_QUOTE or INFO_SOURCE_REMOTE.
+    #####################################################
+    def GetTickerInfoAndSource(self, tickerSymbol, fetchInfoFunction, fetchQuoteFunction=None, quoteFieldList=None):
+        currentTime = time.time()
+        cachedInfo, staleGroupList = self.GetCachedInfo(tickerSymbol, currentTime)
+
+        if (len(staleGroupList) == 0):
+            with self.Lock:
+                self.NumHits += 1
+            return cachedInfo, INFO_SOURCE_CACHE
+
+        # If only the uncached groups are stale, then a quote request may be enough.
+        fOnlyQuoteIsStale = True
+        quoteNeededFieldList = []
+        for groupName in staleGroupList:
+            if (self.FieldGroupDict[groupName]["TTL"] > 0):
+                fOnlyQuoteIsStale = False
+                break
+            quoteNeededFieldList.extend(self.FieldGroupDict[groupName]["Fields"])
+        # End - for groupName in staleGroupList:
+        if ((quoteFieldList is not None) and (not set(quoteNeededFieldList).issubset(quoteFieldList))):
+            fOnlyQuoteIsStale = False
+        if ((fOnlyQuoteIsStale) and (fetchQuoteFunction is not None)):
+            quoteInfo = fetchQuoteFunction()
+            if ((quoteInfo is not None) and (set(quoteNeededFieldList).issubset(quoteInfo.keys()))):
+                with self.Lock:
+                    self.NumQuoteHits += 1
+                cachedInfo.update(quoteInfo)
+                return cachedInfo, INFO_SOURCE_QUOTE
+        # End - if ((fOnlyQuoteIsStale) and (fetchQuoteFunction is not None)):
+
+        with self.Lock:
+            self.NumMisses += 1
+        tickerInfo = fetchInfoFunction()
+        if (tickerInfo is not None):
+            self.SetCachedInfo(tickerSymbol, tickerInfo, currentTime)
+        return tickerInfo, INFO_SOURCE_REMOTE
+    # End - GetTickerInfoAndSource
+
+
+    #####################################################
+    #
+    # [CTickerInfoCache::GetStats]
+    #
+    #####################################################
+    def GetStats(self):
+        with self.Lock:
+            return {"Hits": self.NumHits, "QuoteHits": self.NumQuoteHits, "Misses": self.NumMisses}
+    # End - GetStats
+
+
+    #####################################################
+    #
+    # [CTickerInfoCache::PrintStats]
+    #
+    #####################################################
+    def PrintStats(self):
+        statsDict = self.GetStats()
+        print("Ticker info cache. Hits=" + str(statsDict["Hits"]) 
+                + ", QuoteHits=" + str(statsDict["QuoteHits"]) 
+                + ", Misses=" + str(statsDict["Misses"]))
+    # End - PrintStats
+
+# End - CTickerInfoCache
+
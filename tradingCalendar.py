@@ -0,0 +1,223 @@
+#!/usr/bin/python3
+################################################################################
+#
+# Copyright (c) 2024-2025 Dawson Dean
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+#
+# Trading calendar.
+#
+# This is built once from the date column of a price history (ordinal days,
+# oldest first). After that, "N trading days before D" and "N calendar days
+# before D" are both answered with array lookups, no date arithmetic.
+#
+# The calendar keeps one entry for every calendar day from the first to the
+# last trading day, which holds the index of the newest trading day on or
+# before that calendar day. 40 years of history is about 15,000 entries.
+################################################################################
+import numbers
+import operator
+from array import array
+from datetime import date
+
+INDEX_COLUMN_TYPECODE = 'i'
+
+
+
+
+################################################################################
+#
+# [MakeOffsetList]
+#
+# offsetList is either a sequence of numDates offsets or a single integer,
+# which may be a numpy integer, used for every date. Returns a list of ints.
+################################################################################
+def MakeOffsetList(offsetList, numDates):
+    if (isinstance(offsetList, numbers.Integral)):
+        return [operator.index(offsetList)] * numDates
+    return [operator.index(offset) for offset in offsetList]
+# End - MakeOffsetList
+
+
+
+
+
+################################################################################
+#
+# [GetDateForNumCalendarDaysOffset]
+#
+# The date deltaDays calendar days before (year, month, day).
+################################################################################
+def GetDateForNumCalendarDaysOffset(year, month, day, deltaDays):
+    newDate = date.fromordinal(date(year, month, day).toordinal() - deltaDays)
+    return newDate.year, newDate.month, newDate.day
+# End - GetDateForNumCalendarDaysOffset
+
+
+
+
+
+################################################################################
+#
+# class CTradingCalendar
+#
+################################################################################
+class CTradingCalendar(object):
+    #####################################################
+    # Constructor - This method is part of any class
+    #
+    # dateColumn holds the ordinal day of each trading day, oldest first.
+    # It is copied, so later changes to the history do not change the calendar.
+    #####################################################
+    def __init__(self, dateColumn):
+        self.DateColumn = array(INDEX_COLUMN_TYPECODE, dateColumn)
+        self.FirstOrdinal = 0
+        self.LastOrdinal = -1
+        self.CalendarDayIndexList = array(INDEX_COLUMN_TYPECODE)
+
+        numTradingDays = len(self.DateColumn)
+        if (numTradingDays <= 0):
+            return
+        self.FirstOrdinal = self.DateColumn[0]
+        self.LastOrdinal = self.DateColumn[numTradingDays - 1]
+
+        # For each calendar day, the index of the newest trading day on or before it.
+        self.CalendarDayIndexList = array(INDEX_COLUMN_TYPECODE, [0]) * ((self.LastOrdinal - self.FirstOrdinal) + 1)
+        for tradingDayIndex in range(numTradingDays - 1):
+            firstCalendarDay = self.DateColumn[tradingDayIndex] - self.FirstOrdinal
+            nextCalendarDay = self.DateColumn[tradingDayIndex + 1] - self.FirstOrdinal
+            for calendarDay in range(firstCalendarDay, nextCalendarDay):
+                self.CalendarDayIndexList[calendarDay] = tradingDayIndex
+        self.CalendarDayIndexList[self.LastOrdinal - self.FirstOrdinal] = numTradingDays - 1
+    # End -  __init__
+
+
+    #####################################################
+    # [CTradingCalendar::GetNumTradingDays]
+    #####################################################
+    def GetNumTradingDays(self):
+        return len(self.DateColumn)
+
+
+    #####################################################
+    #
+    # [CTradingCalendar::GetIndexForOrdinal]
+    #
+    # The index of the newest trading day on or before the ordinal day,
+    # or -1 if it is before the first trading day.
+    #####################################################
+    def GetIndexForOrdinal(self, dateOrdinal):
+        if (dateOrdinal < self.FirstOrdinal):
+            return -1
+        if (dateOrdinal >= self.LastOrdinal):
+            return len(self.DateColumn) - 1
+        return self.CalendarDayIndexList[dateOrdinal - self.FirstOrdinal]
+    # End - GetIndexForOrdinal
+
+
+    #####################################################
+    # [CTradingCalendar::GetTradingDayIndex]
+    #####################################################
+    def GetTradingDayIndex(self, year, month, day):
+        return self.GetIndexForOrdinal(date(year, month, day).toordinal())
+
+
+    #####################################################
+    #
+    # [CTradingCalendar::GetIndexForNumTradingDaysOffset]
+    #
+    # The index of the trading day numTradingDays before the newest trading
+    # day on or before dateOrdinal, or -1 if that is before the history.
+    #####################################################
+    def GetIndexForNumTradingDaysOffset(self, dateOrdinal, numTradingDays):
+        startIndex = self.GetIndexForOrdinal(dateOrdinal)
+        if (startIndex < 0):
+            return -1
+        resultIndex = startIndex - numTradingDays
+        if ((resultIndex < 0) or (resultIndex >= len(self.DateColumn))):
+            return -1
+        return resultIndex
+    # End - GetIndexForNumTradingDaysOffset
+
+
+    #####################################################
+    #
+    # [CTradingCalendar::GetIndexForNumCalendarDaysOffset]
+    #
+    # The index of the newest trading day on or before the date that is
+    # deltaDays calendar days before dateOrdinal, or -1.
+    #####################################################
+    def GetIndexForNumCalendarDaysOffset(self, dateOrdinal, deltaDays):
+        return self.GetIndexForOrdinal(dateOrdinal - deltaDays)
+    # End - GetIndexForNumCalendarDaysOffset
+
+
+    #####################################################
+    #
+    # [CTradingCalendar::GetDateForNumTradingDaysOffset]
+    #
+    # Returns fFound, year, month, day
+    #####################################################
+    def GetDateForNumTradingDaysOffset(self, year, month, day, numTradingDays):
+        resultIndex = self.GetIndexForNumTradingDaysOffset(date(year, month, day).toordinal(), numTradingDays)
+        if (resultIndex < 0):
+            return False, 0, 0, 0
+        resultDate = date.fromordinal(self.DateColumn[resultIndex])
+        return True, resultDate.year, resultDate.month, resultDate.day
+    # End - GetDateForNumTradingDaysOffset
+
+
+    #####################################################
+    #
+    # [CTradingCalendar::GetIndexesForNumTradingDaysOffset]
+    #
+    # Batch version of GetIndexForNumTradingDaysOffset.
+    # dateOrdinalList is a sequence of ordinal days, and offsetList is either
+    # a sequence of the same length or a single integer used for every date.
+    # Numpy integers work for both.
+    # Returns an array of indexes, -1 where the result is outside the history.
+    #####################################################
+    def GetIndexesForNumTradingDaysOffset(self, dateOrdinalList, offsetList):
+        offsetList = MakeOffsetList(offsetList, len(dateOrdinalList))
+        resultList = array(INDEX_COLUMN_TYPECODE, [0]) * len(dateOrdinalList)
+        for index, dateOrdinal in enumerate(dateOrdinalList):
+            resultList[index] = self.GetIndexForNumTradingDaysOffset(operator.index(dateOrdinal), offsetList[index])
+        return resultList
+    # End - GetIndexesForNumTradingDaysOffset
+
+
+    #####################################################
+    #
+    # [CTradingCalendar::GetIndexesForNumCalendarDaysOffset]
+    #
+    # Batch version of GetIndexForNumCalendarDaysOffset. The arguments are
+    # the same as GetIndexesForNumTradingDaysOffset.
+    #####################################################
+    def GetIndexesForNumCalendarDaysOffset(self, dateOrdinalList, offsetList):
+        offsetList = MakeOffsetList(offsetList, len(dateOrdinalList))
+        resultList = array(INDEX_COLUMN_TYPECODE, [0]) * len(dateOrdinalList)
+        for index, dateOrdinal in enumerate(dateOrdinalList):
+            resultList[index] = self.GetIndexForOrdinal(operator.index(dateOrdinal) - offsetList[index])
+        return resultList
+    # End - GetIndexesForNumCalendarDaysOffset
+
+# End - CTradingCalendar
+
@@ -0,0 +1,316 @@
+#!/usr/bin/python3
+################################################################################
+#
+# Copyright (c) 2024-2025 Dawson Dean
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+#
+# Universe panel.
+#
+# Aligns the histories of many tickers onto one shared date axis, which is
+# every date that any of the tickers traded, oldest first. Each field
+# ('Cl', 'RSI', ...) is one 2-D matrix with a row for each ticker and a column
+# for each date, stored row by row in a single array.array. So the history of
+# one ticker is contiguous, and one date across all tickers is a strided slice.
+#
+# A ticker that did not trade on a date has NaN for that date, and is marked
+# missing in the present matrix, unless the panel is built with fForwardFill,
+# which repeats the last value the ticker had. Dates before the first day of
+# a ticker are always missing.
+#
+# GetMatrix returns a field as a numpy array without copying it, for code that
+# uses numpy. Nothing else here needs numpy.
+################################################################################
+import bisect
+from array import array
+
+import priceHistory as PriceHistory
+
+MISSING_VALUE = float('nan')
+PRESENT_TYPECODE = 'b'
+
+
+
+
+
+################################################################################
+#
+# [MakeSharedDateColumn]
+#
+# Every date in any of the date columns, oldest first, without duplicates.
+################################################################################
+def MakeSharedDateColumn(dateColumnList):
+    dateSet = set()
+    for dateColumn in dateColumnList:
+        dateSet.update(dateColumn)
+    return array(PriceHistory.DATE_COLUMN_TYPECODE, sorted(dateSet))
+# End - MakeSharedDateColumn
+
+
+
+
+
+################################################################################
+#
+# class CUniversePanel
+#
+################################################################################
+class CUniversePanel(object):
+    #####################################################
+    # Constructor - This method is part of any class
+    #
+    # stockTickerDict maps symbols to CStockTicker. Tickers that are None or
+    # have no history are left out. fieldNameList is the columns to copy,
+    # and the default is just the close.
+    #####################################################
+    def __init__(self, stockTickerDict, fieldNameList=None, fForwardFill=False):
+        if (fieldNameList is None):
+            fieldNameList = ['Cl']
+        self.FieldNameList = list(fieldNameList)
+        self.fForwardFill = fForwardFill
+
+        self.SymbolList = []
+        historyList = []
+        for tickerSymbol, stockTicker in stockTickerDict.items():
+            if ((stockTicker is None) or (len(stockTicker.History) <= 0)):
+                continue
+            self.SymbolList.append(tickerSymbol)
+            historyList.append(stockTicker.History)
+        # End - for tickerSymbol, stockTicker in stockTickerDict.items():
+        self.SymbolIndexDict = {tickerSymbol: index for index, tickerSymbol in enumerate(self.SymbolList)}
+
+        self.DateColumn = MakeSharedDateColumn([history.GetDateColumn() for history in historyList])
+        numDates = len(self.DateColumn)
+        numCells = len(self.SymbolList) * numDates
+
+        self.PresentMatrix = array(PRESENT_TYPECODE, [0]) * numCells
+        self.FieldMatrixDict = {}
+        for fieldName in self.FieldNameList:
+            self.FieldMatrixDict[fieldName] = array(PriceHistory.VALUE_COLUMN_TYPECODE, [MISSING_VALUE]) * numCells
+
+        for tickerIndex, history in enumerate(historyList):
+            self.AddTickerRow(tickerIndex, history)
+    # End -  __init__
+
+
+    #####################################################
+    #
+    # [CUniversePanel::AddTickerRow]
+    #
+    # Copy one ticker into its row of every matrix. Most tickers trade on
+    # a contiguous run of the shared dates, and then each column is copied
+    # with one slice assignment. Otherwise, the dates are matched one at a time.
+    #####################################################
+    def AddTickerRow(self, tickerIndex, history):
+        numDates = len(self.DateColumn)
+        rowStart = tickerIndex * numDates
+        tickerDateColumn = history.GetDateColumn()
+        numTickerDates = len(tickerDateColumn)
+
+        firstDateIndex = bisect.bisect_left(self.DateColumn, tickerDateColumn[0])
+        lastDateIndex = firstDateIndex + numTickerDates - 1
+        fContiguous = ((lastDateIndex < numDates) 
+                        and (self.DateColumn[lastDateIndex] == tickerDateColumn[numTickerDates - 1]))
+
+        if (fContiguous):
+            cellStart = rowStart + firstDateIndex
+            cellStop = cellStart + numTickerDates
+            self.PresentMatrix[cellStart:cellStop] = array(PRESENT_TYPECODE, [1]) * numTickerDates
+            for fieldName, fieldMatrix in self.FieldMatrixDict.items():
+                # The column may be a memoryview, see CPriceHistory.SetMappedColumns
+                memoryview(fieldMatrix)[cellStart:cellStop] = history.GetColumn(fieldName)
+        else:
+            # Both date columns are sorted, so walk them together.
+            cellIndexList = []
+            dateIndex = firstDateIndex
+            for tickerDate in tickerDateColumn:
+                while (self.DateColumn[dateIndex] != tickerDate):
+                    dateIndex += 1
+                cellIndexList.append(rowStart + dateIndex)
+                self.PresentMatrix[rowStart + dateIndex] = 1
+            # End - for tickerDate in tickerDateColumn:
+
+            for fieldName, fieldMatrix in self.FieldMatrixDict.items():
+                fieldColumn = history.GetColumn(fieldName)
+                for valueIndex, cellIndex in enumerate(cellIndexList):
+                    fieldMatrix[cellIndex] = fieldColumn[valueIndex]
+            # End - for fieldName, fieldMatrix in self.FieldMatrixDict.items():
+        # End - if (fContiguous):
+
+        if (self.fForwardFill):
+            self.ForwardFillTickerRow(tickerIndex, firstDateIndex)
+    # End - AddTickerRow
+
+
+    #####################################################
+    #
+    # [CUniversePanel::ForwardFillTickerRow]
+    #
+    # Replace each missing value of a ticker after its first date with
+    # the last value before it.
+    #####################################################
+    def ForwardFillTickerRow(self, tickerIndex, firstDateIndex):
+        numDates = len(self.DateColumn)
+        rowStart = tickerIndex * numDates
+        rowStop = rowStart + numDates
+        presentMatrix = self.PresentMatrix
+
+        # Find the runs of missing dates
+        missingRunList = []
+        cellIndex = rowStart + firstDateIndex
+        while (cellIndex < rowStop):
+            if (presentMatrix[cellIndex]):
+                cellIndex += 1
+                continue
+            runStart = cellIndex
+            while ((cellIndex < rowStop) and (not presentMatrix[cellIndex])):
+                cellIndex += 1
+            missingRunList.append((runStart, cellIndex))
+        # End - while (cellIndex < rowStop):
+
+        for fieldMatrix in self.FieldMatrixDict.values():
+            for runStart, runStop in missingRunList:
+                fieldMatrix[runStart:runStop] = array(PriceHistory.VALUE_COLUMN_TYPECODE, 
+                                                    [fieldMatrix[runStart - 1]]) * (runStop - runStart)
+        # End - for fieldMatrix in self.FieldMatrixDict.values():
+    # End - ForwardFillTickerRow
+
+
+    #####################################################
+    # [CUniversePanel::GetNumTickers]
+    #####################################################
+    def GetNumTickers(self):
+        return len(self.SymbolList)
+
+
+    #####################################################
+    # [CUniversePanel::GetNumDates]
+    #####################################################
+    def GetNumDates(self):
+        return len(self.DateColumn)
+
+
+    #####################################################
+    # [CUniversePanel::GetSymbolList]
+    #####################################################
+    def GetSymbolList(self):
+        return self.SymbolList
+
+
+    #####################################################
+    # [CUniversePanel::GetDateColumn]
+    #####################################################
+    def GetDateColumn(self):
+        return self.DateColumn
+
+
+    #####################################################
+    #
+    # [CUniversePanel::GetTickerIndex]
+    #
+    # Returns -1 if the symbol is not in the panel.
+    #####################################################
+    def GetTickerIndex(self, tickerSymbol):
+        return self.SymbolIndexDict.get(tickerSymbol, -1)
+
+
+    #####################################################
+    #
+    # [CUniversePanel::GetDateIndex]
+    #
+    # Returns -1 if no ticker traded on that date.
+    #####################################################
+    def GetDateIndex(self, year, month, day):
+        dateOrdinal = PriceHistory.MakeDateOrdinal(year, month, day)
+        dateIndex = bisect.bisect_left(self.DateColumn, dateOrdinal)
+        if ((dateIndex >= len(self.DateColumn)) or (self.DateColumn[dateIndex] != dateOrdinal)):
+            return -1
+        return dateIndex
+    # End - GetDateIndex
+
+
+    #####################################################
+    #
+    # [CUniversePanel::IsPresent]
+    #
+    # True if the ticker traded on that date. A forward-filled value is not present.
+    #####################################################
+    def IsPresent(self, tickerIndex, dateIndex):
+        return (self.PresentMatrix[(tickerIndex * len(self.DateColumn)) + dateIndex] != 0)
+
+
+    #####################################################
+    # [CUniversePanel::GetValue]
+    #####################################################
+    def GetValue(self, fieldName, tickerIndex, dateIndex):
+        return self.FieldMatrixDict[fieldName][(tickerIndex * len(self.DateColumn)) + dateIndex]
+
+
+    #####################################################
+    #
+    # [CUniversePanel::GetTickerRow]
+    #
+    # Every date of one ticker, as a memoryview of the matrix.
+    #####################################################
+    def GetTickerRow(self, fieldName, tickerIndex):
+        numDates = len(self.DateColumn)
+        rowStart = tickerIndex * numDates
+        return memoryview(self.FieldMatrixDict[fieldName])[rowStart:rowStart + numDates]
+    # End - GetTickerRow
+
+
+    #####################################################
+    #
+    # [CUniversePanel::GetDateCrossSection]
+    #
+    # Every ticker on one date, as a strided memoryview of the matrix.
+    #####################################################
+    def GetDateCrossSection(self, fieldName, dateIndex):
+        return memoryview(self.FieldMatrixDict[fieldName])[dateIndex::len(self.DateColumn)]
+    # End - GetDateCrossSection
+
+
+    #####################################################
+    #
+    # [CUniversePanel::GetMatrix]
+    #
+    # A field as a numpy array with shape (numTickers, numDates). This shares
+    # memory with the panel, so it is not copied. This needs numpy.
+    #####################################################
+    def GetMatrix(self, fieldName):
+        import numpy as np
+        return np.frombuffer(self.FieldMatrixDict[fieldName], dtype=np.float64).reshape(len(self.SymbolList), len(self.DateColumn))
+    # End - GetMatrix
+
+
+    #####################################################
+    #
+    # [CUniversePanel::GetPresentMatrix]
+    #
+    # Like GetMatrix, but of the present flags, as a bool array.
+    #####################################################
+    def GetPresentMatrix(self):
+        import numpy as np
+        return np.frombuffer(self.PresentMatrix, dtype=np.int8).reshape(len(self.SymbolList), len(self.DateColumn)).view(np.bool_)
+    # End - GetPresentMatrix
+
+# End - CUniversePanel
+
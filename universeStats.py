@@ -0,0 +1,252 @@
+#!/usr/bin/python3
+################################################################################
+#
+# Copyright (c) 2024-2025 Dawson Dean
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+################################################################################
+#
+# Compute the stats of many tickers at once on a process pool.
+#
+# The stats are pure Python, so threads do not help. Instead, the close prices
+# of every ticker are packed into one shared memory block, and each worker
+# process reads the closes of its tickers from that block and writes their stat
+# columns into a second shared block. Only the block names and a few offsets
+# are pickled, never the prices.
+#
+# Block layouts, where totalRows is the sum of the rows of all the tickers:
+#   closes:   totalRows doubles, the close column of each ticker one after another
+#   stats:    one run of totalRows doubles for each name in g_StatColumnNameList,
+#             with the tickers in the same order as the closes
+################################################################################
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import priceHistory as PriceHistory
+import stockStats as StockStats
+import stockTicker as StockTicker
+
+g_StatColumnNameList = PriceHistory.g_IndicatorColumnNameList
+
+# Each worker task covers about this many rows, so small tickers are batched together
+DEFAULT_ROWS_PER_TASK = 200000
+
+VALUE_SIZE = array(PriceHistory.VALUE_COLUMN_TYPECODE).itemsize
+
+
+
+
+
+################################################################################
+#
+# [ComputeStatsInWorker]
+#
+# Runs in a worker process. taskList is a list of (rowOffset, numRows), one
+# for each ticker in this task.
+################################################################################
+def ComputeStatsInWorker(closeBlockName, statBlockName, totalRows, taskList):
+    closeBlock = shared_memory.SharedMemory(name=closeBlockName)
+    statBlock = shared_memory.SharedMemory(name=statBlockName)
+    try:
+        closeView = closeBlock.buf.cast(PriceHistory.VALUE_COLUMN_TYPECODE)
+        statView = statBlock.buf.cast(PriceHistory.VALUE_COLUMN_TYPECODE)
+        for rowOffset, numRows in taskList:
+            statColumnDict = StockStats.ComputeAllStatColumns(closeView[rowOffset:rowOffset + numRows])
+            for statIndex, columnName in enumerate(g_StatColumnNameList):
+                startOffset = (statIndex * totalRows) + rowOffset
+                statView[startOffset:startOffset + numRows] = statColumnDict[columnName]
+        # End - for rowOffset, numRows in taskList:
+
+        # Release the views, or the blocks cannot be closed.
+        closeView.release()
+        statView.release()
+    finally:
+        closeBlock.close()
+        statBlock.close()
+
+    return len(taskList)
+# End - ComputeStatsInWorker
+
+
+
+
+
+################################################################################
+#
+# [MakeWorkerTaskList]
+#
+# Split the tickers into tasks of about rowsPerTask rows each.
+# Returns a list of tasks, where each task is a list of (rowOffset, numRows).
+################################################################################
+def MakeWorkerTaskList(numRowsList, rowsPerTask):
+    workerTaskList = []
+    currentTask = []
+    currentTaskRows = 0
+    rowOffset = 0
+    for numRows in numRowsList:
+        currentTask.append((rowOffset, numRows))
+        currentTaskRows += numRows
+        rowOffset += numRows
+        if (currentTaskRows >= rowsPerTask):
+            workerTaskList.append(currentTask)
+            currentTask = []
+            currentTaskRows = 0
+    # End - for numRows in numRowsList:
+
+    if (len(currentTask) > 0):
+        workerTaskList.append(currentTask)
+    return workerTaskList
+# End - MakeWorkerTaskList
+
+
+
+
+
+################################################################################
+#
+# [ComputeAllStatsForTickers]
+#
+# Compute the stats of every ticker in stockTickerDict, the same as calling
+# ComputeAllStats(STATS_ENGINE_COLUMNAR) on each one, but spread across numWorkers processes.
+# numWorkers=None uses one process per CPU. With 1 worker, or only one
+# ticker, this just calls ComputeAllStats in this process.
+#
+# executor is an optional ProcessPoolExecutor to reuse across calls.
+################################################################################
+def ComputeAllStatsForTickers(stockTickerDict, numWorkers=None, executor=None, rowsPerTask=DEFAULT_ROWS_PER_TASK):
+    fDebug = False
+
+    tickerList = []
+    for stockTicker in stockTickerDict.values():
+        if ((stockTicker is not None) and (len(stockTicker.History) > 0)):
+            tickerList.append(stockTicker)
+    if (numWorkers is None):
+        numWorkers = os.cpu_count() or 1
+
+    if (len(tickerList) <= 0):
+        return stockTickerDict
+    if ((executor is None) and ((numWorkers <= 1) or (len(tickerList) <= 1))):
+        for stockTicker in tickerList:
+            stockTicker.ComputeAllStats(StockTicker.STATS_ENGINE_COLUMNAR)
+        return stockTickerDict
+
+    numRowsList = [len(stockTicker.History) for stockTicker in tickerList]
+    totalRows = sum(numRowsList)
+    if (fDebug):
+        print("ComputeAllStatsForTickers. numTickers=" + str(len(tickerList)) + ", totalRows=" + str(totalRows))
+
+    closeBlock = shared_memory.SharedMemory(create=True, size=totalRows * VALUE_SIZE)
+    statBlock = shared_memory.SharedMemory(create=True, size=len(g_StatColumnNameList) * totalRows * VALUE_SIZE)
+    closeView = None
+    statView = None
+    try:
+        # Pack the closes
+        closeView = closeBlock.buf.cast(PriceHistory.VALUE_COLUMN_TYPECODE)
+        rowOffset = 0
+        for stockTicker, numRows in zip(tickerList, numRowsList):
+            closeView[rowOffset:rowOffset + numRows] = stockTicker.History.GetColumn('Cl')
+            rowOffset += numRows
+
+        workerTaskList = MakeWorkerTaskList(numRowsList, rowsPerTask)
+        if (executor is None):
+            with ProcessPoolExecutor(max_workers=min(numWorkers, len(workerTaskList))) as newExecutor:
+                RunWorkerTasks(newExecutor, closeBlock.name, statBlock.name, totalRows, workerTaskList)
+        else:
+            RunWorkerTasks(executor, closeBlock.name, statBlock.name, totalRows, workerTaskList)
+
+        # Copy the stats back into each ticker
+        statView = statBlock.buf.cast(PriceHistory.VALUE_COLUMN_TYPECODE)
+        rowOffset = 0
+        for stockTicker, numRows in zip(tickerList, numRowsList):
+            for statIndex, columnName in enumerate(g_StatColumnNameList):
+                startOffset = (statIndex * totalRows) + rowOffset
+                stockTicker.History.SetComputedColumn(columnName, array(PriceHistory.VALUE_COLUMN_TYPECODE, 
+                                                                        statView[startOffset:startOffset + numRows]))
+            stockTicker.SetCurrentStatsFromHistory()
+            rowOffset += numRows
+        # End - for stockTicker, numRows in zip(tickerList, numRowsList):
+    finally:
+        if (closeView is not None):
+            closeView.release()
+        if (statView is not None):
+            statView.release()
+        closeBlock.close()
+        closeBlock.unlink()
+        statBlock.close()
+        statBlock.unlink()
+
+    return stockTickerDict
+# End - ComputeAllStatsForTickers
+
+
+
+
+
+################################################################################
+#
+# [RunWorkerTasks]
+#
+################################################################################
+def RunWorkerTasks(executor, closeBlockName, statBlockName, totalRows, workerTaskList):
+    futureList = []
+    for taskList in workerTaskList:
+        futureList.append(executor.submit(ComputeStatsInWorker, closeBlockName, statBlockName, totalRows, taskList))
+    # result() raises any exception from the worker
+    for future in futureList:
+        future.result()
+# End - RunWorkerTasks
+
+
+
+
+
+################################################################################
+#
+# [ComputeUniverseMarkerCorrelations]
+#
+# Like CStockTicker.ComputeMarkerCorrelations, but the (marker, future return)
+# pairs of every ticker in stockTickerDict are pooled before correlating.
+# Returns a dictionary from each (markerName, numDaysInFuture) to
+# (pearsonCorrelation, spearmanCorrelation, numPairs).
+################################################################################
+def ComputeUniverseMarkerCorrelations(stockTickerDict, markerNameList, horizonList):
+    pooledPairDict = {}
+    for stockTicker in stockTickerDict.values():
+        if (stockTicker is None):
+            continue
+        pairDict = stockTicker.GetSynchronizedStatAndFutureReturnColumns(markerNameList, horizonList)
+        for key, (markerValues, futureReturns) in pairDict.items():
+            if (key not in pooledPairDict):
+                pooledPairDict[key] = (array(PriceHistory.VALUE_COLUMN_TYPECODE), array(PriceHistory.VALUE_COLUMN_TYPECODE))
+            pooledPairDict[key][0].extend(markerValues)
+            pooledPairDict[key][1].extend(futureReturns)
+        # End - for key, (markerValues, futureReturns) in pairDict.items():
+    # End - for stockTicker in stockTickerDict.values():
+
+    resultDict = {}
+    for key, (markerValues, futureReturns) in pooledPairDict.items():
+        resultDict[key] = (StockStats.ComputePearsonCorrelation(markerValues, futureReturns), 
+                        StockStats.ComputeSpearmanCorrelation(markerValues, futureReturns), 
+                        len(markerValues))
+    return resultDict
+# End - ComputeUniverseMarkerCorrelations
+